@@ -0,0 +1,93 @@
+# benchmarks/import_budget.py
+"""
+Verifica o custo de inicialização do sincronizador.
+
+Mede (com python -X importtime, em processos novos) o tempo de importação de main.py
+e falha se a mediana passar do orçamento. Também confere que importar o módulo da
+interface gráfica não carrega o tkinter nem o requests.
+
+Uso (a partir de sync_project/):
+    python -m benchmarks.import_budget --budget-ms 150
+Sai com código 1 se alguma verificação falhar. No pytest (tests/test_import_budget.py)
+roda sempre a verificação da interface; o orçamento de tempo só com
+SYNC_CHECK_IMPORT_BUDGET=1, pois depende da carga da máquina.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento padrão (ms) para importar main.py, medido em um contêiner python:3.9-slim.
+DEFAULT_BUDGET_MS = 150
+# Módulos que a interface gráfica só pode carregar quando a janela é aberta.
+GUI_DEFERRED_MODULES = ('tkinter', 'requests')
+
+def import_times(module):
+    """
+    Importa o módulo em um processo novo e retorna {módulo: (próprio_us, acumulado_us)}.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=PROJECT_ROOT, stderr=subprocess.PIPE, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def check_gui_imports():
+    """Retorna as falhas de client_manager_gui: módulos que ele não pode carregar ao ser importado."""
+    gui_modules = import_times('client_manager_gui')
+    return [
+        f"Importar client_manager_gui carregou '{module}'; ele deve ser importado sob demanda."
+        for module in GUI_DEFERRED_MODULES if module in gui_modules
+    ]
+
+def check_budget(budget_ms=DEFAULT_BUDGET_MS, runs=5):
+    """
+    Mede a importação de main.py e confere o orçamento e as importações da interface.
+
+    Args:
+        budget_ms (float): Orçamento (ms) para a mediana da importação de main.py.
+        runs (int): Quantas medições fazer.
+
+    Returns:
+        tuple: (mediana em ms, medições de cada processo, lista de falhas).
+    """
+    # A primeira importação compila os .pyc; ela não entra na conta.
+    import_times('main')
+    samples = [import_times('main') for _ in range(runs)]
+    total_ms = statistics.median(sample['main'][1] for sample in samples) / 1000.0
+
+    failures = []
+    if total_ms > budget_ms:
+        failures.append(f"main.py levou {total_ms:.1f} ms para importar (orçamento: {budget_ms:.0f} ms).")
+    failures.extend(check_gui_imports())
+    return total_ms, samples, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de importação do sincronizador.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=5, help="Medições (vale a mediana).")
+    parser.add_argument('--top', type=int, default=10, help="Quantos módulos mais caros listar.")
+    args = parser.parse_args()
+
+    total_ms, samples, failures = check_budget(args.budget_ms, args.runs)
+    print(f"Importação de main.py: {total_ms:.1f} ms (mediana de {args.runs}; orçamento {args.budget_ms:.0f} ms)")
+    print("Módulos mais caros (tempo próprio):")
+    last = samples[-1]
+    for name, (self_us, _) in sorted(last.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {name:<45} {self_us / 1000.0:7.1f} ms")
+
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
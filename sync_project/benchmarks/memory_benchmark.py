@@ -0,0 +1,153 @@
+# benchmarks/memory_benchmark.py
+"""
+Mede a memória ocupada pelas listas de tickets de um ciclo.
+
+Sobe os servidores locais (Jira e Freshdesk), cria um cliente sintético e, em um
+processo novo para cada modo, faz as buscas do início do ciclo mantendo o resultado
+em memória:
+    records   - as buscas atuais (registros compactos de core.records);
+    payloads  - as mesmas páginas guardando o JSON completo da API, como a camada de
+                busca fazia antes dos registros compactos.
+Reporta o RSS retido depois das buscas (com as listas ainda em uso) e o pico de RSS.
+
+Uso (a partir de sync_project/):
+    python -m benchmarks.memory_benchmark --tickets 10000 --comments 10
+"""
+import argparse
+import gc
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import mock_server
+from .run_benchmark import PROJECT_ROOT, build_client, start_mock_server
+
+MODES = ('payloads', 'records')
+# Campos que a busca JQL pedia antes dos registros compactos.
+PAYLOAD_JIRA_FIELDS = 'summary,description,status,comment,updated,created,priority,attachment'
+
+def _current_rss_kb():
+    """RSS atual do processo (Linux); sem /proc, usa o pico como aproximação."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _fetch_payloads(since_date, config):
+    """Percorre as mesmas páginas das buscas do ciclo, guardando o JSON completo de cada ticket."""
+    from sync_app.core.network import api_request
+    from sync_app.services import freshdesk_service, jira_service
+
+    issues, start_at = [], 0
+    jql_query = f"project = '{config['JIRA_PROJECT_KEY']}' AND updated >= '{since_date}' ORDER BY updated DESC"
+    while True:
+        params = {'jql': jql_query, 'fields': PAYLOAD_JIRA_FIELDS, 'startAt': start_at,
+                  'maxResults': jira_service.JIRA_SEARCH_PAGE_SIZE}
+        response_data = api_request('GET', f"{config['JIRA_URL']}/rest/api/3/search", config['JIRA_AUTH'], params=params)
+        page = (response_data or {}).get('issues', [])
+        issues.extend(page)
+        start_at += len(page)
+        if not page or start_at >= response_data.get('total', 0):
+            break
+
+    tickets, page_number = [], 1
+    url = f"{freshdesk_service.get_freshdesk_base_url(config)}/api/v2/tickets"
+    while True:
+        params = {'updated_since': f"{since_date}T00:00:00Z", 'order_by': 'updated_at', 'order_type': 'desc',
+                  'per_page': freshdesk_service.FRESHDESK_PAGE_SIZE, 'page': page_number}
+        page = api_request('GET', url, config['FRESHDESK_AUTH'], params=params) or []
+        tickets.extend(page)
+        if len(page) < freshdesk_service.FRESHDESK_PAGE_SIZE:
+            break
+        page_number += 1
+    return issues, tickets
+
+def measure(mode, client_folder):
+    """
+    Faz as buscas do ciclo no modo indicado (no processo atual).
+
+    Returns:
+        dict: Tickets buscados, tempo e memória (MB).
+    """
+    from sync_app.core import log
+    from sync_app.services import freshdesk_service, jira_service, sync_service
+
+    log.configure(level='ERROR')
+    config = sync_service.prepare_client_config(client_folder, 'BENCH')
+    since_date = sync_service.compute_since_date(config)
+    gc.collect()
+    rss_before = _current_rss_kb()
+    started_at = time.perf_counter()
+    if mode == 'payloads':
+        jira_tickets, freshdesk_tickets = _fetch_payloads(since_date, config)
+    else:
+        jira_tickets = jira_service.fetch_updated_jira_tickets(since_date, config)
+        freshdesk_tickets = freshdesk_service.fetch_updated_freshdesk_tickets(since_date, config)
+    elapsed = time.perf_counter() - started_at
+    gc.collect()
+    retained_kb = _current_rss_kb() - rss_before
+    return {
+        'mode': mode,
+        'jira_tickets': len(jira_tickets),
+        'freshdesk_tickets': len(freshdesk_tickets),
+        'fetch_seconds': round(elapsed, 2),
+        'retained_rss_mb': round(retained_kb / 1024.0, 1),
+        # ru_maxrss é em KB no Linux.
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    }
+
+def _measure_in_subprocess(mode, client_folder):
+    result = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.memory_benchmark', '--measure', mode, '--client-folder', client_folder],
+        cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória das listas de tickets buscadas em um ciclo.")
+    mock_server.add_arguments(parser)
+    parser.set_defaults(tickets=10000)
+    parser.add_argument('--measure', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--client-folder', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, PROJECT_ROOT)
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.client_folder)))
+        return
+
+    settings = mock_server.settings_from_args(args)
+    jira_process, jira_url = start_mock_server(settings)
+    freshdesk_process, freshdesk_url = start_mock_server(settings)
+    workdir = tempfile.mkdtemp(prefix='sync-mem-bench-')
+    try:
+        client_folder = build_client(workdir, 'BENCH', settings, jira_url, freshdesk_url)
+        results = [_measure_in_subprocess(mode, client_folder) for mode in MODES]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        for process in (jira_process, freshdesk_process):
+            process.terminate()
+            process.wait()
+
+    print(f"\n{'='*60}\nMemória das listas do ciclo ({settings['tickets']} tickets, "
+          f"{settings['comments']} comentários por issue)\n{'='*60}")
+    print(f"  {'modo':<10} {'tickets':>14} {'busca (s)':>10} {'retido (MB)':>12} {'pico (MB)':>10}")
+    for result in results:
+        tickets = f"{result['jira_tickets']}/{result['freshdesk_tickets']}"
+        print(f"  {result['mode']:<10} {tickets:>14} {result['fetch_seconds']:>10} "
+              f"{result['retained_rss_mb']:>12} {result['peak_rss_mb']:>10}")
+    payloads, records = results
+    if payloads['retained_rss_mb'] > 0:
+        reduction = 100.0 * (1 - records['retained_rss_mb'] / payloads['retained_rss_mb'])
+        print(f"  Redução do RSS retido: {reduction:.0f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+# benchmarks/mock_server.py
+"""
+Servidor local que imita os endpoints do Jira Cloud e do Freshdesk usados pelo
+sincronizador, com dados sintéticos, latência e limite de requisições configuráveis.
+
+Uso:
+    python -m benchmarks.mock_server --port 8081 --tickets 10000 --conversations 50
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+JIRA_PROJECT_KEY = 'BENCH'
+JIRA_MAX_RESULTS = 100
+FRESHDESK_MAX_PER_PAGE = 100
+FRESHDESK_SEARCH_PER_PAGE = 30
+FRESHDESK_SEARCH_MAX_PAGES = 10
+
+def default_settings():
+    """Parâmetros padrão do conjunto de dados e do comportamento do servidor."""
+    return {
+        'tickets': 1000,               # tickets no Freshdesk / issues no Jira
+        'new_ratio': 0.05,             # fração de tickets do Freshdesk ainda não mapeados (serão criados no Jira)
+        'conversations': 10,           # conversas por ticket do Freshdesk
+        'comments': 10,                # comentários por issue do Jira
+        'attachments': 0,              # anexos por ticket/issue
+        'attachment_bytes': 64 * 1024, # tamanho de cada anexo
+        'attachment_cut_bytes': 0,     # 0 = nunca; senão cada resposta de download cai após N bytes (testa a retomada)
+        'body_bytes': 200,             # tamanho do texto de cada conversa/comentário
+        'latency_ms': 0.0,             # latência média adicionada a cada resposta
+        'jitter_ms': 0.0,              # variação (+/-) da latência
+        'rate_limit_per_minute': 0,    # 0 = sem limite; acima disso responde 429
+        'max_concurrency': 0,          # 0 = sem limite; requisições simultâneas além disso recebem 429
+    }
+
+# Datas relativas ao início do servidor: o mesmo recurso tem sempre o mesmo conteúdo (e ETag).
+_STARTED_AT = datetime.now(timezone.utc)
+
+def _iso(minutes_ago):
+    return (_STARTED_AT - timedelta(minutes=minutes_ago)).isoformat()
+
+def _text(seed, size):
+    base = f"Texto sintético {seed}. "
+    return (base * (size // len(base) + 1))[:size]
+
+class MockState:
+    """Dados sintéticos (gerados sob demanda) e contadores do servidor."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.requests_by_route = {}
+        self.bytes_sent = 0
+        self.created = 0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.concurrency_rejections = 0
+
+    def count(self, route, size):
+        with self.lock:
+            self.requests += 1
+            self.requests_by_route[route] = self.requests_by_route.get(route, 0) + 1
+            self.bytes_sent += size
+
+    def enter(self):
+        """Registra uma requisição em andamento. Retorna False se passar de max_concurrency."""
+        limit = self.settings['max_concurrency']
+        with self.lock:
+            if limit and self.in_flight >= limit:
+                self.concurrency_rejections += 1
+                return False
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def rate_limited(self):
+        limit = self.settings['rate_limit_per_minute']
+        if not limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_count = now, 0
+            self.window_count += 1
+            return self.window_count > limit
+
+    def next_issue_number(self):
+        with self.lock:
+            self.created += 1
+            return self.settings['tickets'] + self.created
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'requests_by_route': dict(self.requests_by_route),
+                'bytes_sent': self.bytes_sent,
+                'issues_created': self.created,
+                'max_in_flight': self.max_in_flight,
+                'concurrency_rejections': self.concurrency_rejections,
+            }
+
+    # --- Dados sintéticos -------------------------------------------------
+
+    def is_new(self, ticket_id):
+        """Os últimos tickets (new_ratio) não estão no mapeamento inicial."""
+        total = self.settings['tickets']
+        return ticket_id > total - int(total * self.settings['new_ratio'])
+
+    def attachments(self, base_url, kind, owner_id):
+        return [
+            {'id': owner_id * 1000 + n, 'name': f"anexo-{owner_id}-{n}.bin", 'filename': f"anexo-{owner_id}-{n}.bin",
+             'size': self.settings['attachment_bytes'],
+             'attachment_url': f"{base_url}/files/{kind}/{owner_id * 1000 + n}",
+             'content': f"{base_url}/files/{kind}/{owner_id * 1000 + n}"}
+            for n in range(self.settings['attachments'])
+        ]
+
+    def freshdesk_created_at(self, ticket_id):
+        """Tickets novos: há 5 minutos; os demais espalhados entre 30 e 389 dias atrás (histórico)."""
+        if self.is_new(ticket_id):
+            return _STARTED_AT - timedelta(minutes=5)
+        return _STARTED_AT - timedelta(days=30 + ticket_id % 360)
+
+    def freshdesk_ticket(self, ticket_id, base_url, detailed=False):
+        ticket = {
+            'id': ticket_id,
+            'subject': f"Ticket sintético {ticket_id}",
+            'priority': 1 + ticket_id % 4,
+            'status': 2,
+            'company_id': None,
+            'created_at': self.freshdesk_created_at(ticket_id).isoformat(),
+            'updated_at': _iso(ticket_id % 600),
+        }
+        if detailed:
+            ticket['description'] = f"<p>{_text(ticket_id, self.settings['body_bytes'])}</p>"
+            ticket['attachments'] = self.attachments(base_url, 'fd', ticket_id)
+        return ticket
+
+    def freshdesk_conversations(self, ticket_id, base_url):
+        size = self.settings['body_bytes']
+        return [
+            {'id': ticket_id * 1000 + n, 'user_id': 1 + n % 20, 'private': n % 2 == 0,
+             'body': f"<div>{_text(n, size)}</div>", 'body_text': _text(n, size),
+             'updated_at': _iso(n), 'created_at': _iso(n),
+             'attachments': self.attachments(base_url, 'fd', ticket_id * 1000 + n)[:1] if n == 0 else []}
+            for n in range(self.settings['conversations'])
+        ]
+
+    def jira_issue(self, number, base_url):
+        size = self.settings['body_bytes']
+        comments = [
+            {'id': str(number * 1000 + n), 'updated': _iso(n), 'created': _iso(n),
+             'author': {'displayName': f"Agente {n % 20}"},
+             'body': {'type': 'doc', 'version': 1,
+                      'content': [{'type': 'paragraph', 'content': [{'type': 'text', 'text': _text(n, size)}]}]}}
+            for n in range(self.settings['comments'])
+        ]
+        return {
+            'id': str(10000 + number),
+            'key': f"{JIRA_PROJECT_KEY}-{number}",
+            'fields': {
+                'summary': f"Issue sintética {number}",
+                'description': {'type': 'doc', 'version': 1, 'content': []},
+                'status': {'name': 'Backlog' if number % 3 else 'Done'},
+                'priority': {'name': 'Medium'},
+                'created': _iso(60 * 24 * 30),
+                'updated': _iso(number % 600),
+                'comment': {'comments': comments, 'total': len(comments)},
+                'attachment': self.attachments(base_url, 'jira', number),
+            },
+        }
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em escritas separadas; com Nagle ligado, cada resposta
+    # em conexão keep-alive espera o ACK atrasado do cliente (~40 ms).
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def _send(self, status, body, route, content_type='application/json', headers=None, cut_after=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        settings = self.state.settings
+        if self.command == 'GET' and status == 200 and content_type == 'application/json':
+            # Requisições condicionais: ETag do conteúdo e 304 quando não mudou.
+            etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+            headers = dict(headers or {}, ETag=etag)
+            if self.headers.get('If-None-Match') == etag:
+                status, payload, route = 304, b'', f"{route}_304"
+        delay = settings['latency_ms'] + random.uniform(-settings['jitter_ms'], settings['jitter_ms'])
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        self.state.count(route, len(payload))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if cut_after and len(payload) > cut_after:
+            # Simula a queda da conexão no meio da resposta.
+            self.wfile.write(payload[:cut_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _dispatch(self, method):
+        if not self.state.enter():
+            if method in ('POST', 'PATCH', 'PUT'):
+                self._read_body()
+            return self._send(429, {'message': 'Too many concurrent requests'}, '429', headers={'Retry-After': '1'})
+        try:
+            return self._route(method)
+        finally:
+            self.state.leave()
+
+    def _route(self, method):
+        parsed = urlparse(self.path)
+        path, query = parsed.path, parse_qs(parsed.query)
+        if method in ('POST', 'PATCH', 'PUT'):
+            self._read_body()
+        if path == '/__stats':
+            return self._send(200, self.state.stats(), 'stats')
+        if self.state.rate_limited():
+            return self._send(429, {'message': 'Rate limit exceeded'}, '429', headers={'Retry-After': '1'})
+        base_url = self._base_url()
+        settings = self.state.settings
+
+        # --- Jira ---
+        if method == 'GET' and path == '/rest/api/3/search':
+            start_at = int(query.get('startAt', ['0'])[0])
+            max_results = min(int(query.get('maxResults', ['50'])[0]), JIRA_MAX_RESULTS)
+            total = settings['tickets']
+            numbers = range(start_at + 1, min(start_at + max_results, total) + 1)
+            issues = [self.state.jira_issue(n, base_url) for n in numbers]
+            return self._send(200, {'startAt': start_at, 'maxResults': max_results, 'total': total, 'issues': issues}, 'jira_search')
+        if method == 'POST' and path == '/rest/api/3/issue':
+            number = self.state.next_issue_number()
+            return self._send(201, {'id': str(10000 + number), 'key': f"{JIRA_PROJECT_KEY}-{number}"}, 'jira_create')
+        if method == 'POST' and re.match(r'^/rest/api/3/issue/[^/]+/comment$', path):
+            return self._send(201, {'id': str(random.randint(1, 10 ** 9))}, 'jira_comment')
+        if method == 'POST' and re.match(r'^/rest/api/3/issue/[^/]+/attachments$', path):
+            return self._send(200, [{'id': str(random.randint(1, 10 ** 9))}], 'jira_attachment')
+
+        # --- Freshdesk ---
+        if method == 'GET' and path == '/api/v2/tickets':
+            page = int(query.get('page', ['1'])[0])
+            per_page = min(int(query.get('per_page', ['30'])[0]), FRESHDESK_MAX_PER_PAGE)
+            start = (page - 1) * per_page
+            ids = range(start + 1, min(start + per_page, settings['tickets']) + 1)
+            return self._send(200, [self.state.freshdesk_ticket(i, base_url) for i in ids], 'freshdesk_list')
+        if method == 'GET' and path == '/api/v2/search/tickets':
+            # Só o filtro usado pelo backfill: "created_at:>'AAAA-MM-DD' AND created_at:<'AAAA-MM-DD'" (inclusivo).
+            days = re.findall(r"created_at:([<>])'(\d{4}-\d{2}-\d{2})'", query.get('query', [''])[0])
+            bounds = {op: datetime.strptime(day, '%Y-%m-%d').date() for op, day in days}
+            ids = [i for i in range(1, settings['tickets'] + 1)
+                   if bounds.get('>', date.min) <= self.state.freshdesk_created_at(i).date() <= bounds.get('<', date.max)]
+            page = int(query.get('page', ['1'])[0])
+            if page > FRESHDESK_SEARCH_MAX_PAGES:
+                return self._send(400, {'message': 'page deve ser no máximo 10'}, 'freshdesk_search')
+            start = (page - 1) * FRESHDESK_SEARCH_PER_PAGE
+            results = [self.state.freshdesk_ticket(i, base_url) for i in ids[start:start + FRESHDESK_SEARCH_PER_PAGE]]
+            return self._send(200, {'results': results, 'total': len(ids)}, 'freshdesk_search')
+        match = re.match(r'^/api/v2/tickets/(\d+)(/conversations|/notes)?$', path)
+        if match:
+            ticket_id, suffix = int(match.group(1)), match.group(2)
+            if method == 'GET' and suffix is None:
+                ticket = self.state.freshdesk_ticket(ticket_id, base_url, detailed=True)
+                if 'conversations' in query.get('include', [''])[0]:
+                    ticket['conversations'] = self.state.freshdesk_conversations(ticket_id, base_url)
+                return self._send(200, ticket, 'freshdesk_ticket')
+            if method == 'GET' and suffix == '/conversations':
+                return self._send(200, self.state.freshdesk_conversations(ticket_id, base_url), 'freshdesk_conversations')
+            if method == 'POST' and suffix == '/notes':
+                return self._send(201, {'id': random.randint(1, 10 ** 9), 'ticket_id': ticket_id}, 'freshdesk_note')
+            if method in ('PATCH', 'PUT') and suffix is None:
+                return self._send(200, self.state.freshdesk_ticket(ticket_id, base_url), 'freshdesk_update')
+        match = re.match(r'^/api/v2/agents/(\d+)$', path)
+        if method == 'GET' and match:
+            agent_id = int(match.group(1))
+            return self._send(200, {'id': agent_id, 'contact': {'name': f"Agente {agent_id}"}}, 'freshdesk_agent')
+
+        # --- Conteúdo de anexos (Jira e Freshdesk) ---
+        if method == 'GET' and path.startswith('/files/'):
+            size = settings['attachment_bytes']
+            match = re.match(r'^bytes=(\d+)-$', self.headers.get('Range', ''))
+            start = int(match.group(1)) if match else 0
+            if start >= size:
+                return self._send(416, b'', 'attachment_download', content_type='application/octet-stream',
+                                  headers={'Content-Range': f"bytes */{size}"})
+            status, headers = 200, {'Accept-Ranges': 'bytes'}
+            if match:
+                status, headers['Content-Range'] = 206, f"bytes {start}-{size - 1}/{size}"
+            return self._send(status, b'\0' * (size - start), 'attachment_download',
+                              content_type='application/octet-stream', headers=headers,
+                              cut_after=settings['attachment_cut_bytes'])
+
+        return self._send(404, {'message': f"Rota não implementada: {method} {path}"}, 'not_found')
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+def create_server(port, settings, host='127.0.0.1'):
+    """Cria (sem iniciar) um servidor com seu próprio estado."""
+    handler = type('BoundMockHandler', (MockHandler,), {'state': MockState(settings)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def add_arguments(parser):
+    """Adiciona ao parser as opções do conjunto de dados (compartilhadas com o harness)."""
+    defaults = default_settings()
+    for name, value in defaults.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+
+def settings_from_args(args):
+    return {name: getattr(args, name) for name in default_settings()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local Jira/Freshdesk para benchmarks.")
+    parser.add_argument('--port', type=int, default=8081)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = create_server(args.port, settings_from_args(args))
+    print(f"Servidor de benchmark em http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
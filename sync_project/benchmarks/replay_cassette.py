@@ -0,0 +1,94 @@
+# benchmarks/replay_cassette.py
+"""
+Reproduz offline um ciclo de sincronização gravado com SYNC_HTTP_MODE=record.
+
+Recria o cliente (configuração sem credenciais + mapeamento inicial guardados na
+cassete) em uma pasta temporária e executa process_client com SYNC_HTTP_MODE=replay,
+opcionalmente sob o cProfile.
+
+Uso (a partir de sync_project/):
+    python -m benchmarks.replay_cassette cassettes/SAP.jsonl.gz --speed 0 --profile sap.prof
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def prepare_client(cassette_file, workdir):
+    """Cria config.json e mapping.json do cliente a partir dos metadados da cassete."""
+    from sync_app.core import cassette
+
+    client_name = os.path.basename(cassette_file).split('.')[0]
+    metadata, entries = cassette.load(cassette_file)
+    client_folder = os.path.join(workdir, 'clients', client_name)
+    os.makedirs(client_folder)
+
+    config = dict(metadata.get('config', {}))
+    # Credenciais fictícias: a reprodução não acessa a rede.
+    for key in cassette.SECRET_CONFIG_KEYS:
+        config[key] = 'replay'
+    with open(os.path.join(client_folder, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4)
+    with open(os.path.join(client_folder, 'mapping.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata.get('mapping', {}), f)
+
+    # A cassete precisa estar em <SYNC_CASSETTE_DIR>/<cliente>.jsonl.gz
+    cassette_dir = os.path.join(workdir, 'cassettes')
+    os.makedirs(cassette_dir)
+    shutil.copy(cassette_file, os.path.join(cassette_dir, f"{client_name}.jsonl.gz"))
+    return client_name, client_folder, cassette_dir, len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz offline uma cassete de tráfego de um cliente.")
+    parser.add_argument('cassette', help="Arquivo .jsonl.gz gravado com SYNC_HTTP_MODE=record.")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Multiplicador dos tempos originais (0 = sem espera).")
+    parser.add_argument('--profile', help="Grava as estatísticas do cProfile neste arquivo.")
+    parser.add_argument('--verbose', action='store_true', help="Mostra a saída do sincronizador.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, PROJECT_ROOT)
+    cassette_file = os.path.abspath(args.cassette)
+    workdir = tempfile.mkdtemp(prefix='sync-replay-')
+    previous_cwd = os.getcwd()
+    try:
+        client_name, client_folder, cassette_dir, total = prepare_client(cassette_file, workdir)
+        os.environ['SYNC_HTTP_MODE'] = 'replay'
+        os.environ['SYNC_CASSETTE_DIR'] = cassette_dir
+        os.environ['SYNC_REPLAY_SPEED'] = str(args.speed)
+        os.chdir(workdir)
+
+        from sync_app.core import log
+        from sync_app.services import sync_service
+        log.configure(level=None if args.verbose else 'ERROR')
+        profiler = cProfile.Profile() if args.profile else None
+        started_at = time.perf_counter()
+        with open(os.devnull, 'w') as devnull:
+            stdout = sys.stdout
+            sys.stdout = stdout if args.verbose else devnull
+            try:
+                if profiler:
+                    profiler.runcall(sync_service.process_client, client_folder, client_name)
+                else:
+                    sync_service.process_client(client_folder, client_name)
+            finally:
+                sys.stdout = stdout
+        wall_time = time.perf_counter() - started_at
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Cliente {client_name}: {total} respostas gravadas, reprodução em {wall_time:.3f}s.")
+    if profiler:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(args.profile).sort_stats('cumulative').print_stats(20)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# benchmarks/run_benchmark.py
+"""
+Mede o desempenho de process_client contra o servidor local de benchmark.
+
+Sobe dois servidores (Jira e Freshdesk) em subprocessos, cria um cliente sintético
+em uma pasta temporária e reporta requisições por ticket, tempo total, CPU e pico de RSS.
+
+Uso (a partir de sync_project/):
+    python -m benchmarks.run_benchmark --tickets 10000 --conversations 50 --latency-ms 20
+    python -m benchmarks.run_benchmark --config BATCH_COMMENTS=true   # opções do config.json do cliente
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+from . import mock_server
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_mock_server(settings):
+    """Inicia um servidor de benchmark em um subprocesso e retorna (processo, url_base)."""
+    args = [sys.executable, '-m', 'benchmarks.mock_server', '--port', '0']
+    for name, value in settings.items():
+        args += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(args, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    return process, line.rsplit(' ', 1)[-1]
+
+def fetch_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+def build_client(clients_root, client_name, settings, jira_url, freshdesk_url, extra_config=None):
+    """Cria config.json e mapping.json do cliente sintético (extra_config sobrescreve chaves do config.json)."""
+    client_folder = os.path.join(clients_root, client_name)
+    os.makedirs(client_folder)
+    old_sync = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    config = {
+        'JIRA_URL': jira_url,
+        'JIRA_USER_EMAIL': 'bench@example.com',
+        'JIRA_API_TOKEN': 'bench',
+        'JIRA_PROJECT_KEY': mock_server.JIRA_PROJECT_KEY,
+        'FRESHDESK_DOMAIN': 'bench',
+        'FRESHDESK_BASE_URL': freshdesk_url,
+        'FRESHDESK_API_KEY': 'bench',
+        'FRESHDESK_COMPANY_ID': None,
+        'SYNC_STATUS_JIRA_TO_FRESHDESK': True,
+        'SYNC_COMMENTS_JIRA_TO_FRESHDESK': True,
+        'SYNC_COMMENTS_FRESHDESK_TO_JIRA': True,
+        'SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK': settings['attachments'] > 0,
+        'SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA': settings['attachments'] > 0,
+        'FIRST_RUN_TIMESTAMP': (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
+        'SYNC_DAYS_AGO': 1,
+    }
+    config.update(extra_config or {})
+    state = mock_server.MockState(settings)
+    mapping = {
+        f"{mock_server.JIRA_PROJECT_KEY}-{n}": {
+            'freshdesk_id': n,
+            'last_jira_update': old_sync,
+            'last_freshdesk_update': old_sync,
+            'synced_attachments': [],
+        }
+        for n in range(1, settings['tickets'] + 1)
+        if not state.is_new(n)
+    }
+    with open(os.path.join(client_folder, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4)
+    with open(os.path.join(client_folder, 'mapping.json'), 'w', encoding='utf-8') as f:
+        json.dump(mapping, f)
+    return client_folder
+
+def run_benchmark(settings, verbose=False, keep_workdir=False, extra_config=None):
+    """
+    Executa um ciclo completo de process_client contra os servidores locais.
+
+    Returns:
+        dict: Resultados (tempo, CPU, RSS, requisições).
+    """
+    from sync_app.core import log, network
+    from sync_app.services import sync_service
+
+    # Sem --verbose, só erros (a escrita dos logs roda em outra thread e não é redirecionada).
+    log.configure(level=None if verbose else 'ERROR')
+
+    jira_process, jira_url = start_mock_server(settings)
+    freshdesk_process, freshdesk_url = start_mock_server(settings)
+    workdir = tempfile.mkdtemp(prefix='sync-bench-')
+    previous_cwd = os.getcwd()
+    try:
+        # get_temp_attachments_dir usa o caminho relativo 'clients/<cliente>'.
+        os.chdir(workdir)
+        client_folder = build_client(os.path.join(workdir, 'clients'), 'BENCH', settings, jira_url, freshdesk_url, extra_config)
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        started_at = time.perf_counter()
+        with open(os.devnull, 'w') as devnull:
+            with contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+                sync_service.process_client(client_folder, 'BENCH')
+        wall_time = time.perf_counter() - started_at
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+        jira_stats, freshdesk_stats = fetch_stats(jira_url), fetch_stats(freshdesk_url)
+    finally:
+        os.chdir(previous_cwd)
+        if not keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        for process in (jira_process, freshdesk_process):
+            process.terminate()
+            process.wait()
+
+    # O snapshot de /__stats é tirado antes de a própria consulta ser contada.
+    requests_total = jira_stats['requests'] + freshdesk_stats['requests']
+    cpu_time = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    return {
+        'settings': settings,
+        'config': dict(extra_config or {}),
+        'wall_time_seconds': round(wall_time, 3),
+        'cpu_time_seconds': round(cpu_time, 3),
+        # ru_maxrss é em KB no Linux.
+        'peak_rss_mb': round(usage_after.ru_maxrss / 1024.0, 1),
+        'requests_total': requests_total,
+        'requests_per_ticket': round(requests_total / max(settings['tickets'], 1), 2),
+        'tickets_per_second': round(settings['tickets'] / wall_time, 1) if wall_time else None,
+        'jira_requests_by_route': jira_stats['requests_by_route'],
+        'freshdesk_requests_by_route': freshdesk_stats['requests_by_route'],
+        # Controle adaptativo: limite final por host e pico de requisições simultâneas no servidor.
+        'concurrency_limits': {host: state['limit'] for host, state in network.concurrency_snapshot().items()},
+        'max_in_flight': {'jira': jira_stats['max_in_flight'], 'freshdesk': freshdesk_stats['max_in_flight']},
+        'workdir': workdir if keep_workdir else None,
+    }
+
+def print_report(result):
+    print(f"\n{'='*60}\nBenchmark do sincronizador\n{'='*60}")
+    for name, value in result['settings'].items():
+        print(f"  {name:<24} {value}")
+    for name, value in result['config'].items():
+        print(f"  {name:<24} {value}")
+    print('-' * 60)
+    for name in ('wall_time_seconds', 'cpu_time_seconds', 'peak_rss_mb', 'requests_total',
+                 'requests_per_ticket', 'tickets_per_second'):
+        print(f"  {name:<24} {result[name]}")
+    for name, value in result['max_in_flight'].items():
+        print(f"  {'max_in_flight_' + name:<24} {value}")
+    for host, limit in sorted(result['concurrency_limits'].items()):
+        print(f"  {'concurrency ' + host:<24} {limit}")
+    print('-' * 60)
+    routes = {}
+    for key in ('jira_requests_by_route', 'freshdesk_requests_by_route'):
+        for route, count in result[key].items():
+            routes[route] = routes.get(route, 0) + count
+    routes.pop('stats', None)
+    for route, count in sorted(routes.items(), key=lambda item: -item[1]):
+        print(f"  {route:<24} {count}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de process_client contra servidores locais.")
+    mock_server.add_arguments(parser)
+    parser.add_argument('--json', help="Grava o resultado em JSON neste arquivo.")
+    parser.add_argument('--verbose', action='store_true', help="Mostra a saída do sincronizador.")
+    parser.add_argument('--keep-workdir', action='store_true', help="Mantém a pasta temporária do cliente sintético.")
+    parser.add_argument('--config', action='append', default=[], metavar='CHAVE=VALOR',
+                        help="Chave extra do config.json do cliente (pode repetir).")
+    args = parser.parse_args()
+    extra_config = dict(option.split('=', 1) for option in args.config)
+
+    sys.path.insert(0, PROJECT_ROOT)
+    result = run_benchmark(mock_server.settings_from_args(args), verbose=args.verbose, keep_workdir=args.keep_workdir,
+                           extra_config=extra_config)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,107 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
+import bisect
 import json
 import os
-import requests
+import queue
 import shutil
-from requests.auth import HTTPBasicAuth
+import threading
 import datetime
 
+from sync_app.storage import sync_status
+
+# tkinter e requests são importados sob demanda (em main() e nos testes de conexão):
+# importar este módulo, por exemplo para reutilizar os testes, não abre janela nem
+# carrega a interface gráfica.
+tk = ttk = messagebox = None
+root = None
+
+# Testes de conexão rodam em segundo plano, no máximo este número de requisições
+# ao mesmo tempo (cada cliente faz duas em paralelo: Jira e Freshdesk).
+CONNECTION_TEST_WORKERS = 16
+# Intervalo (ms) em que a janela principal aplica os resultados vindos das threads.
+UI_POLL_INTERVAL_MS = 100
+
+_executor = None
+_thread_state = threading.local()
+# Callbacks a executar na thread do Tk (widgets só podem ser alterados por ela).
+_ui_queue = queue.Queue()
+
+def _session():
+    """Sessão HTTP da thread atual, reaproveitada entre testes (mantém as conexões abertas)."""
+    session = getattr(_thread_state, 'session', None)
+    if session is None:
+        import requests
+        session = _thread_state.session = requests.Session()
+    return session
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=CONNECTION_TEST_WORKERS, thread_name_prefix='teste-conexao')
+    return _executor
+
+def _future_result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return False, f"Erro inesperado no teste: {e}"
+
+def run_connection_tests(jira_args, freshdesk_args, on_done):
+    """
+    Testa Jira e Freshdesk em paralelo, sem bloquear a interface.
+
+    Args:
+        jira_args (tuple): Argumentos de test_jira_connection.
+        freshdesk_args (tuple): Argumentos de test_freshdesk_connection.
+        on_done (callable): Chamada na thread da interface com os dois resultados,
+            (status_jira, msg_jira) e (status_freshdesk, msg_freshdesk).
+    """
+    executor = _get_executor()
+    futures = [
+        executor.submit(test_jira_connection, *jira_args),
+        executor.submit(test_freshdesk_connection, *freshdesk_args),
+    ]
+    pending = {'count': len(futures)}
+    lock = threading.Lock()
+
+    def _finished(_future):
+        with lock:
+            pending['count'] -= 1
+            if pending['count']:
+                return
+        _ui_queue.put((on_done, tuple(_future_result(f) for f in futures)))
+
+    for future in futures:
+        future.add_done_callback(_finished)
+
+def _process_ui_queue():
+    """Aplica, na thread do Tk, os resultados que chegaram das threads de teste."""
+    while True:
+        try:
+            callback, args = _ui_queue.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            callback(*args)
+        except tk.TclError:
+            pass # A janela do resultado já foi fechada.
+    root.after(UI_POLL_INTERVAL_MS, _process_ui_queue)
+
+def _show_test_result(message, jira_result, fd_result, parent):
+    message = f"{message}{jira_result[1]}\n{fd_result[1]}"
+    if jira_result[0] and fd_result[0]: messagebox.showinfo("Resultado do Teste", message, parent=parent)
+    else: messagebox.showerror("Resultado do Teste", message, parent=parent)
+
 # --- LÓGICA DE TESTE DE CONEXÃO ---
-# (Sem alterações aqui, a lógica de teste principal permanece a mesma)
+# Chamadas a partir das threads de teste (run_connection_tests), nunca da thread do Tk.
 def test_jira_connection(url, user_email, api_token, project_key):
     """Testa a conexão com o Jira e retorna (status, mensagem)."""
     if not all([url, user_email, api_token, project_key]):
         return False, "Todos os campos do Jira devem ser preenchidos."
+    import requests
+    from requests.auth import HTTPBasicAuth
     try:
-        response = requests.get(
+        response = _session().get(
             f"{url}/rest/api/3/project/{project_key}",
             headers={"Accept": "application/json"},
             auth=HTTPBasicAuth(user_email, api_token),
@@ -35,8 +122,9 @@ def test_freshdesk_connection(domain, api_key):
     """Testa a conexão com o Freshdesk e retorna (status, mensagem)."""
     if not all([domain, api_key]):
         return False, "Todos os campos do Freshdesk devem ser preenchidos."
+    import requests
     try:
-        response = requests.get(
+        response = _session().get(
             f"https://{domain}.freshdesk.com/api/v2/tickets?per_page=1",
             auth=(api_key, "X"),
             headers={"Content-Type": "application/json"},
@@ -104,7 +192,8 @@ def edit_client_window(client_name, on_close_callback):
         "SYNC_COMMENTS_JIRA_TO_FRESHDESK": tk.BooleanVar(value=config.get("SYNC_COMMENTS_JIRA_TO_FRESHDESK", False)),
         "SYNC_COMMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=config.get("SYNC_COMMENTS_FRESHDESK_TO_JIRA", False)),
         "SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK": tk.BooleanVar(value=config.get("SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK", False)),
-        "SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=config.get("SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA", False))
+        "SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=config.get("SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA", False)),
+        "BATCH_COMMENTS": tk.BooleanVar(value=config.get("BATCH_COMMENTS", False))
     }
     
     ttk.Label(frame, text="Opções de Sincronização", font=("Arial", 10, "bold")).grid(row=current_row, columnspan=2, sticky="w", pady=(5, 0))
@@ -120,21 +209,21 @@ def edit_client_window(client_name, on_close_callback):
     current_row += 1
     ttk.Checkbutton(frame, text="Sincronizar Anexos (Freshdesk -> Jira)", variable=checkbox_vars["SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA"]).grid(row=current_row, columnspan=2, pady=2, sticky="w")
     current_row += 1
+    ttk.Checkbutton(frame, text="Agrupar comentários de cada ticket em uma nota por ciclo", variable=checkbox_vars["BATCH_COMMENTS"]).grid(row=current_row, columnspan=2, pady=2, sticky="w")
+    current_row += 1
 
     def test_form_connection():
-        jira_status, jira_msg = test_jira_connection(
-            entries["JIRA_URL"].get(), entries["JIRA_USER_EMAIL"].get(),
-            entries["JIRA_API_TOKEN"].get(), entries["JIRA_PROJECT_KEY"].get()
+        run_connection_tests(
+            (entries["JIRA_URL"].get(), entries["JIRA_USER_EMAIL"].get(),
+             entries["JIRA_API_TOKEN"].get(), entries["JIRA_PROJECT_KEY"].get()),
+            (entries["FRESHDESK_DOMAIN"].get(), entries["FRESHDESK_API_KEY"].get()),
+            lambda jira_result, fd_result: _show_test_result("", jira_result, fd_result, edit_window)
         )
-        fd_status, fd_msg = test_freshdesk_connection(
-            entries["FRESHDESK_DOMAIN"].get(), entries["FRESHDESK_API_KEY"].get()
-        )
-        message = f"{jira_msg}\n{fd_msg}"
-        if jira_status and fd_status: messagebox.showinfo("Resultado do Teste", message, parent=edit_window)
-        else: messagebox.showerror("Resultado do Teste", message, parent=edit_window)
 
     def save_changes():
-        new_config = {}
+        # Parte do config.json atual: chaves sem campo no formulário (FIRST_RUN_TIMESTAMP,
+        # BACKFILL_SINCE, MAX_REQUESTS_PER_RUN, ATTACHMENT_*, ...) são preservadas.
+        new_config = dict(config)
         
         for key, entry in entries.items():
             new_config[key] = entry.get().strip()
@@ -166,99 +255,246 @@ def edit_client_window(client_name, on_close_callback):
     ttk.Button(button_frame, text="Salvar Alterações", command=save_changes).pack(side="left", padx=10)
 
 
-def delete_client(client_name, client_frame, on_delete_callback):
+def delete_client(client_name, on_delete_callback, parent=None):
     """Pede confirmação e deleta o cliente."""
-    if messagebox.askyesno("Confirmar Exclusão", f"Você tem certeza que deseja excluir o cliente '{client_name}'?", icon='warning'):
+    if messagebox.askyesno("Confirmar Exclusão", f"Você tem certeza que deseja excluir o cliente '{client_name}'?", icon='warning', parent=parent):
         try:
             shutil.rmtree(os.path.join('clients', client_name))
-            client_frame.destroy()
             on_delete_callback()
-            messagebox.showinfo("Sucesso", f"Cliente '{client_name}' excluído com sucesso.")
+            messagebox.showinfo("Sucesso", f"Cliente '{client_name}' excluído com sucesso.", parent=parent)
         except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível excluir o cliente: {e}")
+            messagebox.showerror("Erro", f"Não foi possível excluir o cliente: {e}", parent=parent)
+
+# --- ÍNDICE DE CLIENTES ---
+# Montado uma vez (varredura de clients/) e atualizado pontualmente ao adicionar,
+# editar ou excluir um cliente. A situação de cada um vem do sync_status.json,
+# um resumo pequeno gravado ao fim de cada ciclo (o mapping.json não é lido).
+
+HEALTH_LABELS = {
+    sync_status.STATUS_OK: "OK",
+    sync_status.STATUS_INCOMPLETE: "Incompleto",
+    sync_status.STATUS_ERROR: "Erro",
+}
+
+_client_index = {}
+_index_state = {'loaded': False}
+
+def _client_row(client_name):
+    """Monta a linha do índice de um cliente: última sincronização, saúde e detalhe."""
+    folder = os.path.join('clients', client_name)
+    status = sync_status.load(folder)
+    if status is not None:
+        return {
+            'last_sync': status.get('last_success_at'),
+            'health': HEALTH_LABELS.get(status.get('status'), status.get('status') or "-"),
+            'message': status.get('message') or "",
+        }
+    # Sem resumo (cliente ainda não sincronizado por esta versão): a data do
+    # mapping.json indica o último ciclo salvo.
+    try:
+        last_sync = os.stat(os.path.join(folder, 'mapping.json')).st_mtime
+    except OSError:
+        return {'last_sync': None, 'health': "Nunca sincronizado", 'message': ""}
+    return {'last_sync': last_sync, 'health': "Desconhecida", 'message': ""}
+
+def load_client_index(force=False):
+    """
+    Retorna o índice {nome_do_cliente: linha}, varrendo clients/ só na primeira
+    chamada (ou se force=True).
+    """
+    if _index_state['loaded'] and not force:
+        return _client_index
+    if not os.path.exists('clients'):
+        os.makedirs('clients')
+    _client_index.clear()
+    with os.scandir('clients') as entries:
+        for entry in entries:
+            # Pastas ocultas (ex.: .cassettes) não são clientes.
+            if entry.is_dir() and not entry.name.startswith('.'):
+                _client_index[entry.name] = _client_row(entry.name)
+    _index_state['loaded'] = True
+    return _client_index
+
+def index_client(client_name):
+    """Atualiza (ou inclui) um único cliente no índice."""
+    _client_index[client_name] = _client_row(client_name)
+    return _client_index[client_name]
+
+def unindex_client(client_name):
+    _client_index.pop(client_name, None)
+
+def _format_timestamp(timestamp):
+    if not timestamp:
+        return "-"
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%d/%m/%Y %H:%M')
 
 def list_clients():
     """Abre a janela para listar, editar, excluir e TESTAR clientes."""
     list_window = tk.Toplevel(root)
     list_window.title("Clientes Cadastrados")
-    list_window.geometry("600x500")
+    list_window.geometry("760x500")
 
     main_frame = ttk.Frame(list_window)
     main_frame.pack(fill="both", expand=True)
 
-    def refresh_list():
-        for widget in scrollable_frame.winfo_children(): widget.destroy()
-        populate_list()
-        update_scroll_region()
-
     header_frame = ttk.Frame(main_frame, padding=5)
     header_frame.pack(fill="x", side="top")
-    ttk.Label(header_frame, text="Clientes:", font=("Arial", 12, "bold")).pack(side="left")
-    ttk.Button(header_frame, text="Adicionar Novo", command=lambda: open_new_client_window(refresh_list)).pack(side="right")
-    
+    count_label = ttk.Label(header_frame, text="Clientes:", font=("Arial", 12, "bold"))
+    count_label.pack(side="left")
+    ttk.Button(header_frame, text="Adicionar Novo", command=lambda: open_new_client_window(on_client_saved)).pack(side="right")
+    ttk.Button(header_frame, text="Testar Todos", command=lambda: test_clients(list(_client_index))).pack(side="right", padx=5)
+    ttk.Button(header_frame, text="Atualizar", command=lambda: reload_list()).pack(side="right")
+    progress_label = ttk.Label(header_frame, text="")
+    progress_label.pack(side="right", padx=5)
+
     ttk.Separator(main_frame).pack(fill='x', pady=5)
-    
-    canvas = tk.Canvas(main_frame)
-    scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-    scrollable_frame = ttk.Frame(canvas)
-    scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
-    canvas.pack(side="left", fill="both", expand=True)
+
+    # Treeview: só as linhas visíveis são desenhadas, então a lista continua leve
+    # com centenas de clientes (ao contrário de um frame com botões por cliente).
+    tree_frame = ttk.Frame(main_frame)
+    tree_frame.pack(fill="both", expand=True, padx=10)
+    tree = ttk.Treeview(tree_frame, columns=("last_sync", "health", "test"), selectmode="extended")
+    tree.heading("#0", text="Cliente")
+    tree.heading("last_sync", text="Última sincronização")
+    tree.heading("health", text="Saúde")
+    tree.heading("test", text="Teste de conexão")
+    tree.column("#0", width=200)
+    tree.column("last_sync", width=150, anchor="center")
+    tree.column("health", width=130, anchor="center")
+    tree.column("test", width=200)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    tree.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
-    
-    def update_scroll_region():
-        canvas.update_idletasks()
-        canvas.configure(scrollregion=canvas.bbox("all"))
 
-    def test_saved_config(client_name):
+    footer_frame = ttk.Frame(main_frame, padding=5)
+    footer_frame.pack(fill="x", side="bottom")
+    detail_label = ttk.Label(footer_frame, text="", wraplength=420)
+    detail_label.pack(side="left", padx=5)
+    ttk.Button(footer_frame, text="Excluir", command=lambda: delete_selected()).pack(side="right", padx=5)
+    ttk.Button(footer_frame, text="Editar", command=lambda: edit_selected()).pack(side="right", padx=5)
+    ttk.Button(footer_frame, text="Testar", command=lambda: test_clients(list(tree.selection()))).pack(side="right", padx=5)
+
+    def update_count():
+        count_label.configure(text=f"Clientes ({len(_client_index)}):")
+
+    def _row_values(client_name):
+        row = _client_index[client_name]
+        return (_format_timestamp(row['last_sync']), row['health'])
+
+    def upsert_row(client_name):
+        values = _row_values(client_name)
+        if tree.exists(client_name):
+            tree.item(client_name, values=values + (tree.set(client_name, "test"),))
+        else:
+            # As linhas estão em ordem alfabética: a posição sai de uma busca binária.
+            position = bisect.bisect_left(tree.get_children(), client_name)
+            tree.insert("", position, iid=client_name, text=client_name, values=values + ("",))
+
+    def reload_list(force=True):
+        tree.delete(*tree.get_children())
+        for client_name in sorted(load_client_index(force)):
+            tree.insert("", "end", iid=client_name, text=client_name, values=_row_values(client_name) + ("",))
+        update_count()
+
+    def on_client_saved(client_name=None):
+        if client_name:
+            index_client(client_name)
+            upsert_row(client_name)
+            update_count()
+
+    def selected_client():
+        selection = tree.selection()
+        if len(selection) != 1:
+            messagebox.showwarning("Seleção", "Selecione um único cliente.", parent=list_window)
+            return None
+        return selection[0]
+
+    def edit_selected():
+        client_name = selected_client()
+        if client_name:
+            edit_client_window(client_name, lambda: on_client_saved(client_name))
+
+    def delete_selected():
+        client_name = selected_client()
+        if not client_name:
+            return
+
+        def _deleted():
+            unindex_client(client_name)
+            tree.delete(client_name)
+            update_count()
+        delete_client(client_name, _deleted, parent=list_window)
+
+    def on_select(_event):
+        selection = tree.selection()
+        row = _client_index.get(selection[0]) if len(selection) == 1 else None
+        detail_label.configure(text=row['message'] if row else "")
+
+    tree.bind("<<TreeviewSelect>>", on_select)
+    tree.bind("<Double-1>", lambda event: edit_selected() if tree.identify_row(event.y) else None)
+
+    def set_test_status(client_name, text):
+        if tree.exists(client_name):
+            tree.set(client_name, "test", text)
+
+    def start_saved_config_test(client_name, on_done):
+        """Lê o config.json do cliente e dispara o teste em segundo plano."""
         config_path = os.path.join('clients', client_name, 'config.json')
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
         except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível ler o config.json: {e}", parent=list_window)
-            return
-
-        jira_status, jira_msg = test_jira_connection(
-            config.get("JIRA_URL"), config.get("JIRA_USER_EMAIL"),
-            config.get("JIRA_API_TOKEN"), config.get("JIRA_PROJECT_KEY")
+            set_test_status(client_name, "Erro no config.json")
+            return f"Não foi possível ler o config.json: {e}"
+
+        def _done(jira_result, fd_result):
+            failed = [name for name, result in (("Jira", jira_result), ("Freshdesk", fd_result)) if not result[0]]
+            set_test_status(client_name, f"Falha: {', '.join(failed)}" if failed else "OK")
+            on_done(jira_result, fd_result)
+
+        set_test_status(client_name, "Testando...")
+        run_connection_tests(
+            (config.get("JIRA_URL"), config.get("JIRA_USER_EMAIL"),
+             config.get("JIRA_API_TOKEN"), config.get("JIRA_PROJECT_KEY")),
+            (config.get("FRESHDESK_DOMAIN"), config.get("FRESHDESK_API_KEY")),
+            _done
         )
-        fd_status, fd_msg = test_freshdesk_connection(
-            config.get("FRESHDESK_DOMAIN"), config.get("FRESHDESK_API_KEY")
-        )
-
-        message = f"Cliente: {client_name}\n\n{jira_msg}\n{fd_msg}"
-        if jira_status and fd_status: messagebox.showinfo("Resultado do Teste", message, parent=list_window)
-        else: messagebox.showerror("Resultado do Teste", message, parent=list_window)
-
-    def populate_list():
-        try:
-            clients_dir = 'clients'
-            if not os.path.exists(clients_dir):
-                os.makedirs(clients_dir)
-            clients = sorted([f for f in os.listdir(clients_dir) if os.path.isdir(os.path.join(clients_dir, f))])
-        except Exception:
-            clients = []
+        return None
 
+    def test_clients(clients):
+        """
+        Testa os clientes informados de uma vez; os resultados aparecem na lista
+        conforme chegam. Com um único cliente, o resultado também é exibido em uma janela.
+        """
         if not clients:
-            ttk.Label(scrollable_frame, text="Nenhum cliente cadastrado.", padding=10).pack()
             return
+        progress = {'done': 0, 'failed': 0}
 
-        for client_name in clients:
-            client_frame = ttk.Frame(scrollable_frame, padding=5, relief="groove", borderwidth=1)
-            client_frame.pack(fill="x", expand=True, padx=10, pady=5)
-            
-            ttk.Label(client_frame, text=client_name, font=("Arial", 11, "bold")).pack(side="left", padx=10)
-            delete_btn = ttk.Button(client_frame, text="Excluir", command=lambda name=client_name, frame=client_frame: delete_client(name, frame, update_scroll_region))
-            delete_btn.pack(side="right", padx=5)
-            edit_btn = ttk.Button(client_frame, text="Editar", command=lambda name=client_name: edit_client_window(name, refresh_list))
-            edit_btn.pack(side="right", padx=5)
-            test_btn = ttk.Button(client_frame, text="Testar", command=lambda name=client_name: test_saved_config(name))
-            test_btn.pack(side="right", padx=5)
+        def _update_progress():
+            progress_label.configure(text=f"Testados: {progress['done']}/{len(clients)} ({progress['failed']} com falha)")
+
+        def _done(client_name, jira_result, fd_result):
+            progress['done'] += 1
+            if not (jira_result[0] and fd_result[0]):
+                progress['failed'] += 1
+            _update_progress()
+            if len(clients) == 1:
+                _show_test_result(f"Cliente: {client_name}\n\n", jira_result, fd_result, list_window)
 
-    populate_list()
-    update_scroll_region()
+        _update_progress()
+        for client_name in clients:
+            error = start_saved_config_test(
+                client_name, lambda jira_result, fd_result, name=client_name: _done(name, jira_result, fd_result)
+            )
+            if error:
+                progress['done'] += 1
+                progress['failed'] += 1
+                _update_progress()
+                if len(clients) == 1:
+                    messagebox.showerror("Erro", error, parent=list_window)
+
+    reload_list(force=False)
 
 def open_new_client_window(on_close_callback=None):
     """
@@ -300,7 +536,8 @@ def open_new_client_window(on_close_callback=None):
         "SYNC_COMMENTS_JIRA_TO_FRESHDESK": tk.BooleanVar(value=False),
         "SYNC_COMMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=False),
         "SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK": tk.BooleanVar(value=False),
-        "SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=False)
+        "SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA": tk.BooleanVar(value=False),
+        "BATCH_COMMENTS": tk.BooleanVar(value=False)
     }
     
     ttk.Label(frame, text="Opções de Sincronização", font=("Arial", 10, "bold")).grid(row=current_row, columnspan=2, sticky="w", pady=(5, 0))
@@ -316,13 +553,15 @@ def open_new_client_window(on_close_callback=None):
     current_row += 1
     ttk.Checkbutton(frame, text="Sincronizar Anexos (Freshdesk -> Jira)", variable=checkbox_vars["SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA"]).grid(row=current_row, columnspan=2, pady=2, sticky="w")
     current_row += 1
+    ttk.Checkbutton(frame, text="Agrupar comentários de cada ticket em uma nota por ciclo", variable=checkbox_vars["BATCH_COMMENTS"]).grid(row=current_row, columnspan=2, pady=2, sticky="w")
+    current_row += 1
 
     def test_current_connection():
-        jira_status, jira_msg = test_jira_connection(entries["JIRA_URL"].get(), entries["JIRA_USER_EMAIL"].get(), entries["JIRA_API_TOKEN"].get(), entries["JIRA_PROJECT_KEY"].get())
-        fd_status, fd_msg = test_freshdesk_connection(entries["FRESHDESK_DOMAIN"].get(), entries["FRESHDESK_API_KEY"].get())
-        message = f"{jira_msg}\n{fd_msg}"
-        if jira_status and fd_status: messagebox.showinfo("Resultado do Teste", message, parent=new_window)
-        else: messagebox.showerror("Resultado do Teste", message, parent=new_window)
+        run_connection_tests(
+            (entries["JIRA_URL"].get(), entries["JIRA_USER_EMAIL"].get(), entries["JIRA_API_TOKEN"].get(), entries["JIRA_PROJECT_KEY"].get()),
+            (entries["FRESHDESK_DOMAIN"].get(), entries["FRESHDESK_API_KEY"].get()),
+            lambda jira_result, fd_result: _show_test_result("", jira_result, fd_result, new_window)
+        )
 
     def save_client():
         config_data = {}
@@ -364,7 +603,7 @@ def open_new_client_window(on_close_callback=None):
                 json.dump(config_data, f, indent=4)
             messagebox.showinfo("Sucesso", f"Cliente '{client_name}' salvo!", parent=new_window)
             new_window.destroy()
-            if on_close_callback: on_close_callback()
+            if on_close_callback: on_close_callback(client_name)
         except Exception as e:
             messagebox.showerror("Erro de Arquivo", f"Não foi possível salvar: {e}", parent=new_window)
     
@@ -374,18 +613,27 @@ def open_new_client_window(on_close_callback=None):
     ttk.Button(button_frame, text="Salvar Cliente", command=save_client).pack(side="left", padx=10)
 
 # --- Janela Principal ---
-root = tk.Tk()
-root.title("Gerenciador de Clientes - Sincronizador")
-root.geometry("450x250")
-root.eval('tk::PlaceWindow . center')
+def main():
+    global tk, ttk, messagebox, root
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+
+    root = tk.Tk()
+    root.title("Gerenciador de Clientes - Sincronizador")
+    root.geometry("450x250")
+    root.eval('tk::PlaceWindow . center')
+
+    style = ttk.Style(root)
+    style.theme_use('clam')
 
-style = ttk.Style(root)
-style.theme_use('clam')
+    main_frame = ttk.Frame(root, padding=20)
+    main_frame.pack(expand=True, fill="both")
 
-main_frame = ttk.Frame(root, padding=20)
-main_frame.pack(expand=True, fill="both")
+    ttk.Label(main_frame, text="Gerenciador de Clientes", font=("Arial", 16, "bold")).pack(pady=10)
+    ttk.Button(main_frame, text="Gerenciar Clientes", command=list_clients, width=30).pack(pady=10, ipady=5)
 
-ttk.Label(main_frame, text="Gerenciador de Clientes", font=("Arial", 16, "bold")).pack(pady=10)
-ttk.Button(main_frame, text="Gerenciar Clientes", command=list_clients, width=30).pack(pady=10, ipady=5)
+    root.after(UI_POLL_INTERVAL_MS, _process_ui_queue)
+    root.mainloop()
 
-root.mainloop()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,49 @@
 # main.py  
 import os  
-from datetime import datetime  
-from sync_app.services.sync_service import process_client  
+import signal
+import threading
+import time
+from sync_app.core import log, metrics  
+from sync_app.services.orchestrator import run_all_clients, start_sharding, stop_sharding
+
+CLIENTS_ROOT_FOLDER = 'clients'
    
 
 def main():  
+ # Logs: SYNC_LOG_LEVEL (padrão INFO; DEBUG mostra cada conversa/comentário)
+ # e SYNC_LOG_FORMAT=json para uma linha JSON por mensagem.
+ log.configure()
  base_dir = os.path.dirname(os.path.abspath(__file__))  
- #clients_path = os.path.join(base_dir, CLIENTS_ROOT_FOLDER) # REMOVE THIS  
-   
+ clients_path = os.path.join(base_dir, CLIENTS_ROOT_FOLDER)  
+
+ # Métricas: SYNC_METRICS_PORT expõe /metrics durante a execução;
+ # SYNC_METRICS_TEXTFILE grava um arquivo .prom ao final (textfile collector).
+ metrics_port = os.getenv('SYNC_METRICS_PORT')  
+ if metrics_port:  
+  metrics.start_http_server(int(metrics_port))  
+ metrics_textfile = os.getenv('SYNC_METRICS_TEXTFILE')  
+
+ # SYNC_INTERVAL_SECONDS > 0: o processo fica ativo e repete o ciclo a cada N segundos,
+ # reaproveitando imports, conexões e caches (sem custo de inicialização por ciclo).
+ # SIGTERM (docker stop) encerra após o ciclo em andamento.
+ interval = int(os.getenv('SYNC_INTERVAL_SECONDS', '0'))
+ stop = threading.Event()
+ if interval > 0:
+  signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
 
- #process_client(client_folder_path, client_name)  
- print(f"\n{'='*70}\nProcesso de sincronização concluído para todos os clientes.\n{'='*70}")  
+ # SYNC_SHARDING=true: o nó se registra uma vez e mantém heartbeat e leases durante
+ # todo o processo (inclusive entre ciclos); só os libera ao encerrar.
+ node = start_sharding(clients_path)
+ try:
+  while True:
+   started_at = time.monotonic()
+   run_all_clients(clients_path, node)
+   if metrics_textfile:  
+    metrics.write_textfile(metrics_textfile)  
+   log.get_logger('main').info("Processo de sincronização concluído para todos os clientes.")
+   if interval <= 0 or stop.wait(max(0, interval - (time.monotonic() - started_at))):
+    break
+ finally:
+  stop_sharding(node)
 if __name__ == '__main__':  
- main()  
\ No newline at end of file
+ main()
@@ -0,0 +1,218 @@
+# sync_app/core/cassette.py
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from . import context
+
+# Modo de gravação/reprodução do tráfego HTTP: 'record', 'replay' ou vazio (desligado).
+MODE_ENV = 'SYNC_HTTP_MODE'
+# Pasta das cassetes (uma por cliente: <pasta>/<cliente>.jsonl.gz).
+DIR_ENV = 'SYNC_CASSETTE_DIR'
+DEFAULT_DIR = 'cassettes'
+# Multiplicador do tempo original das respostas na reprodução (0 = sem espera).
+SPEED_ENV = 'SYNC_REPLAY_SPEED'
+
+# Cabeçalhos de resposta preservados na gravação.
+KEPT_HEADERS = ('Content-Type', 'Retry-After', 'ETag', 'Last-Modified', 'Link',
+                'X-RateLimit-Remaining', 'X-RateLimit-Total', 'Content-Range', 'Accept-Ranges')
+_SECRET_PARAM = re.compile(r'(token|key|password|secret|signature)', re.IGNORECASE)
+SCRUBBED = '***'
+
+_writers = {}
+_replays = {}
+_lock = threading.Lock()
+
+def get_mode():
+    """Retorna 'record', 'replay' ou '' (desligado)."""
+    return os.getenv(MODE_ENV, '').strip().lower()
+
+def cassette_path(client_name):
+    return os.path.join(os.getenv(DIR_ENV, DEFAULT_DIR), f"{client_name}.jsonl.gz")
+
+def _auth_secrets(auth):
+    """Extrai usuário/senha (token, API key) do objeto de autenticação."""
+    if isinstance(auth, requests.auth.HTTPBasicAuth):
+        values = [auth.username, auth.password]
+    elif isinstance(auth, (tuple, list)):
+        values = list(auth)
+    else:
+        values = []
+    return [v for v in values if isinstance(v, str) and len(v) > 3]
+
+def _scrub_text(text, secrets):
+    for secret in secrets:
+        text = text.replace(secret, SCRUBBED)
+    return text
+
+def _scrub_url(url, secrets):
+    parsed = urlparse(url)
+    query = [(k, SCRUBBED if _SECRET_PARAM.search(k) else v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)]
+    return _scrub_text(urlunparse(parsed._replace(query=urlencode(query))), secrets)
+
+def _full_url(url, params):
+    """URL com os parâmetros já codificados e ordenados (chave estável para a reprodução)."""
+    prepared = requests.Request('GET', url, params=params).prepare().url
+    parsed = urlparse(prepared)
+    query = sorted(parse_qsl(parsed.query, keep_blank_values=True))
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+def _body_hash(json_data, data, files):
+    if files:
+        material = json.dumps(sorted(str(v[0]) if isinstance(v, tuple) else str(k) for k, v in files.items()))
+    else:
+        material = json.dumps({'json': json_data, 'data': data}, sort_keys=True, default=str)
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+def _keys(method, url, json_data, data, files, secrets):
+    """Chave exata (método + URL + corpo) e chave ampla (método + caminho) da requisição."""
+    scrubbed_url = _scrub_url(url, secrets)
+    exact = f"{method} {scrubbed_url} {_body_hash(json_data, data, files)}"
+    loose = f"{method} {urlparse(scrubbed_url).path}"
+    return exact, loose
+
+# --- Gravação ---------------------------------------------------------------
+
+def _writer(client_name):
+    with _lock:
+        writer = _writers.get(client_name)
+        if writer is None:
+            path = cassette_path(client_name)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            writer = {'file': gzip.open(path, 'wt', encoding='utf-8'), 'lock': threading.Lock(),
+                      'started_at': time.monotonic()}
+            _writers[client_name] = writer
+        return writer
+
+def record(method, url, params, auth, json_data, data, files, response, elapsed):
+    """Grava o par requisição/resposta na cassete do cliente atual (sem segredos)."""
+    secrets = _auth_secrets(auth)
+    full_url = _full_url(url, params)
+    exact, loose = _keys(method, full_url, json_data, data, files, secrets)
+    content = response.content or b''
+    try:
+        body = {'text': _scrub_text(content.decode('utf-8'), secrets)}
+    except UnicodeDecodeError:
+        body = {'base64': base64.b64encode(content).decode('ascii')}
+    writer = _writer(context.get_client())
+    entry = {
+        'exact': exact,
+        'loose': loose,
+        'offset': round(time.monotonic() - writer['started_at'], 4),
+        'elapsed': round(elapsed, 4),
+        'status': response.status_code,
+        'headers': {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+        'body': body,
+    }
+    with writer['lock']:
+        writer['file'].write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+# Chaves de configuração que nunca vão para a cassete.
+SECRET_CONFIG_KEYS = ('JIRA_API_TOKEN', 'FRESHDESK_API_KEY', 'JIRA_USER_EMAIL')
+
+def record_metadata(client_name, mapping_data, config):
+    """
+    Grava no início da cassete o mapeamento inicial e a configuração do cliente
+    (sem credenciais), para que a reprodução parta exatamente do mesmo estado.
+    """
+    safe_config = {
+        key: (SCRUBBED if key in SECRET_CONFIG_KEYS else value)
+        for key, value in config.items()
+        if isinstance(value, (str, int, float, bool, type(None), dict, list))
+    }
+    writer = _writer(client_name)
+    with writer['lock']:
+        writer['file'].write(json.dumps({'metadata': {'mapping': mapping_data, 'config': safe_config}}) + '\n')
+
+def close_all():
+    """Fecha (e finaliza a compressão de) todas as cassetes abertas para gravação."""
+    with _lock:
+        for writer in _writers.values():
+            writer['file'].close()
+        _writers.clear()
+
+atexit.register(close_all)
+
+# --- Reprodução -------------------------------------------------------------
+
+def load(path):
+    """
+    Lê uma cassete.
+
+    Returns:
+        tuple: (metadados, lista de entradas).
+    """
+    metadata, entries = {}, []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            item = json.loads(line)
+            if 'metadata' in item:
+                metadata.update(item['metadata'])
+            else:
+                entries.append(item)
+    return metadata, entries
+
+def _replay_index(client_name):
+    with _lock:
+        index = _replays.get(client_name)
+        if index is None:
+            path = cassette_path(client_name)
+            entries = load(path)[1] if os.path.exists(path) else []
+            index = {'exact': {}, 'loose': {}, 'lock': threading.Lock()}
+            for entry in entries:
+                index['exact'].setdefault(entry['exact'], []).append(entry)
+                index['loose'].setdefault(entry['loose'], []).append(entry)
+            _replays[client_name] = index
+        return index
+
+def _take(queue, index):
+    """Consome a próxima resposta gravada; a última é repetida quando a fila acaba."""
+    with index['lock']:
+        entry = queue[0]
+        if len(queue) > 1:
+            queue.pop(0)
+        return entry
+
+def _build_response(entry, url):
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    body = entry['body']
+    response._content = body['text'].encode('utf-8') if 'text' in body else base64.b64decode(body['base64'])
+    response._content_consumed = True
+    response.url = url
+    response.reason = 'Replayed'
+    return response
+
+def replay(method, url, params, auth, json_data, data, files):
+    """
+    Devolve a resposta gravada para a requisição, respeitando o tempo original
+    (multiplicado por SYNC_REPLAY_SPEED).
+
+    Procura primeiro pela chave exata; se não houver (ex.: a data da busca mudou),
+    usa a próxima resposta gravada para o mesmo método e caminho.
+
+    Raises:
+        requests.exceptions.ConnectionError: Se a cassete não tiver resposta para a requisição.
+    """
+    full_url = _full_url(url, params)
+    exact, loose = _keys(method, full_url, json_data, data, files, _auth_secrets(auth))
+    index = _replay_index(context.get_client())
+    queue = index['exact'].get(exact) or index['loose'].get(loose)
+    if not queue:
+        raise requests.exceptions.ConnectionError(f"Requisição não encontrada na cassete: {method} {full_url}")
+    entry = _take(queue, index)
+    speed = float(os.getenv(SPEED_ENV, '1'))
+    if speed > 0 and entry['elapsed']:
+        time.sleep(entry['elapsed'] * speed)
+    return _build_response(entry, full_url)
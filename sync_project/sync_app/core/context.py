@@ -0,0 +1,27 @@
+# sync_app/core/context.py
+import contextvars
+from contextlib import contextmanager
+
+# Cliente sendo processado na thread/tarefa atual (usado por métricas e logs).
+current_client = contextvars.ContextVar('current_client', default='-')
+
+@contextmanager
+def client_context(client_name):
+    """Define o cliente atual enquanto o bloco 'with' estiver ativo."""
+    token = current_client.set(client_name)
+    try:
+        yield
+    finally:
+        current_client.reset(token)
+
+def get_client():
+    """Retorna o nome do cliente atual ('-' fora do processamento de um cliente)."""
+    return current_client.get()
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    Envia fn ao executor preservando o contexto atual (cliente etc.).
+    Threads de um ThreadPoolExecutor não herdam contextvars automaticamente.
+    """
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
@@ -0,0 +1,185 @@
+# sync_app/core/http_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import requests
+
+from . import log
+
+logger = log.get_logger(__name__)
+
+# Nome do banco do cache em disco, criado na raiz da pasta de clientes.
+CACHE_DB_FILENAME = '.http_cache.sqlite3'
+# Liga/desliga o cache de respostas (padrão: ligado).
+ENABLED_ENV = 'SYNC_HTTP_CACHE'
+# Tamanho máximo (MB, corpos comprimidos) do cache em disco.
+MAX_MB_ENV = 'SYNC_HTTP_CACHE_MAX_MB'
+DEFAULT_MAX_MB = 256
+# Corpos mantidos em memória (os mais recentes), evitando reler o disco no mesmo processo.
+# O limite é pelo total de bytes, para que o processo contínuo não acumule respostas.
+MEMORY_MAX_BYTES = 16 * 1024 * 1024
+# Corpos maiores que isto (ex.: listas de conversas) ficam só no disco, quando ele existe.
+MEMORY_MAX_ENTRY_BYTES = 256 * 1024
+# A cada quantas gravações o tamanho do cache em disco é conferido.
+EVICTION_CHECK_INTERVAL = 200
+
+_memory = OrderedDict()
+_memory_size = {'bytes': 0}
+_memory_lock = threading.Lock()
+_db = {'path': None, 'conn': None, 'writes': 0, 'max_bytes': DEFAULT_MAX_MB * 1024 * 1024}
+_db_lock = threading.Lock()
+
+def enabled():
+    return os.getenv(ENABLED_ENV, 'true').lower() == 'true'
+
+def configure(db_path):
+    """
+    Ativa o cache em disco no arquivo informado. Sem isso, apenas o cache em
+    memória (do processo atual) é usado.
+    """
+    with _db_lock:
+        if _db['conn'] is not None:
+            _db['conn'].close()
+        conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                validated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_validated ON http_cache (validated_at)")
+        conn.commit()
+        _db.update(path=db_path, conn=conn, writes=0,
+                   max_bytes=int(os.getenv(MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+
+def cache_key(url, params, auth):
+    """
+    Chave da entrada: URL completa + credencial. Clientes diferentes no mesmo host
+    podem enxergar dados diferentes, então nunca compartilham entradas.
+    """
+    full_url = requests.Request('GET', url, params=params).prepare().url
+    if isinstance(auth, requests.auth.HTTPBasicAuth):
+        identity = f"{auth.username}:{auth.password}"
+    else:
+        identity = repr(auth)
+    return hashlib.sha1(f"{identity}\n{full_url}".encode('utf-8')).hexdigest()
+
+def lookup(key):
+    """
+    Retorna a entrada do cache (memória e, se preciso, disco) ou None.
+
+    Returns:
+        dict or None: {'etag', 'last_modified', 'body' (bytes), 'validated_at'}.
+    """
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+            return entry
+    with _db_lock:
+        conn = _db['conn']
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT etag, last_modified, body, validated_at FROM http_cache WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    entry = {'etag': row[0], 'last_modified': row[1], 'body': zlib.decompress(row[2]), 'validated_at': row[3]}
+    _remember(key, entry)
+    return entry
+
+def is_fresh(entry, max_age):
+    """Indica se a entrada foi validada há menos de max_age segundos (dispensa a requisição)."""
+    return max_age > 0 and time.time() - entry['validated_at'] < max_age
+
+def conditional_headers(entry):
+    """Cabeçalhos de uma requisição condicional (If-None-Match / If-Modified-Since)."""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+def _remember(key, entry):
+    size = len(entry['body'])
+    with _memory_lock:
+        previous = _memory.pop(key, None)
+        if previous is not None:
+            _memory_size['bytes'] -= len(previous['body'])
+        if size > MEMORY_MAX_ENTRY_BYTES and _db['conn'] is not None:
+            return
+        _memory[key] = entry
+        _memory_size['bytes'] += size
+        while _memory_size['bytes'] > MEMORY_MAX_BYTES and _memory:
+            _, evicted = _memory.popitem(last=False)
+            _memory_size['bytes'] -= len(evicted['body'])
+
+def store(key, response):
+    """
+    Guarda o corpo de uma resposta 200 que tenha ETag ou Last-Modified.
+    Respostas sem validadores não são guardadas (não há como revalidá-las).
+    """
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not (etag or last_modified) or not response.content:
+        return
+    entry = {'etag': etag, 'last_modified': last_modified, 'body': response.content, 'validated_at': time.time()}
+    _remember(key, entry)
+    compressed = zlib.compress(response.content)
+    with _db_lock:
+        conn = _db['conn']
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO http_cache (key, etag, last_modified, body, size, validated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, etag, last_modified, compressed, len(compressed), entry['validated_at'])
+                )
+            _db['writes'] += 1
+            if _db['writes'] % EVICTION_CHECK_INTERVAL == 0:
+                _evict(conn)
+        except sqlite3.Error as e:
+            logger.warning("Falha ao gravar no cache HTTP: %s", e)
+
+def revalidated(key, entry):
+    """Registra que a entrada continua válida (resposta 304)."""
+    entry['validated_at'] = time.time()
+    _remember(key, entry)
+    with _db_lock:
+        conn = _db['conn']
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("UPDATE http_cache SET validated_at = ? WHERE key = ?", (entry['validated_at'], key))
+        except sqlite3.Error as e:
+            logger.warning("Falha ao atualizar o cache HTTP: %s", e)
+
+def _evict(conn):
+    """Remove as entradas validadas há mais tempo até o cache caber no limite."""
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+    if total <= _db['max_bytes']:
+        return
+    excess = total - _db['max_bytes']
+    freed, keys = 0, []
+    for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY validated_at"):
+        keys.append((key,))
+        freed += size
+        if freed >= excess:
+            break
+    with conn:
+        conn.executemany("DELETE FROM http_cache WHERE key = ?", keys)
+    logger.debug("Cache HTTP: %s entrada(s) removida(s) (%s bytes).", len(keys), freed)
@@ -0,0 +1,118 @@
+# sync_app/core/log.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+from . import context
+
+# Nível mínimo das mensagens (DEBUG, INFO, WARNING, ERROR). Mensagens por conversa/comentário
+# são DEBUG: no nível padrão elas custam apenas a verificação de nível.
+LEVEL_ENV = 'SYNC_LOG_LEVEL'
+DEFAULT_LEVEL = 'INFO'
+# Formato da saída: 'text' (padrão) ou 'json' (uma linha JSON por mensagem).
+FORMAT_ENV = 'SYNC_LOG_FORMAT'
+
+ROOT_LOGGER = 'sync'
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s [%(client)s] %(message)s'
+
+_listener = None
+_lock = threading.Lock()
+
+def get_logger(name):
+    """
+    Retorna o logger de um módulo (ex.: get_logger(__name__)).
+    Todos ficam sob o logger 'sync', configurado por configure().
+    """
+    short_name = name.split('sync_app.', 1)[-1]
+    return logging.getLogger(f"{ROOT_LOGGER}.{short_name}")
+
+class _ClientQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enfileira os registros sem formatá-los: só interpola a mensagem e anota o
+    cliente atual (o contexto é da thread que gerou o log). A formatação e a
+    escrita acontecem na thread do QueueListener, fora do laço de sincronização.
+    """
+
+    def prepare(self, record):
+        record.client = context.get_client()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # O traceback é formatado aqui: o objeto não deve sobreviver à thread de origem.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler que resolve sys.stdout a cada escrita (respeita redirecionamentos)."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por mensagem: ts, level, client, logger, message (e exc, se houver)."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'client': getattr(record, 'client', '-'),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+def configure(level=None, fmt=None):
+    """
+    Configura o logger 'sync' com um handler em fila e uma thread de escrita.
+    Chamadas repetidas apenas ajustam o nível.
+
+    Args:
+        level (str, optional): Nível mínimo. Padrão: SYNC_LOG_LEVEL ou INFO.
+        fmt (str, optional): 'text' ou 'json'. Padrão: SYNC_LOG_FORMAT ou 'text'.
+    """
+    global _listener
+    level = (level or os.getenv(LEVEL_ENV) or DEFAULT_LEVEL).upper()
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    with _lock:
+        if _listener is not None:
+            return
+        fmt = (fmt or os.getenv(FORMAT_ENV) or 'text').lower()
+        output = _StdoutHandler()
+        output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+        records = queue.SimpleQueue()
+        root.addHandler(_ClientQueueHandler(records))
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        atexit.register(shutdown)
+
+def shutdown():
+    """Esvazia a fila de logs e encerra a thread de escrita."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            if isinstance(handler, _ClientQueueHandler):
+                root.removeHandler(handler)
@@ -0,0 +1,165 @@
+# sync_app/core/metrics.py
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from . import context, log
+
+logger = log.get_logger(__name__)
+
+# Limites (segundos) dos buckets dos histogramas de latência.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_HELP = {
+    'sync_api_request_duration_seconds': ('histogram', 'Latência das requisições de API por endpoint.'),
+    'sync_api_retries_total': ('counter', 'Novas tentativas de requisições (ex.: após 429).'),
+    'sync_api_short_circuited_total': ('counter', 'Requisições não enviadas por circuito aberto.'),
+    'sync_bytes_transferred_total': ('counter', 'Bytes transferidos (respostas de API e anexos).'),
+    'sync_attachment_download_duration_seconds': ('histogram', 'Duração dos downloads de anexos.'),
+    'sync_phase_duration_seconds': ('histogram', 'Duração de cada fase do ciclo de sincronização.'),
+    'sync_tickets_processed_total': ('counter', 'Tickets processados por direção de sincronização.'),
+    'sync_cache_requests_total': ('counter', 'Consultas a caches, por resultado (hit/miss).'),
+    'sync_work_deferred_total': ('counter', 'Trabalho adiado para o próximo ciclo (orçamento de requisições esgotado).'),
+    'sync_outbox_items_batched_total': ('counter', 'Comentários/notas da fila de saída enviados agrupados em uma única escrita.'),
+    'sync_host_concurrency_limit': ('gauge', 'Limite atual de requisições simultâneas por host (controle adaptativo).'),
+}
+
+_counters = {}
+_gauges = {}
+_histograms = {}
+_lock = threading.Lock()
+
+_ID_SEGMENT = re.compile(r'^\d+$')
+_ISSUE_KEY_SEGMENT = re.compile(r'^[A-Za-z][A-Za-z0-9_]*-\d+$')
+
+def endpoint_label(path):
+    """
+    Normaliza o caminho de uma URL para uso como rótulo, trocando IDs por
+    marcadores (ex.: /api/v2/tickets/123/conversations -> /api/v2/tickets/{id}/conversations).
+    """
+    segments = []
+    for segment in path.split('/'):
+        # O número logo após 'api' é a versão da API (ex.: /rest/api/3), não um ID.
+        if _ID_SEGMENT.match(segment) and segments and segments[-1] != 'api':
+            segments.append('{id}')
+        elif _ISSUE_KEY_SEGMENT.match(segment):
+            segments.append('{key}')
+        else:
+            segments.append(segment)
+    return '/'.join(segments)
+
+def _key(name, labels):
+    labels = dict(labels)
+    labels.setdefault('client', context.get_client())
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name, value=1, **labels):
+    """Incrementa um contador."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    """Define o valor atual de um gauge."""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+def observe(name, value, **labels):
+    """Registra uma observação em um histograma."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = {'buckets': [0] * len(LATENCY_BUCKETS), 'count': 0, 'sum': 0.0}
+            _histograms[key] = histogram
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+
+def record_cache(cache, hit):
+    """Registra um hit ou miss de cache (para a taxa de acerto)."""
+    inc('sync_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+@contextmanager
+def timed_phase(phase):
+    """Mede a duração de uma fase do ciclo de sincronização do cliente atual."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('sync_phase_duration_seconds', time.perf_counter() - start, phase=phase)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+def render():
+    """Gera as métricas no formato de texto do Prometheus."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in _histograms.items()}
+
+    lines = []
+    names = sorted({name for name, _ in counters} | {name for name, _ in gauges} | {name for name, _ in histograms})
+    for name in names:
+        metric_type, help_text = _HELP.get(name, ('untyped', ''))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for (metric_name, labels), value in sorted(counters.items()) + sorted(gauges.items()):
+            if metric_name == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (metric_name, labels), histogram in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels, {'le': bound})} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+def write_textfile(path):
+    """
+    Grava as métricas em um arquivo (formato do textfile collector do node_exporter).
+    A escrita é atômica: grava em um temporário e renomeia.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+def start_http_server(port, host='0.0.0.0'):
+    """Expõe /metrics em uma thread em segundo plano. Retorna o servidor criado."""
+    # Importado aqui: http.server só é necessário quando o endpoint está ativo.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info("Métricas disponíveis em http://%s:%s/metrics", host, port)
+    return server
@@ -1,60 +1,736 @@
 # sync_app/core/network.py
+import contextvars
+import json
 import requests
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 
-def api_request(method, url, auth, json_data=None, params=None, data=None, files=None):
+from . import cassette, context, http_cache, log, metrics
+
+logger = log.get_logger(__name__)
+
+# Controle adaptativo de concorrência (AIMD) por host: o limite de requisições
+# simultâneas começa em CONCURRENCY_INITIAL, cresce cerca de 1 a cada "limite"
+# respostas normais enquanto o host está com todas as vagas ocupadas, e cai pela
+# metade em um 429/503, em um timeout ou quando a latência mediana de uma janela
+# passa de LATENCY_TOLERANCE vezes a referência do host (e a supera em pelo menos
+# LATENCY_MIN_INCREASE_MS, para que a variação normal de um host rápido não reduza
+# o limite). Requisições iniciadas antes
+# da última redução não reduzem de novo (uma rajada de 429 conta uma vez só).
+CONCURRENCY_INITIAL = 4
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = 32
+CONCURRENCY_DECREASE_FACTOR = 0.5
+# Depois de uma redução, o limite volta a crescer só até abaixo do nível que causou
+# a sobrecarga; esse nível é testado de novo a cada CONCURRENCY_PROBE_INTERVAL segundos.
+CONCURRENCY_PROBE_INTERVAL = 30.0
+# Respostas que indicam que o host está no limite.
+CONGESTION_STATUSES = (429, 503)
+# Latências (segundos) por janela de avaliação, e tolerância sobre a referência do host
+# (menor mediana observada). A referência sobe LATENCY_BASELINE_DRIFT por janela, para
+# que um host que ficou mais lento de forma permanente seja reaprendido.
+LATENCY_WINDOW = 20
+LATENCY_TOLERANCE = 2.0
+LATENCY_BASELINE_DRIFT = 1.05
+# Aumento absoluto mínimo (ms) da mediana sobre a referência para reduzir o limite.
+LATENCY_MIN_INCREASE_ENV = 'SYNC_LATENCY_MIN_INCREASE_MS'
+LATENCY_MIN_INCREASE_MS = 75
+# Tamanho máximo do pool de conexões por host. Clientes que apontam para o mesmo
+# site do Jira ou domínio do Freshdesk compartilham a mesma sessão (e o mesmo pool).
+POOL_MAXSIZE = CONCURRENCY_MAX
+# Número máximo de novas tentativas após um HTTP 429 (Too Many Requests).
+MAX_RATE_LIMIT_RETRIES = 3
+# Espera padrão (segundos) quando o 429 não informa o cabeçalho Retry-After.
+DEFAULT_RETRY_AFTER = 60
+# Timeouts (segundos) de conexão e de leitura de todas as requisições.
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+# Downloads de anexos: tamanho máximo de cada bloco gravado e quantas vezes uma
+# transferência interrompida é retomada (Range) na mesma chamada.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_MAX_RESUMES = 3
+# Circuit breaker: falhas seguidas (conexão, timeout ou 5xx) que abrem o circuito do host,
+# e o tempo (segundos) até a primeira sondagem em half-open. O tempo dobra a cada sondagem
+# que falha, até CIRCUIT_MAX_OPEN_SECONDS.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 60
+CIRCUIT_MAX_OPEN_SECONDS = 900
+
+class AttachmentRejected(Exception):
+    """Anexo recusado pelo limite de tamanho: não adianta tentar de novo."""
+
+_sessions = {}
+_rate_limits = {}
+_circuits = {}
+_concurrency = {}
+# Orçamento de requisições do ciclo de cada cliente (MAX_REQUESTS_PER_RUN):
+# {cliente: {'limit', 'used', 'deadline'}}.
+_run_budgets = {}
+# Requisições em segundo plano (ex.: importação do histórico): (fração 0-1 do limite por
+# minuto do host, teto próprio por minuto ou None); None = requisição normal.
+_background_lane = contextvars.ContextVar('background_share', default=None)
+_registry_lock = threading.Lock()
+
+def get_host(url):
+    """Retorna o host (netloc) de uma URL, normalizado em minúsculas."""
+    return urlparse(url).netloc.lower()
+
+def get_session(url):
+    """
+    Retorna a sessão HTTP compartilhada do host da URL, criando-a se necessário.
+    Todas as chamadas para o mesmo host reutilizam o mesmo pool de conexões.
+    """
+    host = get_host(url)
+    with _registry_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+        return session
+
+def _get_rate_limit(host):
+    with _registry_lock:
+        state = _rate_limits.get(host)
+        if state is None:
+            state = {
+                'lock': threading.Lock(),
+                'per_minute': None,
+                'tokens': 0.0,
+                'updated_at': time.monotonic(),
+                'blocked_until': 0.0,
+                'background_tokens': 0.0,
+                'background_updated_at': time.monotonic(),
+            }
+            _rate_limits[host] = state
+        return state
+
+def configure_host_rate_limit(url, requests_per_minute):
+    """
+    Define o orçamento de requisições por minuto do host da URL.
+    Se vários clientes configurarem o mesmo host, prevalece o menor limite,
+    já que a cota do Jira/Freshdesk é da conta e não de cada cliente.
+
+    Args:
+        url (str): Qualquer URL do host.
+        requests_per_minute (int or None): Limite desejado. None não altera o limite.
+    """
+    if not requests_per_minute:
+        return
+    state = _get_rate_limit(get_host(url))
+    with state['lock']:
+        limit = float(requests_per_minute)
+        if state['per_minute'] is None:
+            state['tokens'] = limit
+        elif limit < state['per_minute']:
+            state['tokens'] = min(state['tokens'], limit)
+        else:
+            return
+        state['per_minute'] = limit
+        state['updated_at'] = time.monotonic()
+
+def _acquire_rate_budget(host):
+    """Bloqueia até que o host tenha orçamento para mais uma requisição."""
+    state = _get_rate_limit(host)
+    lane = _background_lane.get()
+    while True:
+        with state['lock']:
+            now = time.monotonic()
+            wait = state['blocked_until'] - now
+            if wait <= 0:
+                per_minute = state['per_minute']
+                if per_minute is not None:
+                    elapsed = now - state['updated_at']
+                    state['tokens'] = min(per_minute, state['tokens'] + elapsed * per_minute / 60.0)
+                    state['updated_at'] = now
+                if lane is not None:
+                    wait = _take_background_budget(state, per_minute, lane, now)
+                    if wait <= 0:
+                        return
+                elif per_minute is None:
+                    return
+                elif state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return
+                else:
+                    wait = (1 - state['tokens']) * 60.0 / per_minute
+        time.sleep(wait)
+
+def _take_background_budget(state, per_minute, lane, now):
+    """
+    Consome o orçamento de uma requisição em segundo plano: ela precisa de uma ficha
+    do balde próprio (share do limite por minuto do host, até o teto próprio da faixa)
+    e, em hosts com limite, de que o orçamento geral fique acima da reserva da
+    sincronização normal. Chamada com o lock do host.
+
+    Returns:
+        float: 0 se a requisição pode seguir; senão, segundos a esperar.
+    """
+    share, max_per_minute = lane
+    rates = [rate for rate in (per_minute and per_minute * share, max_per_minute) if rate]
+    if not rates:
+        return 0.0
+    rate = min(rates)
+    elapsed = now - state['background_updated_at']
+    state['background_tokens'] = min(max(rate, 1.0), state['background_tokens'] + elapsed * rate / 60.0)
+    state['background_updated_at'] = now
+    if per_minute is None:
+        if state['background_tokens'] >= 1:
+            state['background_tokens'] -= 1
+            return 0.0
+        return (1 - state['background_tokens']) * 60.0 / rate
+    needed = 1 + min(per_minute - rate, per_minute - 1)
+    if state['tokens'] >= needed and state['background_tokens'] >= 1:
+        state['tokens'] -= 1
+        state['background_tokens'] -= 1
+        return 0.0
+    return max((needed - state['tokens']) * 60.0 / per_minute,
+               (1 - state['background_tokens']) * 60.0 / rate)
+
+@contextmanager
+def background_lane(share_percent, max_per_minute=None):
+    """
+    Marca as requisições feitas dentro do bloco 'with' como trabalho em segundo plano:
+    elas usam no máximo share_percent% do limite por minuto do host e só enquanto o
+    orçamento do host estiver acima da reserva (o restante do limite), que fica
+    sempre livre para a sincronização normal. max_per_minute limita o bloco também
+    em hosts sem limite configurado (*_MAX_REQUESTS_PER_MINUTE).
+
+    Args:
+        share_percent (int): Parte do limite por minuto que o bloco pode usar (1-100).
+        max_per_minute (int, optional): Teto de requisições por minuto do bloco, por host.
+    """
+    token = _background_lane.set((min(max(share_percent, 1), 100) / 100.0, max_per_minute or None))
+    try:
+        yield
+    finally:
+        _background_lane.reset(token)
+
+def _block_host(host, seconds):
+    """Pausa todas as requisições para o host (ex.: após um 429 de qualquer cliente)."""
+    state = _get_rate_limit(host)
+    with state['lock']:
+        state['blocked_until'] = max(state['blocked_until'], time.monotonic() + seconds)
+
+def start_run_budget(max_requests, deadline=None):
+    """
+    Inicia a contagem de requisições do ciclo do cliente atual.
+
+    Args:
+        max_requests (int or None): Orçamento do ciclo. None = sem limite (só contagem).
+        deadline (float, optional): Instante (time.monotonic) em que o orçamento se
+            esgota, mesmo que sobrem requisições.
+    """
+    with _registry_lock:
+        _run_budgets[context.get_client()] = {'limit': max_requests, 'used': 0, 'deadline': deadline}
+
+def run_budget_used():
+    """Requisições já feitas no ciclo do cliente atual."""
+    budget = _run_budgets.get(context.get_client())
+    return budget['used'] if budget else 0
+
+def run_budget_exhausted():
+    """
+    Indica se o cliente atual já gastou o orçamento do ciclo. O orçamento é conferido
+    antes de iniciar cada unidade de trabalho (ticket ou escrita): a unidade em
+    andamento termina, e o restante fica para o próximo ciclo.
+    """
+    budget = _run_budgets.get(context.get_client())
+    if not budget:
+        return False
+    if budget['deadline'] is not None and time.monotonic() >= budget['deadline']:
+        return True
+    return budget['limit'] is not None and budget['used'] >= budget['limit']
+
+def _count_run_request():
+    budget = _run_budgets.get(context.get_client())
+    if budget is not None:
+        with _registry_lock:
+            budget['used'] += 1
+
+def _get_concurrency(host):
+    with _registry_lock:
+        state = _concurrency.get(host)
+        if state is None:
+            state = {
+                'cond': threading.Condition(),
+                'limit': float(CONCURRENCY_INITIAL),
+                'in_flight': 0,
+                'window': [],
+                'baseline': None,
+                'p50': None,
+                'p90': None,
+                'decreased_at': 0.0,
+                'ceiling': None,
+            }
+            _concurrency[host] = state
+        return state
+
+def _acquire_slot(host):
+    """
+    Bloqueia até que o host tenha uma vaga livre dentro do limite de concorrência atual.
+
+    Returns:
+        float: Instante (time.monotonic) em que a vaga foi obtida.
+    """
+    state = _get_concurrency(host)
+    with state['cond']:
+        while state['in_flight'] >= int(state['limit']):
+            state['cond'].wait()
+        state['in_flight'] += 1
+    return time.monotonic()
+
+def _decrease_concurrency(state, host, reason):
+    state['decreased_at'] = time.monotonic()
+    state['ceiling'] = int(state['limit'])
+    state['limit'] = max(float(CONCURRENCY_MIN), state['limit'] * CONCURRENCY_DECREASE_FACTOR)
+    logger.info("Concorrência de %s reduzida para %s (%s).", host, int(state['limit']), reason)
+
+def _increase_concurrency(state):
+    limit = min(float(CONCURRENCY_MAX), state['limit'] + 1.0 / state['limit'])
+    if state['ceiling'] and time.monotonic() - state['decreased_at'] < CONCURRENCY_PROBE_INTERVAL:
+        limit = min(limit, max(float(CONCURRENCY_MIN), state['ceiling'] - 1.0))
+    state['limit'] = max(state['limit'], limit)
+
+def _observe_latency(state, host, latency):
+    """Acumula a latência na janela e, com a janela cheia, compara a mediana com a referência."""
+    window = state['window']
+    window.append(latency)
+    if len(window) < LATENCY_WINDOW:
+        return
+    window.sort()
+    state['p50'] = window[len(window) // 2]
+    state['p90'] = window[int(len(window) * 0.9)]
+    window.clear()
+    baseline = state['baseline']
+    state['baseline'] = state['p50'] if baseline is None else min(baseline * LATENCY_BASELINE_DRIFT, state['p50'])
+    min_increase = float(os.getenv(LATENCY_MIN_INCREASE_ENV, LATENCY_MIN_INCREASE_MS)) / 1000.0
+    if (baseline is not None and state['p50'] > baseline * LATENCY_TOLERANCE
+            and state['p50'] - baseline > min_increase):
+        _decrease_concurrency(state, host, f"latência mediana {state['p50']:.2f}s, referência {baseline:.2f}s")
+
+def _release_slot(host, acquired_at, latency=None, congested=False):
+    """
+    Libera a vaga e ajusta o limite do host pelo resultado da requisição.
+
+    Args:
+        acquired_at (float): Retorno de _acquire_slot.
+        latency (float, optional): Duração da requisição (None = não avaliar, ex.: envio de anexos).
+        congested (bool): A resposta indicou sobrecarga (429/503 ou timeout).
+    """
+    state = _get_concurrency(host)
+    with state['cond']:
+        saturated = state['in_flight'] >= int(state['limit'])
+        state['in_flight'] -= 1
+        previous = int(state['limit'])
+        if congested:
+            if acquired_at > state['decreased_at']:
+                _decrease_concurrency(state, host, "sobrecarga")
+        else:
+            if latency is not None:
+                _observe_latency(state, host, latency)
+            # Só cresce quando o limite está de fato sendo usado.
+            if saturated and int(state['limit']) == previous:
+                _increase_concurrency(state)
+        state['cond'].notify_all()
+        limit = int(state['limit'])
+    if limit != previous:
+        logger.debug("Concorrência de %s: %s -> %s.", host, previous, limit)
+        # O limite é do host (compartilhado entre clientes), não do cliente atual.
+        metrics.set_gauge('sync_host_concurrency_limit', limit, host=host, client='-')
+
+@contextmanager
+def _host_slot(host):
+    """
+    Ocupa uma vaga de concorrência do host durante o bloco. O bloco informa o
+    resultado em slot['latency'] e slot['congested'].
+    """
+    acquired_at = _acquire_slot(host)
+    slot = {'latency': None, 'congested': False}
+    try:
+        yield slot
+    except requests.exceptions.Timeout:
+        slot['congested'] = True
+        raise
+    finally:
+        _release_slot(host, acquired_at, slot['latency'], slot['congested'])
+
+def concurrency_snapshot():
+    """
+    Returns:
+        dict: {host: {'limit', 'in_flight', 'p50', 'p90'}} do controle adaptativo.
+    """
+    with _registry_lock:
+        states = dict(_concurrency)
+    snapshot = {}
+    for host, state in states.items():
+        with state['cond']:
+            snapshot[host] = {'limit': int(state['limit']), 'in_flight': state['in_flight'],
+                              'p50': state['p50'], 'p90': state['p90']}
+    return snapshot
+
+def _get_circuit(host):
+    with _registry_lock:
+        circuit = _circuits.get(host)
+        if circuit is None:
+            circuit = {
+                'lock': threading.Lock(),
+                'state': 'closed',
+                'failures': 0,
+                'open_seconds': CIRCUIT_OPEN_SECONDS,
+                'retry_at': 0.0,
+                'probing': False,
+            }
+            _circuits[host] = circuit
+        return circuit
+
+def _circuit_allows(host):
+    """
+    Indica se uma requisição ao host pode seguir. Com o circuito aberto, só uma
+    requisição de sondagem (half-open) é liberada depois do tempo de espera.
+    """
+    circuit = _get_circuit(host)
+    with circuit['lock']:
+        if circuit['state'] == 'closed':
+            return True
+        if time.monotonic() < circuit['retry_at'] or circuit['probing']:
+            return False
+        circuit['state'] = 'half_open'
+        circuit['probing'] = True
+        return True
+
+def _record_success(host):
+    circuit = _get_circuit(host)
+    with circuit['lock']:
+        if circuit['state'] != 'closed':
+            logger.info("Circuito de %s fechado: o host voltou a responder.", host)
+        circuit['state'] = 'closed'
+        circuit['failures'] = 0
+        circuit['open_seconds'] = CIRCUIT_OPEN_SECONDS
+        circuit['probing'] = False
+
+def _record_failure(host):
+    circuit = _get_circuit(host)
+    with circuit['lock']:
+        circuit['failures'] += 1
+        if circuit['state'] == 'half_open':
+            # A sondagem falhou: reabre com espera maior.
+            circuit['open_seconds'] = min(circuit['open_seconds'] * 2, CIRCUIT_MAX_OPEN_SECONDS)
+        elif circuit['failures'] < CIRCUIT_FAILURE_THRESHOLD:
+            return
+        circuit['state'] = 'open'
+        circuit['probing'] = False
+        circuit['retry_at'] = time.monotonic() + circuit['open_seconds']
+        logger.warning("Circuito de %s aberto após %s falha(s). Nova sondagem em %ss.",
+                       host, circuit['failures'], circuit['open_seconds'])
+
+def _release_probe(host):
+    """
+    Encerra uma sondagem half-open que terminou sem resposta do host por erro da
+    própria requisição (ex.: URL inválida, redirecionamentos demais). O circuito não
+    muda de estado; a próxima requisição pode sondar de novo.
+    """
+    circuit = _get_circuit(host)
+    with circuit['lock']:
+        circuit['probing'] = False
+
+def is_circuit_open(url):
+    """
+    Indica se o host da URL está com o circuito aberto (fora do ar) e ainda
+    não chegou a hora da próxima sondagem.
+    """
+    circuit = _get_circuit(get_host(url))
+    with circuit['lock']:
+        return circuit['state'] != 'closed' and (time.monotonic() < circuit['retry_at'] or circuit['probing'])
+
+def _is_host_failure(response):
+    """Erros 5xx indicam problema no host; 4xx são erros da própria requisição."""
+    return response is not None and response.status_code >= 500
+
+def _retry_after_seconds(response):
+    try:
+        return max(1, int(response.headers.get('Retry-After', DEFAULT_RETRY_AFTER)))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+def _send(session, method, url, auth, params=None, json_data=None, data=None, files=None, **kwargs):
+    """
+    Envia a requisição pela sessão do host. Com SYNC_HTTP_MODE=record, grava o par
+    requisição/resposta na cassete do cliente; com SYNC_HTTP_MODE=replay, devolve a
+    resposta gravada sem acessar a rede.
+    """
+    _count_run_request()
+    mode = cassette.get_mode()
+    if mode == 'replay':
+        return cassette.replay(method, url, params, auth, json_data, data, files)
+    started_at = time.perf_counter()
+    response = session.request(method, url, params=params, json=json_data, data=data, files=files, auth=auth, **kwargs)
+    if mode == 'record':
+        cassette.record(method, url, params, auth, json_data, data, files, response, time.perf_counter() - started_at)
+    return response
+
+def _cacheable(method, cache_max_age):
+    # Com cassete ativa, as respostas vêm sempre da rede/cassete (reprodução determinística).
+    return (cache_max_age is not None and method == 'GET'
+            and http_cache.enabled() and not cassette.get_mode())
+
+def api_request(method, url, auth, json_data=None, params=None, data=None, files=None, extra_headers=None,
+                cache_max_age=None):
     """
     Realiza uma requisição de API genérica e centralizada.
+    Usa a sessão compartilhada do host e respeita o orçamento de requisições dele.
+
+    Args:
+        cache_max_age (int, optional): Ativa o cache de respostas para este GET.
+            Uma resposta validada há menos de cache_max_age segundos é reutilizada
+            sem requisição; depois disso, a requisição é condicional (ETag /
+            Last-Modified) e um 304 devolve o corpo guardado. 0 = sempre revalidar.
+            None (padrão) = sem cache.
     """
     headers = {}
     # Se não estivermos enviando arquivos, o Content-Type é application/json
     if not files:
         headers['Content-Type'] = 'application/json'
     headers['Accept'] = 'application/json'
+    if extra_headers:
+        headers.update(extra_headers)
+
+    host = get_host(url)
+    session = get_session(url)
+    endpoint = metrics.endpoint_label(urlparse(url).path)
 
+    cache_key, cached = None, None
+    if _cacheable(method, cache_max_age):
+        cache_key = http_cache.cache_key(url, params, auth)
+        cached = http_cache.lookup(cache_key)
+        if cached and http_cache.is_fresh(cached, cache_max_age):
+            metrics.record_cache('http_response', hit=True)
+            return json.loads(cached['body'])
+        if cached:
+            headers.update(http_cache.conditional_headers(cached))
+
+    if not _circuit_allows(host):
+        logger.debug("Circuito aberto para %s. Requisição %s %s não enviada.", host, method, url)
+        metrics.inc('sync_api_short_circuited_total', host=host, endpoint=endpoint)
+        return None
+
+    started_at = time.perf_counter()
     try:
-        response = requests.request(
-            method,
-            url,
-            json=json_data,
-            params=params,
-            data=data,
-            files=files,
-            auth=auth,
-            headers=headers
-        )
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            _acquire_rate_budget(host)
+            with _host_slot(host) as slot:
+                started_at = time.perf_counter()
+                response = _send(
+                    session,
+                    method,
+                    url,
+                    auth,
+                    params=params,
+                    json_data=json_data,
+                    data=data,
+                    files=files,
+                    headers=headers,
+                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+                )
+                # A duração de um envio de anexo depende do tamanho do arquivo, não da carga do host.
+                slot['latency'] = None if files else time.perf_counter() - started_at
+                slot['congested'] = response.status_code in CONGESTION_STATUSES
+            metrics.observe('sync_api_request_duration_seconds', time.perf_counter() - started_at,
+                            host=host, method=method, endpoint=endpoint, status=response.status_code)
+            metrics.inc('sync_bytes_transferred_total', len(response.content), host=host, direction='api_response')
+            # 429: a cota do host acabou. Pausa o host inteiro (todos os clientes dele) e tenta de novo.
+            if response.status_code == 429 and attempt < MAX_RATE_LIMIT_RETRIES and not files:
+                wait = _retry_after_seconds(response)
+                logger.warning("Limite de requisições atingido em %s. Aguardando %ss...", host, wait)
+                _block_host(host, wait)
+                metrics.inc('sync_api_retries_total', host=host, reason='429')
+                continue
+            break
+
+        if _is_host_failure(response):
+            _record_failure(host)
+        else:
+            _record_success(host)
+
+        if cache_key:
+            # 304: o recurso não mudou; só os cabeçalhos trafegaram.
+            if cached and response.status_code == 304:
+                metrics.record_cache('http_response', hit=True)
+                http_cache.revalidated(cache_key, cached)
+                return json.loads(cached['body'])
+            metrics.record_cache('http_response', hit=False)
+
         response.raise_for_status()  # Lança uma exceção para status de erro (4xx ou 5xx)
+        if cache_key and response.status_code == 200:
+            http_cache.store(cache_key, response)
 
         # Respostas 201 (Created) sem conteúdo são comuns, tratamos como sucesso
         if response.status_code == 201 and not response.content:
             return True
-            
+
         # Retorna o JSON se houver conteúdo, caso contrário, None
         return response.json() if response.content else None
 
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        _record_failure(host)
+        metrics.observe('sync_api_request_duration_seconds', time.perf_counter() - started_at,
+                        host=host, method=method, endpoint=endpoint, status='error')
+        logger.warning("Erro na API para %s %s: %s", method, url, e)
+        return None
     except requests.exceptions.RequestException as e:
-        print(f"Erro na API para {method} {url}: {e}")
+        logger.warning("Erro na API para %s %s: %s", method, url, e)
         if e.response is not None:
-            print(f"Status: {e.response.status_code}, Detalhes: {e.response.text}")
+            logger.warning("Status: %s, Detalhes: %s", e.response.status_code, e.response.text)
+        else:
+            # Sem resposta, o resultado da requisição não foi registrado no circuito.
+            _release_probe(host)
         return None
 
-def download_attachment(url, file_path, auth=None):
+def _download_total(response, offset):
+    """
+    Tamanho total do arquivo segundo a resposta (None se desconhecido) e se ela
+    continua do byte 'offset' (206 com Content-Range começando nele).
+    """
+    if response.status_code == 206:
+        match = re.match(r'bytes (\d+)-\d+/(\d+|\*)', response.headers.get('Content-Range', ''))
+        if match and int(match.group(1)) == offset:
+            return (int(match.group(2)) if match.group(2) != '*' else None), True
+        return None, False
+    length = response.headers.get('Content-Length')
+    return (int(length) if length and length.isdigit() else None), False
+
+def _received_chunks(response):
+    """
+    Blocos do corpo da resposta à medida que chegam (até DOWNLOAD_CHUNK_SIZE bytes).
+
+    Ao contrário de iter_content, não espera completar o bloco: o que chegou antes de
+    uma queda de conexão é entregue (e gravado no parcial) antes do erro.
+    """
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None or response._content_consumed:
+        # Corpo já em memória (resposta gravada ou reproduzida da cassete) ou urllib3 antigo.
+        yield from response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        return
+    try:
+        while True:
+            chunk = read1(DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+
+def download_attachment(url, file_path, auth=None, max_bytes=None):
     """
-    Baixa um arquivo de uma URL e o salva localmente.
+    Baixa um arquivo em blocos e o salva localmente.
+
+    O conteúdo vai para '<file_path>.part'. Se a conexão cair no meio, o download
+    continua de onde parou (cabeçalho Range), até DOWNLOAD_MAX_RESUMES vezes nesta
+    chamada; se ainda assim não terminar, o parcial fica para a próxima tentativa.
+    Servidores que ignoram o Range (resposta 200) recomeçam do zero.
+
+    Downloads não ocupam vagas do controle de concorrência do host (podem durar
+    minutos); quem limita quantos ocorrem ao mesmo tempo é o pool de anexos do drenador.
 
+    Args:
+        url (str): Endereço do arquivo.
+        file_path (str): Caminho final do arquivo.
+        auth (optional): Credenciais da requisição.
+        max_bytes (int, optional): Tamanho máximo aceito. Um arquivo maior é
+            recusado (pelo tamanho informado ou ao passar do limite) e o parcial descartado.
+
+    Returns:
+        bool: True se o arquivo foi baixado por completo; False em falha (vale tentar de novo).
+
+    Raises:
+        AttachmentRejected: Se o arquivo passa de max_bytes.
     """
+    host = get_host(url)
+    if not _circuit_allows(host):
+        logger.debug("Circuito aberto para %s. Download de %s não realizado.", host, url)
+        return False
+
+    part_path = f"{file_path}.part"
+    started_at = time.perf_counter()
+    transferred = 0
+    status = 'error'
     try:
-        # Usamos stream=True para lidar com arquivos grandes de forma eficiente
-        response = requests.get(url, auth=auth, stream=True)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
+        for attempt in range(DOWNLOAD_MAX_RESUMES + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {'Range': f"bytes={offset}-"} if offset else None
+            try:
+                _acquire_rate_budget(host)
+                response = _send(get_session(url), 'GET', url, auth, headers=headers, stream=True,
+                                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+                with response:
+                    if _is_host_failure(response):
+                        _record_failure(host)
+                    else:
+                        _record_success(host)
+                    if response.status_code == 416 and offset:
+                        # O parcial não corresponde mais ao arquivo: recomeça do zero.
+                        os.remove(part_path)
+                        continue
+                    if response.status_code == 429:
+                        _block_host(host, _retry_after_seconds(response))
+                    response.raise_for_status()
+
+                    total, resumed = _download_total(response, offset)
+                    if max_bytes and total and total > max_bytes:
+                        status = 'too_large'
+                        raise AttachmentRejected(f"{total} bytes, acima do limite de {max_bytes} bytes")
+                    written = offset if resumed else 0
+                    if offset and not resumed:
+                        logger.debug("Servidor de %s não retomou o download; recomeçando do zero.", host)
+                    with open(part_path, 'ab' if resumed else 'wb') as f:
+                        for chunk in _received_chunks(response):
+                            f.write(chunk)
+                            written += len(chunk)
+                            transferred += len(chunk)
+                            if max_bytes and written > max_bytes:
+                                status = 'too_large'
+                                raise AttachmentRejected(f"passou do limite de {max_bytes} bytes durante o download")
+                    if total and written < total:
+                        raise requests.exceptions.ChunkedEncodingError(
+                            f"Conexão encerrada após {written} de {total} bytes.")
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                _record_failure(host)
+                if attempt == DOWNLOAD_MAX_RESUMES or not _circuit_allows(host):
+                    raise
+                logger.debug("Download de %s interrompido (%s). Retomando do byte %s...", url,
+                             e, os.path.getsize(part_path) if os.path.exists(part_path) else 0)
+        else:
+            # A última tentativa terminou em 416: o download recomeça do zero na próxima chamada.
+            logger.error("Falha ao baixar anexo de %s: o servidor recusou a retomada (416).", url)
+            return False
+
+        os.replace(part_path, file_path)
+        size = os.path.getsize(file_path)
+        status = 'ok'
         # Confirma que o arquivo foi realmente criado e tem conteúdo
-        return os.path.getsize(file_path) > 0
-        
+        return size > 0
+
     except requests.exceptions.RequestException as e:
-        print(f"ERRO: Falha ao baixar anexo de {url}. Detalhes: {e}")
-        return False
\ No newline at end of file
+        if e.response is None:
+            _release_probe(host)
+        logger.error("Falha ao baixar anexo de %s. Detalhes: %s", url, e)
+        return False
+    finally:
+        if status == 'too_large' and os.path.exists(part_path):
+            os.remove(part_path)
+        metrics.observe('sync_attachment_download_duration_seconds', time.perf_counter() - started_at,
+                        host=host, status=status)
+        if transferred:
+            metrics.inc('sync_bytes_transferred_total', transferred, host=host, direction='attachment_download')
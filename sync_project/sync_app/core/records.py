@@ -0,0 +1,123 @@
+# sync_app/core/records.py
+"""
+Registros compactos dos tickets buscados em cada ciclo.
+
+As buscas do Jira e do Freshdesk devolvem o JSON completo de cada ticket (autores com
+avatares, corpo ADF dos comentários, campos personalizados...), mas o ciclo só lê
+alguns campos. Cada página é convertida nestes registros assim que chega e o JSON
+original é descartado: com __slots__ não há um dict por instância, e os textos
+repetidos (status, prioridade, autor) são compartilhados com sys.intern.
+
+O conteúdo completo de um ticket do Freshdesk (descrição, anexos) e suas conversas
+continuam sendo buscados sob demanda, só para os tickets que precisam deles.
+"""
+import sys
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _adf_text(body):
+    """Texto do primeiro parágrafo de um corpo ADF (None se não houver)."""
+    try:
+        return body['content'][0]['content'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+class JiraComment:
+    __slots__ = ('id', 'updated', 'author', 'text')
+
+    def __init__(self, id, updated, author, text):
+        self.id = id
+        self.updated = updated
+        self.author = _intern(author)
+        self.text = text
+
+    @classmethod
+    def from_api(cls, comment):
+        return cls(comment['id'], comment['updated'], (comment.get('author') or {}).get('displayName'),
+                   _adf_text(comment.get('body')))
+
+    def to_list(self):
+        return [self.id, self.updated, self.author, self.text]
+
+class JiraAttachment:
+    __slots__ = ('id', 'filename', 'content_url', 'size')
+
+    def __init__(self, id, filename, content_url, size):
+        self.id = id
+        self.filename = filename
+        self.content_url = content_url
+        self.size = size
+
+    @classmethod
+    def from_api(cls, attachment):
+        return cls(attachment['id'], attachment['filename'], attachment['content'], attachment.get('size'))
+
+    def to_list(self):
+        return [self.id, self.filename, self.content_url, self.size]
+
+class JiraIssue:
+    __slots__ = ('key', 'updated', 'status', 'priority', 'comments', 'attachments')
+
+    def __init__(self, key, updated, status, priority, comments=(), attachments=()):
+        self.key = key
+        self.updated = updated
+        self.status = _intern(status)
+        self.priority = _intern(priority)
+        # Tuplas: menores que listas e o ciclo nunca as altera.
+        self.comments = tuple(comments)
+        self.attachments = tuple(attachments)
+
+    @property
+    def project_key(self):
+        return self.key.rsplit('-', 1)[0].upper()
+
+    @classmethod
+    def from_api(cls, issue):
+        """Projeta uma issue da busca JQL (campos status, priority, updated, comment e attachment)."""
+        fields = issue['fields']
+        return cls(
+            issue['key'],
+            fields['updated'],
+            (fields.get('status') or {}).get('name'),
+            (fields.get('priority') or {}).get('name'),
+            [JiraComment.from_api(c) for c in (fields.get('comment') or {}).get('comments', [])],
+            [JiraAttachment.from_api(a) for a in fields.get('attachment') or []],
+        )
+
+    def to_dict(self):
+        """Forma serializável em JSON (usada pelo diário do ciclo)."""
+        return {'key': self.key, 'updated': self.updated, 'status': self.status, 'priority': self.priority,
+                'comments': [c.to_list() for c in self.comments],
+                'attachments': [a.to_list() for a in self.attachments]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['key'], data['updated'], data['status'], data['priority'],
+                   [JiraComment(*c) for c in data['comments']],
+                   [JiraAttachment(*a) for a in data['attachments']])
+
+class FreshdeskTicket:
+    __slots__ = ('id', 'created_at', 'updated_at', 'status', 'priority', 'company_id')
+
+    def __init__(self, id, created_at, updated_at, status, priority, company_id):
+        self.id = id
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.status = status
+        self.priority = priority
+        self.company_id = company_id
+
+    @classmethod
+    def from_api(cls, ticket):
+        """Projeta um ticket da listagem ou da API de busca do Freshdesk."""
+        return cls(ticket['id'], ticket.get('created_at'), ticket.get('updated_at'), ticket.get('status'),
+                   ticket.get('priority'), ticket.get('company_id'))
+
+    def to_dict(self):
+        """Forma serializável em JSON (usada pelo diário do ciclo)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
@@ -2,7 +2,10 @@
 import re
 import html
 from datetime import datetime, timezone
-from dateutil import parser
+
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 def html_to_text(html_string):
     """
@@ -18,14 +21,29 @@ def html_to_text(html_string):
     # Remove espaços em branco múltiplos
     return re.sub(r'\s+', ' ', text).strip()
 
+# Fuso no formato do Jira (+0000), que o datetime.fromisoformat do Python 3.9 não aceita.
+_COMPACT_OFFSET = re.compile(r'([+-]\d{2})(\d{2})$')
+
+def _parse_iso(datetime_str):
+    """Caminho rápido para datas ISO 8601 (Jira e Freshdesk); None se o formato não for esse."""
+    value = datetime_str.replace('Z', '+00:00') if datetime_str.endswith('Z') else datetime_str
+    value = _COMPACT_OFFSET.sub(r'\1:\2', value)
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
 def parse_datetime(datetime_str):
     if not datetime_str:
         return None
     try:
-        # Use dateutil.parser para analisar a string de data
-        dt_object = parser.parse(datetime_str)
+        dt_object = _parse_iso(datetime_str) if isinstance(datetime_str, str) else None
+        if dt_object is None:
+            # Outros formatos: dateutil, importado só quando necessário.
+            from dateutil import parser
+            dt_object = parser.parse(datetime_str)
         # Garante que o datetime está no fuso horário UTC
         return dt_object.astimezone(timezone.utc)
     except (ValueError, TypeError):
-        print(f"AVISO: Não foi possível converter a data '{datetime_str}'")
+        logger.warning("Não foi possível converter a data '%s'", datetime_str)
         return None
\ No newline at end of file
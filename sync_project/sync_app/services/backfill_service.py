@@ -0,0 +1,189 @@
+# sync_app/services/backfill_service.py
+import os
+from datetime import datetime, timedelta
+
+from . import freshdesk_service, sync_service
+from ..core import context, log, metrics, network, utils
+from ..storage import backfill_state, file_storage, mapping_archive, outbox
+
+logger = log.get_logger(__name__)
+
+# Importação do histórico (BACKFILL_SINCE): os tickets do Freshdesk criados antes do
+# FIRST_RUN_TIMESTAMP são criados no Jira aos poucos, uma fatia de dias por vez, com o
+# progresso salvo em backfill_state.json. Cada ciclo gasta no máximo
+# BACKFILL_MAX_REQUESTS_PER_RUN requisições, a no máximo BACKFILL_MAX_REQUESTS_PER_MINUTE
+# por host (0 = sem teto) e BACKFILL_RATE_PERCENT% do limite por minuto dos hosts que
+# têm limite configurado, para não atrasar a sincronização normal.
+DEFAULT_SLICE_DAYS = 7
+DEFAULT_MAX_REQUESTS_PER_RUN = 200
+DEFAULT_MAX_REQUESTS_PER_MINUTE = 60
+DEFAULT_RATE_PERCENT = 20
+
+def _parse_day(text):
+    """Converte 'YYYY-MM-DD' em date (None se inválido)."""
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+def _backfill_candidates(tickets, first_run_date, company_id, mapping, config):
+    """
+    Filtra os tickets de uma fatia: da empresa do cliente, criados até o
+    FIRST_RUN_TIMESTAMP e ainda sem par (no mapeamento ou no arquivo morto).
+    Retorna a lista em ordem de criação.
+    """
+    mapped_fd_ids = {str(v['freshdesk_id']) for v in mapping.values()}
+    candidates = []
+    for ticket in tickets:
+        if company_id is not None and ticket.company_id != company_id:
+            continue
+        created_at = utils.parse_datetime(ticket.created_at)
+        if not created_at or created_at > first_run_date or str(ticket.id) in mapped_fd_ids:
+            continue
+        candidates.append((created_at, ticket))
+    if candidates:
+        archived = mapping_archive.find_pairs(config['MAPPING_ARCHIVE_PATH'], [], [t.id for _, t in candidates])
+        archived_fd_ids = {str(entry['freshdesk_id']) for entry in archived.values()}
+        candidates = [item for item in candidates if str(item[1].id) not in archived_fd_ids]
+    return [ticket for _, ticket in sorted(candidates, key=lambda item: item[0])]
+
+def _import_slice(tickets, mapping, mapping_path, config, state):
+    """
+    Cria no Jira os tickets de uma fatia, salvando o mapeamento após cada par criado.
+
+    Returns:
+        bool: True se a fatia foi concluída; False se parou (orçamento esgotado, host
+            indisponível ou lease perdido) e deve ser repetida no próximo ciclo.
+    """
+    for index, ticket in enumerate(tickets):
+        if network.run_budget_exhausted():
+            logger.info("Orçamento do backfill esgotado neste ciclo. %s ticket(s) da fatia ficam para o próximo.",
+                        len(tickets) - index)
+            metrics.inc('sync_work_deferred_total', len(tickets) - index, stage='backfill')
+            return False
+        if sync_service.client_hosts_unavailable(config):
+            logger.warning("Jira ou Freshdesk do cliente indisponível. Interrompendo o backfill.")
+            return False
+        fd_id_str = str(ticket.id)
+        if not sync_service.create_pair_from_freshdesk(fd_id_str, mapping, config, direction='backfill_created_in_jira'):
+            if sync_service.client_hosts_unavailable(config) or not sync_service.holds_client_lease(config):
+                return False
+            # Falha do próprio ticket (ex.: removido): registrada para conferência, sem travar o backfill.
+            failed = state.setdefault('failed', [])
+            if fd_id_str not in failed:
+                failed.append(fd_id_str)
+            continue
+        # Um par criado e não salvo duplicaria o ticket no Jira na retomada.
+        if not sync_service.holds_client_lease(config):
+            return False
+        outbox.commit(config['OUTBOX_PATH'])
+        file_storage.save_mapping_data(mapping_path, mapping)
+        state['imported'] += 1
+    return True
+
+def run_backfill_for_client(config, mapping, mapping_path, deadline=None):
+    """
+    Avança a importação do histórico do cliente, a partir da fatia salva em
+    backfill_state.json, até concluir ou gastar o orçamento de requisições do backfill.
+
+    Uma fatia cujos tickets passam do limite da API de busca é dividida ao meio.
+    O cursor só avança depois que todos os tickets da fatia têm par; uma fatia
+    interrompida é buscada de novo no próximo ciclo (os já criados são ignorados).
+
+    Args:
+        config (dict): A configuração do cliente (com BACKFILL_SINCE).
+        mapping (dict): Os dados de mapeamento atuais.
+        mapping_path (str): O caminho para salvar o arquivo de mapeamento.
+        deadline (float, optional): Instante (time.monotonic) em que o backfill para,
+            como se o orçamento tivesse acabado (ex.: hora do próximo ciclo normal).
+
+    Returns:
+        bool: True se o histórico foi totalmente importado.
+    """
+    since = _parse_day(config.get('BACKFILL_SINCE'))
+    if not since:
+        logger.warning("'BACKFILL_SINCE' inválido: %s (formato esperado: AAAA-MM-DD). Backfill ignorado.",
+                       config.get('BACKFILL_SINCE'))
+        return False
+    first_run_date = utils.parse_datetime(config.get('FIRST_RUN_TIMESTAMP'))
+    if not first_run_date:
+        logger.warning("'FIRST_RUN_TIMESTAMP' ausente ou inválido. Backfill ignorado.")
+        return False
+
+    state_path = config['BACKFILL_STATE_PATH']
+    state = backfill_state.load(state_path)
+    if not state or state.get('since') != since.isoformat():
+        state = backfill_state.new_state(since.isoformat(), first_run_date.date().isoformat())
+    if state['completed']:
+        return True
+
+    until = _parse_day(state['until'])
+    cursor = _parse_day(state['cursor'])
+    slice_days = max(1, config.get('BACKFILL_SLICE_DAYS', DEFAULT_SLICE_DAYS))
+    company_id = freshdesk_service.parse_company_id(config.get('FRESHDESK_COMPANY_ID'))
+    logger.info("Backfill: importando tickets criados de %s a %s (%s já importado(s)).",
+                cursor, until, state['imported'])
+
+    network.start_run_budget(config.get('BACKFILL_MAX_REQUESTS_PER_RUN', DEFAULT_MAX_REQUESTS_PER_RUN), deadline)
+    days = slice_days
+    with network.background_lane(config.get('BACKFILL_RATE_PERCENT', DEFAULT_RATE_PERCENT),
+                                 config.get('BACKFILL_MAX_REQUESTS_PER_MINUTE', DEFAULT_MAX_REQUESTS_PER_MINUTE)):
+        while cursor <= until:
+            if network.run_budget_exhausted() or sync_service.client_hosts_unavailable(config):
+                break
+            last_day = min(cursor + timedelta(days=days - 1), until)
+            result = freshdesk_service.search_freshdesk_tickets_created(cursor.isoformat(), last_day.isoformat(), config)
+            if result is None:
+                logger.error("Falha na busca de tickets criados de %s a %s. O backfill continua no próximo ciclo.",
+                             cursor, last_day)
+                break
+            tickets, total = result
+            if total > len(tickets):
+                if last_day > cursor:
+                    days = max(1, ((last_day - cursor).days + 1) // 2)
+                    logger.debug("Fatia de %s a %s tem %s tickets (acima do limite da busca). Dividindo em %s dia(s).",
+                                 cursor, last_day, total, days)
+                    continue
+                logger.warning("%s tickets criados em %s, acima do limite da busca do Freshdesk; apenas %s serão importados.",
+                               total, cursor, len(tickets))
+
+            candidates = _backfill_candidates(tickets, first_run_date, company_id, mapping, config)
+            if not _import_slice(candidates, mapping, mapping_path, config, state):
+                break
+            cursor = last_day + timedelta(days=1)
+            state['cursor'] = cursor.isoformat()
+            backfill_state.save(state_path, state)
+            days = slice_days
+        else:
+            state['completed'] = True
+            logger.info("Backfill concluído: %s ticket(s) do histórico importado(s).", state['imported'])
+
+    backfill_state.save(state_path, state)
+    if state.get('failed'):
+        logger.warning("Backfill: %s ticket(s) do Freshdesk não puderam ser criados no Jira: %s",
+                       len(state['failed']), ', '.join(state['failed'][-20:]))
+    logger.info("Requisições do backfill neste ciclo: %s (orçamento: %s).", network.run_budget_used(),
+                config.get('BACKFILL_MAX_REQUESTS_PER_RUN', DEFAULT_MAX_REQUESTS_PER_RUN))
+    return state['completed']
+
+def process_client_backfill(client_folder_path, client_name, config, deadline=None):
+    """
+    Executa um passo do backfill de um cliente (se BACKFILL_SINCE estiver definido).
+
+    Args:
+        client_folder_path (str): Pasta do cliente.
+        client_name (str): Nome do cliente.
+        config (dict): Configuração já preparada por sync_service.prepare_client_config.
+        deadline (float, optional): Ver run_backfill_for_client.
+    """
+    if not config.get('BACKFILL_SINCE'):
+        return
+    with context.client_context(client_name), metrics.timed_phase('backfill'):
+        mapping_path = os.path.join(client_folder_path, 'mapping.json')
+        mapping = file_storage.load_mapping_data(mapping_path)
+        try:
+            run_backfill_for_client(config, mapping, mapping_path, deadline)
+        except Exception as e:
+            logger.exception("ERRO INESPERADO durante o backfill de %s: %s", client_name, e)
+        finally:
+            outbox.close(config['OUTBOX_PATH'])
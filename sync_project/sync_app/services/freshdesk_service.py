@@ -1,6 +1,24 @@
 # sync_app/services/freshdesk_service.py
 import os
+from ..core.log import get_logger
 from ..core.network import api_request
+from ..core.records import FreshdeskTicket
+
+logger = get_logger(__name__)
+
+# Quantidade de tickets por página na listagem do Freshdesk (máximo aceito pela API).
+FRESHDESK_PAGE_SIZE = 100
+# Por quanto tempo (segundos) os dados de um agente são reutilizados sem consultar a API.
+# Detalhes de tickets e conversas são sempre revalidados (requisição condicional).
+AGENT_CACHE_MAX_AGE = 6 * 3600
+# A API de busca do Freshdesk devolve 30 tickets por página e no máximo 10 páginas por consulta.
+FRESHDESK_SEARCH_PAGE_SIZE = 30
+FRESHDESK_SEARCH_MAX_PAGES = 10
+
+def get_freshdesk_base_url(config):
+    """Retorna a URL base do domínio Freshdesk do cliente."""
+    # FRESHDESK_BASE_URL permite apontar para outro endereço (ex.: servidor local de benchmark).
+    return config.get('FRESHDESK_BASE_URL') or f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com"
 
 def fetch_freshdesk_ticket_details(ticket_id, config):
     """
@@ -15,8 +33,28 @@ def fetch_freshdesk_ticket_details(ticket_id, config):
     """
     # Nota: a partir de versões mais recentes da API, incluir conversas aqui pode não ser o ideal.
     # A lógica de sincronização já busca as conversas separadamente para maior controle.
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets/{ticket_id}?include=conversations"
-    return api_request('GET', url, config['FRESHDESK_AUTH'])
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets/{ticket_id}?include=conversations"
+    return api_request('GET', url, config['FRESHDESK_AUTH'], cache_max_age=0)
+
+def _list_freshdesk_tickets(params, config):
+    """
+    Percorre todas as páginas da listagem de tickets do Freshdesk, convertendo
+    cada página em registros compactos (FreshdeskTicket). Retorna None se alguma
+    página falhar: uma lista parcial não pode ser tratada como a lista completa.
+    """
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets"
+    tickets = []
+    page = 1
+    while True:
+        page_params = dict(params, per_page=FRESHDESK_PAGE_SIZE, page=page)
+        page_tickets = api_request('GET', url, config['FRESHDESK_AUTH'], params=page_params)
+        if page_tickets is None:
+            return None
+        tickets.extend(FreshdeskTicket.from_api(ticket) for ticket in page_tickets)
+        if len(page_tickets) < FRESHDESK_PAGE_SIZE:
+            break
+        page += 1
+    return tickets
 
 def fetch_updated_freshdesk_tickets(since_date_str, config):
     """
@@ -28,10 +66,9 @@ def fetch_updated_freshdesk_tickets(since_date_str, config):
         config (dict): O dicionário de configuração do cliente.
 
     Returns:
-        list: Uma lista de tickets do Freshdesk. Retorna lista vazia em caso de falha.
+        list or None: Uma lista de FreshdeskTicket, ou None em caso de falha.
     """
     updated_since = f"{since_date_str}T00:00:00Z"
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets"
     
     params = {
         'updated_since': updated_since,
@@ -40,15 +77,101 @@ def fetch_updated_freshdesk_tickets(since_date_str, config):
     }
     
     # Se um ID de empresa for fornecido na configuração, adiciona ao filtro
-    company_id = config.get('FRESHDESK_COMPANY_ID')
-    if company_id:
-        try:
-            params['company_id'] = int(company_id)
-            print(f"Filtrando tickets do Freshdesk para a empresa ID: {company_id}")
-        except (ValueError, TypeError):
-            print(f"AVISO: O valor de FRESHDESK_COMPANY_ID ('{company_id}') não é um número válido. O filtro será ignorado.")
+    company_id = parse_company_id(config.get('FRESHDESK_COMPANY_ID'))
+    if company_id is not None:
+        params['company_id'] = company_id
+        logger.info("Filtrando tickets do Freshdesk para a empresa ID: %s", company_id)
+
+    return _list_freshdesk_tickets(params, config)
+
+def fetch_updated_freshdesk_tickets_for_companies(since_date_str, company_ids, config):
+    """
+    Busca os tickets atualizados de um domínio do Freshdesk compartilhado por vários
+    clientes e os separa por empresa.
 
-    return api_request('GET', url, config['FRESHDESK_AUTH'], params=params) or []
+    Se algum cliente não filtra por empresa, uma única listagem do domínio atende a
+    todos (e é filtrada aqui). Caso contrário, cada empresa distinta é listada uma vez
+    com o filtro company_id, para não paginar os tickets de empresas que não são clientes.
+
+    Args:
+        since_date_str (str): Data no formato 'YYYY-MM-DD'.
+        company_ids (list): IDs de empresa dos clientes (None = todos os tickets).
+        config (dict): Configuração de qualquer cliente do grupo (domínio e chave).
+
+    Returns:
+        dict or None: ID da empresa (ou None) -> lista de FreshdeskTicket, ou None se
+        alguma listagem falhar.
+    """
+    params = {
+        'updated_since': f"{since_date_str}T00:00:00Z",
+        'order_by': 'updated_at',
+        'order_type': 'desc'
+    }
+    tickets_by_company = {}
+    if None in company_ids:
+        tickets = _list_freshdesk_tickets(params, config)
+        if tickets is None:
+            return None
+        for company_id in set(company_ids):
+            if company_id is None:
+                tickets_by_company[None] = tickets
+            else:
+                tickets_by_company[company_id] = [t for t in tickets if t.company_id == company_id]
+        return tickets_by_company
+
+    for company_id in set(company_ids):
+        tickets = _list_freshdesk_tickets(dict(params, company_id=company_id), config)
+        if tickets is None:
+            return None
+        tickets_by_company[company_id] = tickets
+    return tickets_by_company
+
+def search_freshdesk_tickets_created(first_day, last_day, config):
+    """
+    Busca (API de busca) os tickets criados entre duas datas, inclusive.
+
+    A API só alcança FRESHDESK_SEARCH_PAGE_SIZE * FRESHDESK_SEARCH_MAX_PAGES tickets por
+    consulta; quando 'total' passa da quantidade retornada, quem chama deve dividir o intervalo.
+    A busca não filtra por empresa: o filtro de FRESHDESK_COMPANY_ID fica com quem chama.
+
+    Args:
+        first_day (str): Primeiro dia, no formato 'YYYY-MM-DD'.
+        last_day (str): Último dia, no formato 'YYYY-MM-DD'.
+        config (dict): O dicionário de configuração do cliente.
+
+    Returns:
+        tuple or None: (lista de FreshdeskTicket, total) ou None em caso de falha.
+    """
+    url = f"{get_freshdesk_base_url(config)}/api/v2/search/tickets"
+    # Na busca do Freshdesk, '>' e '<' incluem a própria data.
+    query = f"\"created_at:>'{first_day}' AND created_at:<'{last_day}'\""
+    tickets = []
+    total = 0
+    for page in range(1, FRESHDESK_SEARCH_MAX_PAGES + 1):
+        result = api_request('GET', url, config['FRESHDESK_AUTH'], params={'query': query, 'page': page})
+        if result is None:
+            return None
+        total = result.get('total', 0)
+        page_tickets = result.get('results') or []
+        tickets.extend(FreshdeskTicket.from_api(ticket) for ticket in page_tickets)
+        if len(page_tickets) < FRESHDESK_SEARCH_PAGE_SIZE or len(tickets) >= total:
+            break
+    return tickets, total
+
+def parse_company_id(company_id):
+    """
+    Converte o FRESHDESK_COMPANY_ID da configuração em inteiro.
+
+    Returns:
+        int or None: O ID da empresa, ou None se ausente ou inválido.
+    """
+    if company_id in (None, '', 'None', 'null'):
+        return None
+    try:
+        return int(company_id)
+    except (ValueError, TypeError):
+        logger.warning("O valor de FRESHDESK_COMPANY_ID ('%s') não é um número válido. O filtro será ignorado.", company_id)
+        return None
 
 def fetch_freshdesk_conversations(ticket_id, config):
     """
@@ -61,8 +184,8 @@ def fetch_freshdesk_conversations(ticket_id, config):
     Returns:
         list: Lista de conversas do ticket. Retorna lista vazia em caso de falha.
     """
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets/{ticket_id}/conversations"
-    return api_request('GET', url, config['FRESHDESK_AUTH']) or []
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets/{ticket_id}/conversations"
+    return api_request('GET', url, config['FRESHDESK_AUTH'], cache_max_age=0) or []
 
 def add_freshdesk_note(ticket_id, note_text, config):
     """
@@ -76,9 +199,9 @@ def add_freshdesk_note(ticket_id, note_text, config):
     Returns:
         dict or None: O objeto da nota criada ou None em caso de falha.
     """
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets/{ticket_id}/notes"
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets/{ticket_id}/notes"
     payload = {'body': note_text, 'private': True}
-    print(f"Adicionando nota privada ao Freshdesk {ticket_id}...")
+    logger.debug("Adicionando nota privada ao Freshdesk %s...", ticket_id)
     return api_request('POST', url, config['FRESHDESK_AUTH'], json_data=payload)
 
 def add_freshdesk_attachment(ticket_id, file_path, config):
@@ -93,7 +216,7 @@ def add_freshdesk_attachment(ticket_id, file_path, config):
     Returns:
         bool: True se o anexo foi enviado com sucesso, False caso contrário.
     """
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets/{ticket_id}/notes"
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets/{ticket_id}/notes"
     
     # Cria um corpo de nota para contextualizar o anexo
     body_text = f"[Anexo Sincronizado do Jira] {os.path.basename(file_path)}"
@@ -106,14 +229,14 @@ def add_freshdesk_attachment(ticket_id, file_path, config):
             success = api_request('POST', url, config['FRESHDESK_AUTH'], data=data, files=files)
         
         if success:
-            print(f"Anexo '{os.path.basename(file_path)}' enviado para o Freshdesk {ticket_id} com sucesso.")
+            logger.debug("Anexo '%s' enviado para o Freshdesk %s com sucesso.", os.path.basename(file_path), ticket_id)
             return True
         else:
-            print(f"Falha ao enviar anexo para o Freshdesk {ticket_id}.")
+            logger.error("Falha ao enviar anexo para o Freshdesk %s.", ticket_id)
             return False
             
     except Exception as e:
-        print(f"ERRO INESPERADO ao tentar enviar anexo para o Freshdesk {ticket_id}: {e}")
+        logger.error("ERRO INESPERADO ao tentar enviar anexo para o Freshdesk %s: %s", ticket_id, e)
         return False
     
 def update_freshdesk_ticket_status(ticket_id, status_code, config):
@@ -128,12 +251,12 @@ def update_freshdesk_ticket_status(ticket_id, status_code, config):
     Returns:
         dict or None: A resposta da API em caso de sucesso, None em caso de erro.
     """
-    url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/tickets/{ticket_id}"
+    url = f"{get_freshdesk_base_url(config)}/api/v2/tickets/{ticket_id}"
     
     # A API do Freshdesk espera um payload com a chave 'status' e o valor numérico.
     payload = {'status': status_code}
     
-    print(f"Atualizando status do ticket Freshdesk {ticket_id} para o código {status_code}...")
+    logger.debug("Atualizando status do ticket Freshdesk %s para o código %s...", ticket_id, status_code)
     
     # A atualização de ticket usa o método PATCH (alterado de PUT).
     return api_request('PATCH', url, config['FRESHDESK_AUTH'], json_data=payload)
@@ -151,7 +274,7 @@ def fetch_freshdesk_agent_details(user_id, config):
  Returns:
  dict or None: O objeto completo do agente ou None em caso de falha.
  """
- url = f"https://{config['FRESHDESK_DOMAIN']}.freshdesk.com/api/v2/agents/{user_id}"
- return api_request('GET', url, config['FRESHDESK_AUTH'])
+ url = f"{get_freshdesk_base_url(config)}/api/v2/agents/{user_id}"
+ return api_request('GET', url, config['FRESHDESK_AUTH'], cache_max_age=AGENT_CACHE_MAX_AGE)
  
  
\ No newline at end of file
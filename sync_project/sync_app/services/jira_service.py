@@ -1,8 +1,16 @@
 # sync_app/services/jira_service.py
 import os
-import requests
 from ..core.network import api_request
+from ..core.records import JiraIssue
 from ..core.utils import html_to_text
+from ..core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Quantidade de issues por página nas buscas JQL (máximo aceito pelo Jira Cloud).
+JIRA_SEARCH_PAGE_SIZE = 100
+# Campos pedidos na busca: só os que o ciclo usa (ver core.records.JiraIssue).
+JIRA_SEARCH_FIELDS = 'status,comment,updated,priority,attachment'
 
 def create_jira_ticket(freshdesk_ticket, config):
     """
@@ -32,22 +40,68 @@ def create_jira_ticket(freshdesk_ticket, config):
             "priority": {"name": jira_priority_name}
         }
     }
-    print(f"Criando ticket no Jira para o Freshdesk {freshdesk_ticket['id']}...")
+    logger.debug("Criando ticket no Jira para o Freshdesk %s...", freshdesk_ticket['id'])
     return api_request('POST', url, config['JIRA_AUTH'], json_data=payload)
 
+def _search_jira_issues(jql_query, config):
+    """
+    Executa uma busca JQL paginada e retorna todas as issues encontradas, já
+    convertidas em registros compactos (JiraIssue) página a página. Retorna None se
+    alguma página falhar: uma lista parcial não pode ser tratada como a lista completa.
+
+    """
+    url = f"{config['JIRA_URL']}/rest/api/3/search"
+    issues = []
+    start_at = 0
+    while True:
+        params = {
+            'jql': jql_query,
+            'fields': JIRA_SEARCH_FIELDS,
+            'startAt': start_at,
+            'maxResults': JIRA_SEARCH_PAGE_SIZE
+        }
+        response_data = api_request('GET', url, config['JIRA_AUTH'], params=params)
+        if response_data is None:
+            return None
+        page = response_data.get('issues', [])
+        issues.extend(JiraIssue.from_api(issue) for issue in page)
+        start_at += len(page)
+        if not page or start_at >= response_data.get('total', 0):
+            break
+    return issues
+
 def fetch_updated_jira_tickets(since_date_str, config):
     """
     Busca tickets do Jira atualizados desde uma data específica.
 
     """
     jql_query = f"project = '{config['JIRA_PROJECT_KEY']}' AND updated >= '{since_date_str}' ORDER BY updated DESC"
-    url = f"{config['JIRA_URL']}/rest/api/3/search"
-    params = {
-        'jql': jql_query,
-        'fields': 'summary,description,status,comment,updated,created,priority,attachment'
-    }
-    response_data = api_request('GET', url, config['JIRA_AUTH'], params=params)
-    return response_data.get('issues', []) if response_data else []
+    return _search_jira_issues(jql_query, config)
+
+def fetch_updated_jira_tickets_for_projects(since_date_str, project_keys, config):
+    """
+    Busca, em uma única consulta paginada, os tickets atualizados de vários projetos
+    do mesmo site do Jira e os separa por projeto.
+
+    Args:
+        since_date_str (str): Data no formato 'YYYY-MM-DD'.
+        project_keys (list): Chaves dos projetos (ex.: ['JAR', 'SAP']).
+        config (dict): Configuração de qualquer cliente do grupo (URL e credenciais).
+
+    Returns:
+        dict or None: Chave do projeto (maiúscula) -> lista de JiraIssue, ou None se a
+        busca falhar.
+    """
+    keys = sorted({key.upper() for key in project_keys})
+    projects = ", ".join(f"'{key}'" for key in keys)
+    jql_query = f"project in ({projects}) AND updated >= '{since_date_str}' ORDER BY updated DESC"
+    issues = _search_jira_issues(jql_query, config)
+    if issues is None:
+        return None
+    issues_by_project = {key: [] for key in keys}
+    for issue in issues:
+        issues_by_project.setdefault(issue.project_key, []).append(issue)
+    return issues_by_project
 
 def add_jira_comment(issue_key, comment_text, config):
     """
@@ -63,13 +117,13 @@ def add_jira_comment(issue_key, comment_text, config):
             "content": [{"type": "paragraph", "content": [{"type": "text", "text": comment_text}]}]
         }
     }
-    print(f"Adicionando comentário ao Jira {issue_key}...")
+    logger.debug("Adicionando comentário ao Jira %s...", issue_key)
     return api_request('POST', url, config['JIRA_AUTH'], json_data=payload)
 
 def add_jira_attachment(issue_key, file_path, config):
     """
     Envia um anexo para um ticket do Jira.
-    Esta função usa 'requests' diretamente pois a API de anexo do Jira tem um comportamento específico.
+    O endpoint de anexos do Jira exige o cabeçalho 'X-Atlassian-Token: no-check'.
 
     """
     url = f"{config['JIRA_URL']}/rest/api/3/issue/{issue_key}/attachments"
@@ -78,17 +132,14 @@ def add_jira_attachment(issue_key, file_path, config):
     try:
         with open(file_path, 'rb') as f:
             files = {'file': (os.path.basename(file_path), f, 'application/octet-stream')}
-            response = requests.post(url, headers=headers, files=files, auth=config['JIRA_AUTH'])
-            response.raise_for_status()
-            
-            attachment_info = response.json()
-            if attachment_info and isinstance(attachment_info, list):
-                jira_attachment_id = attachment_info[0]['id']
-                print(f"Anexo '{os.path.basename(file_path)}' enviado para o Jira {issue_key} com sucesso. ID: {jira_attachment_id}")
-                return jira_attachment_id
-            else:
-                print(f"ERRO: A API do Jira não retornou a informação esperada para o anexo em {issue_key}.")
-                return None
-    except requests.exceptions.RequestException as e:
-        print(f"ERRO: Falha ao enviar anexo para o Jira {issue_key}. Detalhes: {e.response.text if e.response else e}")
-        return None
\ No newline at end of file
+            attachment_info = api_request('POST', url, config['JIRA_AUTH'], files=files, extra_headers=headers)
+    except OSError as e:
+        logger.error("Falha ao ler o anexo %s para o Jira %s. Detalhes: %s", file_path, issue_key, e)
+        return None
+
+    if attachment_info and isinstance(attachment_info, list):
+        jira_attachment_id = attachment_info[0]['id']
+        logger.debug("Anexo '%s' enviado para o Jira %s com sucesso. ID: %s", os.path.basename(file_path), issue_key, jira_attachment_id)
+        return jira_attachment_id
+    logger.error("A API do Jira não retornou a informação esperada para o anexo em %s.", issue_key)
+    return None
\ No newline at end of file
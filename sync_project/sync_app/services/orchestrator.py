@@ -0,0 +1,201 @@
+# sync_app/services/orchestrator.py
+import os
+import time
+
+from . import backfill_service, freshdesk_service, jira_service, sync_service
+from ..core import http_cache, log, network
+from ..storage import lease_store, run_journal
+
+logger = log.get_logger(__name__)
+
+def discover_clients(clients_root):
+    """
+    Lista as pastas de clientes dentro de clients_root.
+
+    Returns:
+        list: Tuplas (nome_do_cliente, caminho_da_pasta), em ordem alfabética.
+    """
+    if not os.path.isdir(clients_root):
+        logger.warning("Pasta de clientes '%s' não encontrada.", clients_root)
+        return []
+    return [
+        (name, os.path.join(clients_root, name))
+        for name in sorted(os.listdir(clients_root))
+        if os.path.isdir(os.path.join(clients_root, name))
+    ]
+
+def _jira_group_key(config):
+    """Clientes com o mesmo site, credenciais e janela de busca podem dividir uma busca JQL."""
+    return (
+        network.get_host(config['JIRA_URL']),
+        config['JIRA_USER_EMAIL'],
+        config['JIRA_API_TOKEN'],
+        sync_service.compute_since_date(config),
+    )
+
+def _freshdesk_group_key(config):
+    """Clientes com o mesmo domínio, chave e janela de busca podem dividir uma listagem."""
+    return (
+        config['FRESHDESK_DOMAIN'].lower(),
+        config['FRESHDESK_API_KEY'],
+        sync_service.compute_since_date(config),
+    )
+
+def group_clients(clients, key_func):
+    """
+    Agrupa os clientes preparados por uma chave.
+
+    Args:
+        clients (list): Tuplas (nome, pasta, config).
+        key_func (callable): Função config -> chave do grupo.
+
+    Returns:
+        dict: Chave -> lista de tuplas (nome, pasta, config).
+    """
+    groups = {}
+    for client in clients:
+        groups.setdefault(key_func(client[2]), []).append(client)
+    return groups
+
+def _configure_shared_rate_limits(clients):
+    """Registra o orçamento de requisições de cada host (o menor limite configurado vence)."""
+    for _, _, config in clients:
+        network.configure_host_rate_limit(config['JIRA_URL'], config.get('JIRA_MAX_REQUESTS_PER_MINUTE'))
+        freshdesk_url = freshdesk_service.get_freshdesk_base_url(config)
+        network.configure_host_rate_limit(freshdesk_url, config.get('FRESHDESK_MAX_REQUESTS_PER_MINUTE'))
+
+def prefetch_shared_tickets(clients):
+    """
+    Faz as buscas agrupadas para clientes que compartilham site do Jira ou domínio do Freshdesk.
+    Grupos de um único cliente não são buscados aqui; o próprio ciclo do cliente faz a busca.
+    No Freshdesk, só vale agrupar quando algum cliente lista o domínio inteiro (sem
+    FRESHDESK_COMPANY_ID) ou quando clientes repetem a mesma empresa.
+
+    Se uma busca agrupada falhar, os clientes do grupo ficam fora do resultado e cada um
+    tenta a própria busca no seu ciclo (que aborta se ela também falhar).
+
+    Returns:
+        tuple: (jira_por_cliente, freshdesk_por_cliente), dicionários nome -> lista de tickets.
+    """
+    jira_by_client = {}
+    for (host, _, _, since_date), members in group_clients(clients, _jira_group_key).items():
+        if len(members) < 2:
+            continue
+        project_keys = [config['JIRA_PROJECT_KEY'] for _, _, config in members]
+        logger.info("Busca agrupada no Jira %s para %s clientes (projetos: %s).", host, len(members), ', '.join(project_keys))
+        issues_by_project = jira_service.fetch_updated_jira_tickets_for_projects(since_date, project_keys, members[0][2])
+        if issues_by_project is None:
+            logger.warning("Falha na busca agrupada no Jira %s; cada cliente fará a própria busca.", host)
+            continue
+        for name, _, config in members:
+            jira_by_client[name] = issues_by_project.get(config['JIRA_PROJECT_KEY'].upper(), [])
+
+    freshdesk_by_client = {}
+    for (domain, _, since_date), members in group_clients(clients, _freshdesk_group_key).items():
+        if len(members) < 2:
+            continue
+        company_ids = [freshdesk_service.parse_company_id(config.get('FRESHDESK_COMPANY_ID')) for _, _, config in members]
+        if None not in company_ids and len(set(company_ids)) == len(company_ids):
+            continue
+        logger.info("Busca agrupada no Freshdesk %s para %s clientes.", domain, len(members))
+        tickets_by_company = freshdesk_service.fetch_updated_freshdesk_tickets_for_companies(since_date, company_ids, members[0][2])
+        if tickets_by_company is None:
+            logger.warning("Falha na busca agrupada no Freshdesk %s; cada cliente fará a própria busca.", domain)
+            continue
+        for (name, _, _), company_id in zip(members, company_ids):
+            freshdesk_by_client[name] = tickets_by_company.get(company_id, [])
+
+    return jira_by_client, freshdesk_by_client
+
+def _backfill_deadline(started_at):
+    """
+    No modo contínuo (SYNC_INTERVAL_SECONDS > 0), o backfill para na hora do próximo
+    ciclo, para não atrasar a sincronização normal. Execução única: sem prazo.
+    """
+    interval = int(os.getenv('SYNC_INTERVAL_SECONDS', '0'))
+    return started_at + interval if interval > 0 else None
+
+def _sharding_enabled():
+    """Modo de sharding (vários contêineres dividindo os clientes), ligado por SYNC_SHARDING=true."""
+    return os.getenv('SYNC_SHARDING', 'false').lower() == 'true'
+
+def start_sharding(clients_root):
+    """
+    Com SYNC_SHARDING=true, registra este nó no banco de leases em clients_root e
+    inicia o heartbeat. Deve ser chamado uma vez por processo: o nó continua vivo
+    (e dono dos seus clientes) entre um ciclo e outro.
+
+    Returns:
+        dict | None: Estado do nó (ver lease_store.start_node), ou None sem sharding.
+    """
+    if not _sharding_enabled():
+        return None
+    db_path = os.path.join(clients_root, lease_store.LEASE_DB_FILENAME)
+    node_id = os.getenv('SYNC_NODE_ID') or lease_store.default_node_id()
+    ttl = int(os.getenv('SYNC_LEASE_TTL_SECONDS', lease_store.DEFAULT_LEASE_TTL))
+    return lease_store.start_node(db_path, node_id, ttl)
+
+def stop_sharding(node):
+    """Libera os leases e remove o nó no desligamento do processo."""
+    if node is not None:
+        lease_store.stop_node(node)
+
+def run_all_clients(clients_root, node=None):
+    """
+    Sincroniza todos os clientes de clients_root em um único processo.
+    Clientes do mesmo host compartilham o pool de conexões e o orçamento de requisições
+    (via core.network) e, quando compatíveis, uma única busca paginada.
+
+    Clientes com BACKFILL_SINCE avançam um pouco a importação do histórico ao final
+    de cada execução (ver backfill_service), até a hora do próximo ciclo.
+
+    Com sharding (node de start_sharding), o nó processa apenas os clientes cujo lease
+    conseguiu obter no banco compartilhado em clients_root, de modo que dois nós nunca
+    sincronizam (nem gravam o mapping.json de) o mesmo cliente. Os leases continuam
+    com o nó ao fim do ciclo; só stop_sharding os libera.
+    """
+    started_at = time.monotonic()
+    discovered = discover_clients(clients_root)
+    if http_cache.enabled() and os.path.isdir(clients_root):
+        http_cache.configure(os.path.join(clients_root, http_cache.CACHE_DB_FILENAME))
+
+    leases = None
+    if node is not None:
+        leases = lease_store.claim_for_node(node, [name for name, _ in discovered])
+        discovered = [(name, folder) for name, folder in discovered if name in leases]
+        logger.info("Sharding ativo: nó %s ficou com %s cliente(s): %s", node['node_id'], len(discovered), ', '.join(sorted(leases)) or '-')
+
+    clients = []
+    for name, folder in discovered:
+        config = sync_service.prepare_client_config(folder, name)
+        if config:
+            if leases is not None:
+                config['LEASE'] = leases[name]
+            clients.append((name, folder, config))
+
+    _configure_shared_rate_limits(clients)
+    # Clientes com ciclo interrompido a retomar já têm as listas guardadas em disco.
+    jira_by_client, freshdesk_by_client = prefetch_shared_tickets([
+        client for client in clients if not run_journal.load_resumable(client[2]['RUN_JOURNAL_PATH'])
+    ])
+
+    for name, folder, config in clients:
+        if sync_service.client_hosts_unavailable(config):
+            logger.warning("Cliente %s pulado: Jira ou Freshdesk indisponível (circuito aberto).", name.upper())
+            continue
+        sync_service.process_client(
+            folder, name, config=config,
+            jira_tickets=jira_by_client.get(name),
+            freshdesk_tickets=freshdesk_by_client.get(name),
+        )
+
+    # Importação do histórico (BACKFILL_SINCE) só depois do ciclo normal de todos os
+    # clientes, com orçamento e ritmo próprios, e só até a hora do próximo ciclo.
+    deadline = _backfill_deadline(started_at)
+    for name, folder, config in clients:
+        if not config.get('BACKFILL_SINCE') or sync_service.client_hosts_unavailable(config):
+            continue
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.info("Hora do próximo ciclo: o backfill fica para depois.")
+            break
+        backfill_service.process_client_backfill(folder, name, config, deadline)
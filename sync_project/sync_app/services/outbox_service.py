@@ -0,0 +1,314 @@
+# sync_app/services/outbox_service.py
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import freshdesk_service, jira_service
+from ..core import context, log, metrics, network
+from ..storage import outbox
+
+logger = log.get_logger(__name__)
+
+# Número padrão de tickets de destino processados em paralelo pelo drenador, por host
+# de destino. É só um teto: quantas requisições de fato seguem ao mesmo tempo para cada host é decidido
+# pelo controle adaptativo de concorrência de core.network.
+DEFAULT_OUTBOX_WORKERS = 16
+# Transferências de anexos simultâneas do cliente, em um pool à parte (ATTACHMENT_MAX_WORKERS):
+# arquivos grandes nunca ocupam os workers de comentários e status.
+DEFAULT_ATTACHMENT_WORKERS = 4
+# Tamanho máximo (MB) de anexo copiado entre os sistemas (ATTACHMENT_MAX_MB; 0 = sem limite).
+DEFAULT_ATTACHMENT_MAX_MB = 100
+# Tentativas antes de um item ficar como 'failed'.
+DEFAULT_OUTBOX_MAX_ATTEMPTS = 5
+# Espera base (segundos) entre tentativas; dobra a cada falha.
+OUTBOX_RETRY_BASE_SECONDS = 30
+# Ordem de execução por tipo de escrita: status antes de comentários, anexos por último.
+KIND_RANKS = {
+    'freshdesk_status': 0,
+    'freshdesk_note': 1,
+    'jira_comment': 1,
+    'freshdesk_attachment': 2,
+    'jira_attachment': 2,
+}
+# Prioridade do Freshdesk assumida para tickets sem prioridade registrada no mapeamento.
+DEFAULT_TARGET_PRIORITY = 2
+# Com BATCH_COMMENTS, os comentários/notas pendentes de um ticket viram uma única escrita,
+# dividida ao passar de COMMENT_BATCH_MAX_CHARS (o corpo de comentário do Jira aceita até 32767).
+DEFAULT_COMMENT_BATCH_MAX_CHARS = 30000
+# Separador entre os itens agrupados, por tipo (cada item já traz o autor e a origem).
+BATCH_SEPARATORS = {
+    'freshdesk_note': '<br><br>',
+    'jira_comment': '\n\n----\n\n',
+}
+
+def _extensions(value):
+    """Converte uma lista de extensões separadas por vírgula ('pdf, .exe') em um conjunto ({'pdf', 'exe'})."""
+    return {ext.strip().lower().lstrip('.') for ext in (value or '').split(',') if ext.strip()}
+
+def attachment_max_bytes(config):
+    """Tamanho máximo de anexo do cliente, em bytes (None = sem limite)."""
+    max_mb = config.get('ATTACHMENT_MAX_MB', DEFAULT_ATTACHMENT_MAX_MB)
+    return max_mb * 1024 * 1024 if max_mb else None
+
+def attachment_policy_violation(filename, size, config):
+    """
+    Confere um anexo, pelos metadados da API (antes de baixar qualquer byte), contra
+    os limites do cliente: ATTACHMENT_MAX_MB, ATTACHMENT_ALLOWED_EXTENSIONS (vazia =
+    todas) e ATTACHMENT_BLOCKED_EXTENSIONS.
+
+    Args:
+        filename (str): Nome do arquivo.
+        size (int or None): Tamanho informado pela API, em bytes.
+        config (dict): A configuração do cliente.
+
+    Returns:
+        str or None: O motivo da recusa, ou None se o anexo pode ser copiado.
+    """
+    max_bytes = attachment_max_bytes(config)
+    if max_bytes and size and size > max_bytes:
+        return f"{size} bytes, acima do limite de {max_bytes // (1024 * 1024)} MB"
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    allowed = _extensions(config.get('ATTACHMENT_ALLOWED_EXTENSIONS'))
+    if allowed and extension not in allowed:
+        return f"tipo '.{extension}' fora dos tipos permitidos"
+    if extension and extension in _extensions(config.get('ATTACHMENT_BLOCKED_EXTENSIONS')):
+        return f"tipo '.{extension}' bloqueado"
+    return None
+
+def _transfer_attachment(payload, upload, auth, temp_dir, config):
+    """
+    Baixa o anexo da origem e o envia ao destino com a função upload(file_path).
+    Cada anexo usa uma subpasta própria (pelo attachment_ref), onde um download
+    interrompido fica guardado para ser retomado na próxima tentativa.
+
+    Raises:
+        network.AttachmentRejected: Se o anexo passa de ATTACHMENT_MAX_MB.
+    """
+    attachment_dir = os.path.join(temp_dir, payload['attachment_ref'])
+    os.makedirs(attachment_dir, exist_ok=True)
+    file_path = os.path.join(attachment_dir, payload['filename'])
+    if not network.download_attachment(payload['source_url'], file_path, auth=auth,
+                                       max_bytes=attachment_max_bytes(config)):
+        return None
+    try:
+        result = upload(file_path)
+        if result:
+            metrics.inc('sync_bytes_transferred_total', os.path.getsize(file_path),
+                        host=network.get_host(payload['source_url']), direction='attachment_upload')
+        return result
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        if not os.listdir(attachment_dir):
+            os.rmdir(attachment_dir)
+
+def _execute_item(item, config, temp_dir):
+    """
+    Executa a escrita de um item da fila.
+
+    Returns:
+        O resultado da API (truthy) em caso de sucesso, ou None/False em caso de falha.
+    """
+    kind, target, payload = item['kind'], item['target'], item['payload']
+    if kind == 'freshdesk_note':
+        return freshdesk_service.add_freshdesk_note(target, payload['body'], config)
+    if kind == 'freshdesk_status':
+        return freshdesk_service.update_freshdesk_ticket_status(target, payload['status'], config)
+    if kind == 'jira_comment':
+        return jira_service.add_jira_comment(target, payload['body'], config)
+    if kind == 'freshdesk_attachment':
+        return _transfer_attachment(
+            payload, lambda path: freshdesk_service.add_freshdesk_attachment(target, path, config),
+            config['JIRA_AUTH'], temp_dir, config
+        )
+    if kind == 'jira_attachment':
+        return _transfer_attachment(
+            payload, lambda path: jira_service.add_jira_attachment(target, path, config),
+            None, temp_dir, config
+        )
+    raise ValueError(f"Tipo de item desconhecido na fila de saída: {kind}")
+
+def _target_url(item, config):
+    """URL base do sistema de destino do item (usada para consultar o circuit breaker)."""
+    if item['kind'].startswith('freshdesk'):
+        return freshdesk_service.get_freshdesk_base_url(config)
+    return config['JIRA_URL']
+
+def _batch_items(items, config):
+    """
+    Agrupa os itens de um ticket em escritas: com BATCH_COMMENTS, comentários/notas
+    consecutivos do mesmo tipo formam uma escrita só, até COMMENT_BATCH_MAX_CHARS;
+    os demais itens seguem um por escrita. A ordem dos itens é mantida.
+
+    Returns:
+        list: Listas de itens, uma por escrita.
+    """
+    if not config.get('BATCH_COMMENTS', False):
+        return [[item] for item in items]
+    max_chars = config.get('COMMENT_BATCH_MAX_CHARS', DEFAULT_COMMENT_BATCH_MAX_CHARS)
+    batches = []
+    size = 0
+    for item in items:
+        separator = BATCH_SEPARATORS.get(item['kind'])
+        last = batches[-1] if batches else None
+        if (separator is not None and last and last[0]['kind'] == item['kind']
+                and size + len(separator) + len(item['payload']['body']) <= max_chars):
+            last.append(item)
+            size += len(separator) + len(item['payload']['body'])
+        else:
+            batches.append([item])
+            size = len(item['payload']['body']) if separator is not None else 0
+    return batches
+
+def _merged_item(batch):
+    """Item equivalente a um grupo de comentários/notas: os corpos unidos, em ordem."""
+    if len(batch) == 1:
+        return batch[0]
+    first = batch[0]
+    body = BATCH_SEPARATORS[first['kind']].join(item['payload']['body'] for item in batch)
+    return {'kind': first['kind'], 'target': first['target'], 'payload': {'body': body}}
+
+def _execute_target_items(items, config, temp_dir):
+    """
+    Executa, em ordem, os itens de um mesmo ticket de destino (preserva a ordem dos comentários).
+    Na primeira falha, ou quando o orçamento de requisições do ciclo acaba, os itens
+    seguintes do ticket ficam pendentes para o próximo ciclo; um anexo recusado pelo
+    limite de tamanho não impede os seguintes. Itens agrupados em uma
+    escrita (BATCH_COMMENTS) recebem, cada um, o resultado dela.
+    """
+    results = []
+    for batch in _batch_items(items, config):
+        if network.run_budget_exhausted():
+            break
+        try:
+            result = _execute_item(_merged_item(batch), config, temp_dir)
+            error = None if result else "A API não confirmou a escrita."
+        except Exception as e:
+            result, error = None, e
+        if len(batch) > 1 and error is None:
+            metrics.inc('sync_outbox_items_batched_total', len(batch), kind=batch[0]['kind'])
+        results.extend((item, result, error) for item in batch)
+        if error is not None and not isinstance(error, network.AttachmentRejected):
+            break
+    return results
+
+def _apply_result_to_mapping(item, result, mapping):
+    """Registra no mapeamento os anexos que o drenador conseguiu transferir."""
+    payload = item['payload']
+    mapping_entry = mapping.get(payload.get('jira_key'))
+    if mapping_entry is None:
+        return
+    synced = mapping_entry.setdefault('synced_attachments', [])
+    if item['kind'] == 'freshdesk_attachment':
+        synced.append(payload['attachment_ref'])
+    elif item['kind'] == 'jira_attachment':
+        synced.append(payload['attachment_ref'])
+        synced.append(f"jira-{result}")
+        logger.debug("Anexo %s mapeado para jira-%s.", payload['attachment_ref'], result)
+
+def _target_priorities(mapping):
+    """Prioridade (do Freshdesk) de cada ticket de destino, pelo ID do Freshdesk ou pela chave do Jira."""
+    priorities = {}
+    for jira_key, entry in mapping.items():
+        priority = entry.get('priority') or DEFAULT_TARGET_PRIORITY
+        priorities[jira_key] = priority
+        priorities[str(entry['freshdesk_id'])] = priority
+    return priorities
+
+def drain_outbox(outbox_path, config, mapping, temp_dir):
+    """
+    Executa as escritas pendentes da fila de saída do cliente.
+
+    Tickets de destino diferentes são processados em paralelo; os itens de um mesmo
+    ticket, em ordem. Falhas voltam para a fila com backoff exponencial e os itens
+    concluídos ficam registrados, de modo que nenhuma escrita é repetida.
+
+    Com BATCH_COMMENTS, os comentários/notas pendentes de cada ticket são enviados
+    juntos, em uma escrita (ou poucas, respeitando COMMENT_BATCH_MAX_CHARS).
+
+    Os grupos começam por tipo (status, comentários, anexos) e, no mesmo tipo, pela
+    prioridade do ticket. Se o orçamento de requisições do ciclo acabar, o que não
+    foi iniciado continua pendente, sem gastar tentativas.
+
+    Args:
+        outbox_path (str): Caminho do arquivo da fila.
+        config (dict): A configuração do cliente.
+        mapping (dict): O mapeamento em memória (recebe os anexos transferidos).
+        temp_dir (str): Diretório para os anexos temporários.
+
+    Returns:
+        tuple: (itens_concluidos, itens_com_falha).
+    """
+    items = outbox.fetch_due_items(outbox_path)
+    if not items:
+        return 0, 0
+    logger.info("--- Executando %s escrita(s) pendente(s) da fila de saída ---", len(items))
+
+    by_target = {}
+    for item in items:
+        # Itens de hosts com circuito aberto ficam na fila, sem gastar tentativas.
+        if network.is_circuit_open(_target_url(item, config)):
+            continue
+        # Anexos de um ticket formam um grupo à parte, para não atrasar os comentários dele.
+        lane = 'attachment' if item['kind'].endswith('_attachment') else 'write'
+        by_target.setdefault((item['kind'].split('_')[0], item['target'], lane), []).append(item)
+
+    priorities = _target_priorities(mapping)
+    groups = sorted(by_target.values(), key=lambda target_items: (
+        min(KIND_RANKS.get(item['kind'], len(KIND_RANKS)) for item in target_items),
+        -priorities.get(target_items[0]['target'], DEFAULT_TARGET_PRIORITY),
+    ))
+
+    max_workers = int(config.get('OUTBOX_MAX_WORKERS', DEFAULT_OUTBOX_WORKERS))
+    max_attempts = int(config.get('OUTBOX_MAX_ATTEMPTS', DEFAULT_OUTBOX_MAX_ATTEMPTS))
+    attachment_workers = int(config.get('ATTACHMENT_MAX_WORKERS', DEFAULT_ATTACHMENT_WORKERS))
+    # Um pool por host de destino: enquanto um host está no limite de concorrência,
+    # as threads esperando por ele não impedem o trabalho do outro. Os anexos ficam em
+    # um pool próprio e menor (chave None), para que transferências longas não
+    # atrasem comentários e status.
+    by_pool = {}
+    for target_items in groups:
+        if target_items[0]['kind'].endswith('_attachment'):
+            pool_key = None
+        else:
+            pool_key = network.get_host(_target_url(target_items[0], config))
+        by_pool.setdefault(pool_key, []).append(target_items)
+    executors = {
+        pool_key: ThreadPoolExecutor(max_workers=attachment_workers if pool_key is None else max_workers)
+        for pool_key in by_pool
+    }
+    done, failed = 0, 0
+    try:
+        futures = [
+            context.submit_with_context(executors[pool_key], _execute_target_items, target_items, config, temp_dir)
+            for pool_key, pool_groups in by_pool.items()
+            for target_items in pool_groups
+        ]
+        for future in as_completed(futures):
+            # As gravações no SQLite e no mapeamento ficam na thread principal.
+            for item, result, error in future.result():
+                if error is None:
+                    outbox.mark_done(outbox_path, item['id'], result if isinstance(result, (dict, list, str, int)) else None)
+                    _apply_result_to_mapping(item, result, mapping)
+                    done += 1
+                elif isinstance(error, network.AttachmentRejected):
+                    # Recusa definitiva: o item sai da fila sem novas tentativas (nem novos downloads).
+                    outbox.mark_skipped(outbox_path, item['id'], error)
+                    logger.warning("Anexo '%s' não será copiado: %s.", item['payload']['filename'], error)
+                    failed += 1
+                else:
+                    retry_delay = OUTBOX_RETRY_BASE_SECONDS * (2 ** item['attempts'])
+                    outbox.mark_failed(outbox_path, item['id'], error, retry_delay, max_attempts)
+                    logger.warning("Escrita '%s' falhou (%s). Nova tentativa em %ss.", item['idempotency_key'], error, retry_delay)
+                    failed += 1
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+    deferred = sum(len(target_items) for target_items in groups) - done - failed
+    if deferred and network.run_budget_exhausted():
+        logger.warning("Orçamento de requisições do ciclo esgotado. %s escrita(s) adiada(s) para o próximo ciclo.", deferred)
+        metrics.inc('sync_work_deferred_total', deferred, stage='outbox')
+
+    outbox.prune_done(outbox_path)
+    logger.info("Fila de saída: %s escrita(s) concluída(s), %s com falha.", done, failed)
+    return done, failed
@@ -4,9 +4,23 @@ from datetime import datetime, timezone, timedelta
 from requests.auth import HTTPBasicAuth
 
 # Importa os serviços e módulos necessários
-from . import freshdesk_service, jira_service
-from ..core import utils, network
-from ..storage import file_storage
+from . import freshdesk_service, jira_service, outbox_service
+from ..core import cassette, context, log, metrics, network, utils
+from ..storage import backfill_state, client_config, file_storage, lease_store, mapping_archive, outbox, run_journal, sync_status
+
+logger = log.get_logger(__name__)
+
+# Pares encerrados e sem atividade há mais de N dias saem do mapping.json para o arquivo morto.
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+# Status considerados encerrados (Jira: nome do status; Freshdesk: 4 = Resolvido, 5 = Fechado).
+CLOSED_JIRA_STATUSES = ("Done", "Concluído", "Resolved", "Closed", "Fechado")
+CLOSED_FRESHDESK_STATUSES = (4, 5)
+# A cada quantos tickets o progresso de uma fase (mapeamento + diário) é salvo.
+CHECKPOINT_EVERY = 50
+# Fases do ciclo registradas no diário de execução, na ordem em que rodam.
+SYNC_PHASES = ('create_tickets', 'jira_to_freshdesk', 'freshdesk_to_jira')
+# Prioridade do Freshdesk (1 = Baixa ... 4 = Urgente) assumida quando o ticket não informa.
+DEFAULT_TICKET_PRIORITY = 2
 
 def get_temp_attachments_dir(client_name):
     """Cria e retorna o caminho para o diretório de anexos temporários."""
@@ -15,11 +29,36 @@ def get_temp_attachments_dir(client_name):
     os.makedirs(temp_dir, exist_ok=True)
     return temp_dir
 
+def client_hosts_unavailable(config):
+    """
+    Indica se o Jira ou o Freshdesk do cliente está com o circuito aberto.
+    Nesse caso o restante do trabalho do cliente é interrompido e retomado no próximo ciclo.
+    """
+    return (network.is_circuit_open(config['JIRA_URL'])
+            or network.is_circuit_open(freshdesk_service.get_freshdesk_base_url(config)))
+
+def _enqueue_freshdesk_attachment(attachment, jira_key, config):
+    """Enfileira a cópia de um anexo do Freshdesk para o Jira (se permitido pelos limites do cliente)."""
+    attachment_id_fd = f"fd-{attachment['id']}"
+    violation = outbox_service.attachment_policy_violation(attachment['name'], attachment.get('size'), config)
+    if violation:
+        logger.warning("Anexo '%s' do Freshdesk não será copiado para o Jira %s: %s.", attachment['name'], jira_key, violation)
+        return
+    outbox.enqueue(
+        config['OUTBOX_PATH'], 'jira_attachment', jira_key,
+        {'source_url': attachment['attachment_url'], 'filename': attachment['name'],
+         'jira_key': jira_key, 'attachment_ref': attachment_id_fd},
+        idempotency_key=f"attachment:{attachment_id_fd}->jira:{jira_key}"
+    )
+
 def _sync_jira_to_freshdesk(jira_tickets, mapping, config):
     """Lógica interna para sincronizar atualizações do Jira para o Freshdesk."""
-    print("\n--- Sincronizando Jira -> Freshdesk (para tickets mapeados) ---")
+    logger.info("--- Sincronizando Jira -> Freshdesk (para tickets mapeados) ---")
     for jira_ticket in jira_tickets:
-        jira_key = jira_ticket['key']
+        if client_hosts_unavailable(config):
+            logger.warning("Jira ou Freshdesk do cliente indisponível. Interrompendo a sincronização Jira -> Freshdesk.")
+            break
+        jira_key = jira_ticket.key
         if jira_key not in mapping:
             continue
 
@@ -27,47 +66,55 @@ def _sync_jira_to_freshdesk(jira_tickets, mapping, config):
         mapping_entry.setdefault('synced_attachments', [])
         
         last_sync = utils.parse_datetime(mapping_entry.get('last_jira_update'))
-        jira_updated_at = utils.parse_datetime(jira_ticket['fields']['updated'])
+        jira_updated_at = utils.parse_datetime(jira_ticket.updated)
         
         if last_sync and jira_updated_at and jira_updated_at <= last_sync:
             continue
 
         fd_id = mapping_entry['freshdesk_id']
-        print(f"Verificando atualizações no Freshdesk {fd_id} com base no Jira {jira_key}...")
+        logger.debug("Verificando atualizações no Freshdesk %s com base no Jira %s...", fd_id, jira_key)
+        mapping_entry['jira_status'] = jira_ticket.status
+        metrics.inc('sync_tickets_processed_total', direction='jira_to_freshdesk')
 
         # Sincronizar comentários
         if config.get('SYNC_COMMENTS_JIRA_TO_FRESHDESK', True):
-            for comment in jira_ticket['fields'].get('comment', {}).get('comments', []):
-                comment_updated_at = utils.parse_datetime(comment['updated'])
+            for comment in jira_ticket.comments:
+                comment_updated_at = utils.parse_datetime(comment.updated)
                 if not last_sync or (comment_updated_at and comment_updated_at > last_sync):
-                    try:
-                        comment_body = comment['body']['content'][0]['content'][0]['text']
-                    except (KeyError, IndexError):
+                    comment_body = comment.text
+                    if comment_body is None:
                         comment_body = "Não foi possível extrair o conteúdo."
 
                     # VERIFICA SE O COMENTÁRIO DO JIRA JÁ FOI ORIGINADO DO FRESHDESK para evitar loops.
                     if "no Freshdesk:_" in comment_body:
-                        print(f"  -> Pulando comentário do Jira {comment['id']} (origem: Freshdesk).")
+                        logger.debug("Pulando comentário do Jira %s (origem: Freshdesk).", comment.id)
                         continue
 
-                    comment_author = comment['author']['displayName']
+                    comment_author = comment.author
                     note = f"<i>Comentário de <b>{comment_author}</b> no Jira:</i><br><hr>{comment_body}"
-                    freshdesk_service.add_freshdesk_note(fd_id, note, config)
+                    outbox.enqueue(
+                        config['OUTBOX_PATH'], 'freshdesk_note', fd_id, {'body': note},
+                        idempotency_key=f"jira-comment:{comment.id}@{comment.updated}->fd:{fd_id}"
+                    )
         
         # Sincronizar anexos
         if config.get('SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK', True):
-            temp_dir = get_temp_attachments_dir(config['CLIENT_NAME'])
-            for attachment in jira_ticket['fields'].get('attachment', []):
-                attachment_id = f"jira-{attachment['id']}"
+            for attachment in jira_ticket.attachments:
+                attachment_id = f"jira-{attachment.id}"
                 if attachment_id in mapping_entry['synced_attachments']:
                     continue
                 
-                print(f"Novo anexo detectado no Jira {jira_key}: {attachment['filename']}")
-                file_path = os.path.join(temp_dir, attachment['filename'])
-                if network.download_attachment(attachment['content'], file_path, auth=config['JIRA_AUTH']):
-                    if freshdesk_service.add_freshdesk_attachment(fd_id, file_path, config):
-                        mapping_entry['synced_attachments'].append(attachment_id)
-                    os.remove(file_path)
+                violation = outbox_service.attachment_policy_violation(attachment.filename, attachment.size, config)
+                if violation:
+                    logger.warning("Anexo '%s' do Jira %s não será copiado: %s.", attachment.filename, jira_key, violation)
+                    continue
+                logger.debug("Novo anexo detectado no Jira %s: %s", jira_key, attachment.filename)
+                outbox.enqueue(
+                    config['OUTBOX_PATH'], 'freshdesk_attachment', fd_id,
+                    {'source_url': attachment.content_url, 'filename': attachment.filename,
+                     'jira_key': jira_key, 'attachment_ref': attachment_id},
+                    idempotency_key=f"attachment:{attachment_id}->fd:{fd_id}"
+                )
 
         # ==================================================================
         # <<< INÍCIO DA LÓGICA DE SINCRONIZAÇÃO DE STATUS (COM MAPA EMBUTIDO) >>>
@@ -87,27 +134,27 @@ def _sync_jira_to_freshdesk(jira_tickets, mapping, config):
             }
             
             # Pega o nome exato do status vindo do Jira
-            jira_status_name = jira_ticket['fields']['status']['name']
-            print(f"  [Status Sync] Status atual do Jira {jira_key}: '{jira_status_name}'")
+            jira_status_name = jira_ticket.status
+            logger.debug("[Status Sync] Status atual do Jira %s: '%s'", jira_key, jira_status_name)
             
             # 2. Verifica se o nome do status do Jira está nas chaves do nosso mapa
             if jira_status_name in status_map_embedded:
                 freshdesk_status_code = status_map_embedded[jira_status_name]
                 
-                print(f"  [Status Sync] Status '{jira_status_name}' encontrado no mapa. Mapeado para código Freshdesk: {freshdesk_status_code}.")
-                print(f"  [Status Sync] Tentando atualizar o status do Freshdesk ticket {fd_id}...")
+                logger.debug("[Status Sync] Status '%s' encontrado no mapa. Mapeado para código Freshdesk: %s.",
+                             jira_status_name, freshdesk_status_code)
                 
-                # 3. Chama o serviço para atualizar o status no Freshdesk
-                response = freshdesk_service.update_freshdesk_ticket_status(fd_id, freshdesk_status_code, config)
-                
-                # 4. Verifica o resultado da chamada à API para feedback
-                if response:
-                    print(f"  [Status Sync] SUCESSO: Status do Freshdesk {fd_id} atualizado.")
-                else:
-                    print(f"  [Status Sync] FALHA: Não foi possível atualizar o status do Freshdesk {fd_id}. Verifique os logs de erro da API acima.")
+                # 3. Enfileira a atualização de status. Atualizações pendentes anteriores do
+                #    mesmo ticket são descartadas (coalesce_key): só o status mais recente importa.
+                if outbox.enqueue(
+                    config['OUTBOX_PATH'], 'freshdesk_status', fd_id, {'status': freshdesk_status_code},
+                    idempotency_key=f"fd-status:{fd_id}:{freshdesk_status_code}@{jira_ticket.updated}",
+                    coalesce_key=f"fd-status:{fd_id}"
+                ):
+                    logger.debug("[Status Sync] Atualização do status do Freshdesk ticket %s enfileirada.", fd_id)
             else:
                 # Log para nos ajudar a identificar nomes de status que precisam ser adicionados ao mapa
-                print(f"  [Status Sync] AVISO: Status do Jira '{jira_status_name}' não está no mapa de sincronização. Nenhuma ação será tomada.")
+                logger.warning("[Status Sync] Status do Jira '%s' não está no mapa de sincronização. Nenhuma ação será tomada.", jira_status_name)
         # ==================================================================
         # <<< FIM DA LÓGICA DE SINCRONIZAÇÃO DE STATUS >>>
         # ==================================================================
@@ -117,9 +164,14 @@ def _sync_jira_to_freshdesk(jira_tickets, mapping, config):
 def _sync_freshdesk_to_jira(freshdesk_tickets, mapping, config):
     """Lógica interna para sincronizar atualizações do Freshdesk para o Jira."""
     fd_id_to_jira_key = {str(v['freshdesk_id']): k for k, v in mapping.items()}
-    print("\n--- Sincronizando Freshdesk -> Jira (para tickets mapeados) ---")
+    # Nomes de agentes já consultados neste ciclo (o mesmo agente aparece em muitas conversas).
+    agent_names = {}
+    logger.info("--- Sincronizando Freshdesk -> Jira (para tickets mapeados) ---")
     for fd_ticket in freshdesk_tickets:
-        fd_id_str = str(fd_ticket['id'])
+        if client_hosts_unavailable(config):
+            logger.warning("Jira ou Freshdesk do cliente indisponível. Interrompendo a sincronização Freshdesk -> Jira.")
+            break
+        fd_id_str = str(fd_ticket.id)
         if fd_id_str not in fd_id_to_jira_key:
             continue
 
@@ -128,219 +180,493 @@ def _sync_freshdesk_to_jira(freshdesk_tickets, mapping, config):
         mapping_entry.setdefault('synced_attachments', [])
 
         last_sync = utils.parse_datetime(mapping_entry.get('last_freshdesk_update'))
-        fd_updated_at = utils.parse_datetime(fd_ticket['updated_at'])
+        fd_updated_at = utils.parse_datetime(fd_ticket.updated_at)
 
         if last_sync and fd_updated_at and fd_updated_at <= last_sync:
             continue
 
-        print(f"Atualizando Jira {jira_key} com base no Freshdesk {fd_id_str}...")
+        logger.debug("Atualizando Jira %s com base no Freshdesk %s...", jira_key, fd_id_str)
+        mapping_entry['freshdesk_status'] = fd_ticket.status
+        mapping_entry['priority'] = fd_ticket.priority
+        metrics.inc('sync_tickets_processed_total', direction='freshdesk_to_jira')
         
         # Busca as conversas para obter notas, respostas e anexos
         for conv in freshdesk_service.fetch_freshdesk_conversations(fd_id_str, config):
             # Verifica se a conversa foi inicialmente sincronizada do Jira
             if "<i>Comentário de" in conv.get('body', ''):
-                print(f"  -> Pulando conversa {conv['id']} (origem: Jira).")
+                logger.debug("Pulando conversa %s (origem: Jira).", conv['id'])
                 continue
 
             conv_updated_at = utils.parse_datetime(conv['updated_at'])
             user_id = conv.get('user_id')
-            print(f"  --> Processando conversa {conv['id']}...")  # Debug print
-            print(f"  --> ID do Usuário: {user_id}")  # Verifica o ID do usuário
+            logger.debug("Processando conversa %s (usuário %s)...", conv['id'], user_id)
 
             user_name = 'Usuário Desconhecido'  # Valor padrão
-            if user_id:
+            if user_id and user_id in agent_names:
+                metrics.record_cache('freshdesk_agent', hit=True)
+                user_name = agent_names[user_id]
+            elif user_id:
+                metrics.record_cache('freshdesk_agent', hit=False)
                 try:
                     # Tenta buscar os detalhes do agente
                     agent_details = freshdesk_service.fetch_freshdesk_agent_details(user_id, config)
-                    #print(f"  --> Detalhes do Agente: {agent_details}")  # Verifica o nome retornado do agente
                     if agent_details and 'contact' in agent_details:
                         user_name = agent_details['contact'].get('name', 'Usuário Desconhecido')
+                        agent_names[user_id] = user_name
                     else:
-                        print(f"  --> Detalhes do agente não encontrados para o user_id: {user_id}")
+                        logger.debug("Detalhes do agente não encontrados para o user_id: %s", user_id)
                 except Exception as e:
-                    print(f"  -> Erro ao obter nome do usuário {user_id} do Freshdesk: {e}")
+                    logger.warning("Erro ao obter nome do usuário %s do Freshdesk: %s", user_id, e)
             else:
-                print("  --> User ID não encontrado na conversa.")
+                logger.debug("User ID não encontrado na conversa %s.", conv['id'])
 
             body_text = conv.get('body_text', '').strip()
             if config.get('SYNC_COMMENTS_FRESHDESK_TO_JIRA', True) and body_text:
                 note_type = "Nota Privada" if conv.get('private', True) else "Comentário" 
                 comment_text = f"{note_type} de {user_name} no Freshdesk:\n\n{body_text}"
-                jira_service.add_jira_comment(jira_key, comment_text, config)
+                outbox.enqueue(
+                    config['OUTBOX_PATH'], 'jira_comment', jira_key, {'body': comment_text},
+                    idempotency_key=f"fd-conversation:{conv['id']}@{conv['updated_at']}->jira:{jira_key}"
+                )
                
             # Sincronizar anexos da conversa
             if config.get('SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA', True) and conv.get('attachments'):
-                temp_dir = get_temp_attachments_dir(config['CLIENT_NAME'])
                 for attachment in conv['attachments']:
                     attachment_id_fd = f"fd-{attachment['id']}"
                     if attachment_id_fd in mapping_entry['synced_attachments']:
                         continue
                     
-                    print(f"  -> Novo anexo detectado no Freshdesk {fd_id_str}: {attachment['name']}")
-                    file_path = os.path.join(temp_dir, attachment['name'])
-                    if network.download_attachment(attachment['attachment_url'], file_path):
-                        jira_attachment_id = jira_service.add_jira_attachment(jira_key, file_path, config)
-                        if jira_attachment_id:
-                            attachment_id_jira = f"jira-{jira_attachment_id}"
-                            mapping_entry['synced_attachments'].append(attachment_id_fd)
-                            mapping_entry['synced_attachments'].append(attachment_id_jira)
-                            print(f"  -> Anexo {attachment_id_fd} mapeado para {attachment_id_jira}.")
-                        os.remove(file_path)
+                    logger.debug("Novo anexo detectado no Freshdesk %s: %s", fd_id_str, attachment['name'])
+                    _enqueue_freshdesk_attachment(attachment, jira_key, config)
 
         mapping_entry['last_freshdesk_update'] = fd_updated_at.isoformat()
 
 def _find_and_map_new_freshdesk_tickets(freshdesk_tickets, mapping, config):
     """Encontra novos tickets no Freshdesk e os cria no Jira, atualizando o mapeamento."""
-    print("\n--- Verificando tickets do Freshdesk para criação no Jira ---")
+    logger.info("--- Verificando tickets do Freshdesk para criação no Jira ---")
     existing_fd_ids = {str(v['freshdesk_id']) for v in mapping.values()}
     
     first_run_timestamp_str = config.get('FIRST_RUN_TIMESTAMP')
     if not first_run_timestamp_str:
-        print("AVISO: 'FIRST_RUN_TIMESTAMP' não definido. Não será possível criar novos tickets.")
+        logger.warning("'FIRST_RUN_TIMESTAMP' não definido. Não será possível criar novos tickets.")
         return
 
     first_run_date = utils.parse_datetime(first_run_timestamp_str)
     if not first_run_date:
-        print(f"AVISO: 'FIRST_RUN_TIMESTAMP' inválido: {first_run_timestamp_str}. Não será possível criar novos tickets.")
+        logger.warning("'FIRST_RUN_TIMESTAMP' inválido: %s. Não será possível criar novos tickets.", first_run_timestamp_str)
         return
 
     # ==================================================================
     # <<< INÍCIO DA CORREÇÃO >>>
     # ==================================================================
     for fd_ticket_summary in freshdesk_tickets:
-        fd_id_str = str(fd_ticket_summary['id'])
+        if client_hosts_unavailable(config):
+            logger.warning("Jira ou Freshdesk do cliente indisponível. Interrompendo a criação de tickets.")
+            break
+        fd_id_str = str(fd_ticket_summary.id)
 
         # 1. Pula tickets que já estão mapeados
         if fd_id_str in existing_fd_ids:
             continue
             
         # 2. Obtém e valida a data de criação do ticket
-        ticket_creation_date = utils.parse_datetime(fd_ticket_summary['created_at'])
+        ticket_creation_date = utils.parse_datetime(fd_ticket_summary.created_at)
         if not ticket_creation_date:
-            print(f"AVISO: Não foi possível determinar a data de criação do ticket Freshdesk {fd_id_str}. Pulando.")
+            logger.warning("Não foi possível determinar a data de criação do ticket Freshdesk %s. Pulando.", fd_id_str)
             continue
 
         # 3. Verifica se o ticket é novo (criado após a data de corte)
         if ticket_creation_date > first_run_date:
-            print(f"Ticket Freshdesk {fd_id_str} é novo. Buscando detalhes completos...")
-            
-            # Busca detalhes completos do ticket no Freshdesk
-            full_fd_ticket = freshdesk_service.fetch_freshdesk_ticket_details(fd_id_str, config)
-            if not full_fd_ticket:
-                print(f"ERRO: Falha ao buscar detalhes do Freshdesk {fd_id_str}.")
+            logger.info("Ticket Freshdesk %s é novo. Buscando detalhes completos...", fd_id_str)
+            if not create_pair_from_freshdesk(fd_id_str, mapping, config) and not holds_client_lease(config):
+                break
+
+def create_pair_from_freshdesk(fd_id_str, mapping, config, direction='created_in_jira'):
+    """
+    Cria no Jira o ticket correspondente a um ticket do Freshdesk, registra o par no
+    mapeamento e enfileira os anexos iniciais. Quem chama salva o mapeamento.
+
+    Args:
+        fd_id_str (str): O ID do ticket do Freshdesk.
+        mapping (dict): O mapeamento do cliente (recebe o novo par).
+        config (dict): A configuração do cliente.
+        direction (str): Rótulo da métrica sync_tickets_processed_total.
+
+    Returns:
+        str or None: A chave do ticket criado no Jira ou None em caso de falha.
+    """
+    # Busca detalhes completos do ticket no Freshdesk
+    full_fd_ticket = freshdesk_service.fetch_freshdesk_ticket_details(fd_id_str, config)
+    if not full_fd_ticket:
+        logger.error("Falha ao buscar detalhes do Freshdesk %s.", fd_id_str)
+        return None
+
+    # Um nó que perdeu o lease não cria tickets: o novo dono também os criaria (duplicados).
+    if not holds_client_lease(config):
+        return None
+
+    # Cria o ticket correspondente no Jira
+    new_jira_ticket = jira_service.create_jira_ticket(full_fd_ticket, config)
+    if not new_jira_ticket or 'key' not in new_jira_ticket:
+        logger.error("A criação do ticket Jira para o Freshdesk %s falhou.", fd_id_str)
+        return None
+
+    jira_key = new_jira_ticket['key']
+    sync_time = datetime.now(timezone.utc).isoformat()
+
+    # Cria a entrada inicial no mapeamento
+    mapping[jira_key] = {
+        'freshdesk_id': int(fd_id_str),
+        'last_jira_update': sync_time,
+        'last_freshdesk_update': sync_time,
+        'synced_attachments': [],
+        'priority': full_fd_ticket.get('priority')
+    }
+    logger.info("Mapeamento criado: Jira %s <-> Freshdesk %s", jira_key, fd_id_str)
+    metrics.inc('sync_tickets_processed_total', direction=direction)
+
+    # Sincroniza anexos iniciais do ticket Freshdesk (com a lógica de vincular IDs)
+    if config.get('SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA', True) and full_fd_ticket.get('attachments'):
+        logger.debug("Sincronizando anexos iniciais do Freshdesk %s para Jira %s...", fd_id_str, jira_key)
+
+        for attachment in full_fd_ticket['attachments']:
+            attachment_id_fd = f"fd-{attachment['id']}"
+
+            if attachment_id_fd in mapping[jira_key]['synced_attachments']:
                 continue
 
-            # Cria o ticket correspondente no Jira
-            new_jira_ticket = jira_service.create_jira_ticket(full_fd_ticket, config)
-            if new_jira_ticket and 'key' in new_jira_ticket:
-                jira_key = new_jira_ticket['key']
-                sync_time = datetime.now(timezone.utc).isoformat()
-                
-                # Cria a entrada inicial no mapeamento
-                mapping[jira_key] = {
-                    'freshdesk_id': int(fd_id_str),
-                    'last_jira_update': sync_time,
-                    'last_freshdesk_update': sync_time,
-                    'synced_attachments': []
-                }
-                print(f"Mapeamento criado: Jira {jira_key} <-> Freshdesk {fd_id_str}")
-
-                # Sincroniza anexos iniciais do ticket Freshdesk (com a lógica de vincular IDs)
-                if config.get('SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA', True) and full_fd_ticket.get('attachments'):
-                    print(f"Sincronizando anexos iniciais do Freshdesk {fd_id_str} para Jira {jira_key}...")
-                    temp_dir = get_temp_attachments_dir(config['CLIENT_NAME'])
-                    
-                    for attachment in full_fd_ticket['attachments']:
-                        attachment_id_fd = f"fd-{attachment['id']}"
-                        
-                        if attachment_id_fd in mapping[jira_key]['synced_attachments']:
-                            continue
-
-                        file_path = os.path.join(temp_dir, attachment['name'])
-                        if network.download_attachment(attachment['attachment_url'], file_path):
-                            jira_attachment_id = jira_service.add_jira_attachment(jira_key, file_path, config)
-                            if jira_attachment_id:
-                                # Registra ambos os IDs para criar o vínculo
-                                attachment_id_jira = f"jira-{jira_attachment_id}"
-                                mapping[jira_key]['synced_attachments'].append(attachment_id_fd)
-                                mapping[jira_key]['synced_attachments'].append(attachment_id_jira)
-                                print(f"  -> Anexo {attachment_id_fd} mapeado para {attachment_id_jira}.")
-                            os.remove(file_path)
-            else:
-                print(f"ERRO: A criação do ticket Jira para o Freshdesk {fd_id_str} falhou.")
+            # O drenador registra ambos os IDs no mapeamento para criar o vínculo
+            _enqueue_freshdesk_attachment(attachment, jira_key, config)
+    return jira_key
 
-def run_sync_for_client(config, mapping_data, mapping_path):
+def _rehydrate_archived_pairs(jira_tickets, freshdesk_tickets, mapping, config):
+    """
+    Traz de volta ao mapeamento os pares arquivados cujos tickets voltaram a ser
+    atualizados (e aparecem nas buscas deste ciclo). Sem isso, um ticket arquivado
+    do Freshdesk seria tratado como novo e duplicado no Jira.
+    """
+    mapped_fd_ids = {str(v['freshdesk_id']) for v in mapping.values()}
+    jira_keys = [t.key for t in jira_tickets if t.key not in mapping]
+    fd_ids = [t.id for t in freshdesk_tickets if str(t.id) not in mapped_fd_ids]
+    if not jira_keys and not fd_ids:
+        return
+    found = mapping_archive.find_pairs(config['MAPPING_ARCHIVE_PATH'], jira_keys, fd_ids)
+    for jira_key, entry in found.items():
+        if jira_key not in mapping:
+            mapping[jira_key] = entry
+            logger.info("Par Jira %s <-> Freshdesk %s restaurado do arquivo morto.", jira_key, entry['freshdesk_id'])
+
+def _last_sync_timestamp(entry, field):
+    last_sync = utils.parse_datetime(entry.get(field)) if entry else None
+    return last_sync.timestamp() if last_sync else 0.0
+
+def prioritize_tickets(jira_tickets, freshdesk_tickets, mapping, config):
+    """
+    Ordena as listas do ciclo para que, com o orçamento de requisições apertado, o
+    trabalho mais importante seja feito primeiro: maior prioridade do Freshdesk
+    (Urgente antes de Baixa) e, na mesma prioridade, o par sincronizado há mais tempo.
+
+    A prioridade de um ticket do Jira é a do ticket do Freshdesk do par (deste ciclo
+    ou registrada no mapeamento) ou, sem par, a do próprio Jira convertida pelo
+    FRESHDESK_TO_JIRA_PRIORITY.
+
+    Returns:
+        tuple: (tickets_jira, tickets_freshdesk) ordenados.
+    """
+    fd_priorities = {str(t.id): t.priority or DEFAULT_TICKET_PRIORITY for t in freshdesk_tickets}
+    priority_map = config.get('FRESHDESK_TO_JIRA_PRIORITY') or {}
+    jira_name_to_priority = {name: int(code) for code, name in priority_map.items() if str(code).isdigit()}
+    invalid_codes = [code for code in priority_map if not str(code).isdigit()]
+    if invalid_codes:
+        logger.warning("FRESHDESK_TO_JIRA_PRIORITY: códigos não numéricos ignorados na ordenação: %s",
+                       ', '.join(map(str, invalid_codes)))
+    fd_id_to_jira_key = {str(v['freshdesk_id']): k for k, v in mapping.items()}
+
+    def _jira_priority(ticket):
+        entry = mapping.get(ticket.key)
+        if entry:
+            priority = fd_priorities.get(str(entry['freshdesk_id'])) or entry.get('priority')
+            if priority:
+                return priority
+        return jira_name_to_priority.get(ticket.priority, DEFAULT_TICKET_PRIORITY)
+
+    jira_tickets = sorted(jira_tickets, key=lambda t: (
+        -_jira_priority(t), _last_sync_timestamp(mapping.get(t.key), 'last_jira_update')
+    ))
+    freshdesk_tickets = sorted(freshdesk_tickets, key=lambda t: (
+        -fd_priorities[str(t.id)],
+        _last_sync_timestamp(mapping.get(fd_id_to_jira_key.get(str(t.id))), 'last_freshdesk_update'),
+    ))
+    return jira_tickets, freshdesk_tickets
+
+def _is_archivable(entry, cutoff):
+    """Par encerrado (ou de status desconhecido) sem atividade desde a data de corte."""
+    activity = [d for d in (utils.parse_datetime(entry.get('last_jira_update')),
+                            utils.parse_datetime(entry.get('last_freshdesk_update'))) if d]
+    if not activity or max(activity) >= cutoff:
+        return False
+    # Pares antigos não têm status registrado; como voltam ao mapeamento se o ticket
+    # reaparecer, podem ser arquivados apenas pela inatividade.
+    if 'jira_status' not in entry and 'freshdesk_status' not in entry:
+        return True
+    return (entry.get('jira_status') in CLOSED_JIRA_STATUSES
+            or entry.get('freshdesk_status') in CLOSED_FRESHDESK_STATUSES)
+
+def _compact_mapping(mapping, config):
+    """
+    Move para o arquivo morto os pares encerrados e inativos há mais de
+    MAPPING_ARCHIVE_AFTER_DAYS dias (0 desliga). Pares com escritas ainda pendentes
+    na fila de saída permanecem no mapeamento.
+    """
+    archive_after_days = config.get('MAPPING_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    if not archive_after_days:
+        return
+    cutoff = datetime.now(timezone.utc) - timedelta(days=archive_after_days)
+    pending = outbox.pending_targets(config['OUTBOX_PATH'])
+    archived = {
+        key: entry for key, entry in mapping.items()
+        if key not in pending and str(entry['freshdesk_id']) not in pending and _is_archivable(entry, cutoff)
+    }
+    if not archived:
+        return
+    # O arquivo morto é gravado antes do mapping.json: uma interrupção entre os dois
+    # deixa o par em ambos, nunca em nenhum.
+    mapping_archive.archive_pairs(config['MAPPING_ARCHIVE_PATH'], archived)
+    for key in archived:
+        del mapping[key]
+    logger.info("%s par(es) encerrado(s) movido(s) para o arquivo morto; %s ativo(s) no mapeamento.",
+                len(archived), len(mapping))
+
+def compute_since_date(config):
+    """Retorna a data ('YYYY-MM-DD') a partir da qual os tickets atualizados são buscados."""
+    sync_days_ago = config.get("SYNC_DAYS_AGO", 1)
+    return (datetime.now(timezone.utc) - timedelta(days=sync_days_ago)).strftime('%Y-%m-%d')
+
+def holds_client_lease(config):
+    """No modo sharding, indica se o lease do cliente ainda é deste nó."""
+    lease = config.get('LEASE')
+    if lease and not lease_store.holds_lease(lease):
+        logger.error("O lease do cliente %s foi perdido para outro nó. Nada mais será criado ou salvo.", config['CLIENT_NAME'])
+        return False
+    return True
+
+def _checkpoint(run):
+    """
+    Salva o mapeamento e o diário do ciclo, para que uma interrupção retome daqui.
+
+    Returns:
+        bool: False se o lease foi perdido (o ciclo deve parar).
+    """
+    if not holds_client_lease(run['config']):
+        run['aborted'] = True
+        return False
+    # Os itens enfileirados precisam estar gravados antes do mapeamento que os considera feitos.
+    outbox.commit(run['config']['OUTBOX_PATH'])
+    file_storage.save_mapping_data(run['mapping_path'], run['mapping'])
+    run_journal.save(run['journal_path'], run['journal'])
+    return True
+
+def _journaled(tickets, phase, run):
+    """
+    Percorre os tickets de uma fase a partir da posição salva no diário, com
+    checkpoints a cada CHECKPOINT_EVERY tickets e logo após a criação de um par
+    (um par criado e não salvo duplicaria o ticket no Jira na retomada).
+    Para quando o orçamento de requisições do ciclo acaba: os tickets restantes
+    ficam para o próximo ciclo.
+    """
+    positions = run['journal']['positions']
+    start = positions.get(phase, 0)
+    if start:
+        logger.info("Retomando a fase %s a partir do ticket %s de %s.", phase, start + 1, len(tickets))
+    mapping_size = len(run['mapping'])
+    for index in range(start, len(tickets)):
+        # Todos os tickets antes de 'index' já foram processados.
+        positions[phase] = index
+        if network.run_budget_exhausted():
+            logger.warning("Orçamento de requisições do ciclo esgotado. %s ticket(s) da fase %s adiado(s) para o próximo ciclo.",
+                           len(tickets) - index, phase)
+            metrics.inc('sync_work_deferred_total', len(tickets) - index, stage=phase)
+            run['deferred'] = True
+            return
+        if (index > start and index % CHECKPOINT_EVERY == 0) or len(run['mapping']) != mapping_size:
+            mapping_size = len(run['mapping'])
+            if not _checkpoint(run):
+                return
+        yield tickets[index]
+    positions[phase] = len(tickets)
+
+def _run_phase(phase, sync_func, tickets, run):
+    """Executa uma fase do ciclo (se ainda não concluída) e registra sua conclusão no diário."""
+    journal, config = run['journal'], run['config']
+    if phase in journal['phases_done']:
+        logger.info("Fase %s já concluída neste ciclo. Pulando.", phase)
+        return
+    with metrics.timed_phase(phase):
+        try:
+            sync_func(_journaled(tickets, phase, run), run['mapping'], config)
+        finally:
+            outbox.commit(config['OUTBOX_PATH'])
+    # Interrompida (lease perdido, host indisponível ou orçamento esgotado): a fase continua pendente.
+    if run['aborted'] or run['deferred'] or client_hosts_unavailable(config):
+        return
+    journal['phases_done'].append(phase)
+    _checkpoint(run)
+
+def run_sync_for_client(config, mapping_data, mapping_path, jira_tickets=None, freshdesk_tickets=None):
     """
     Executa o ciclo de sincronização completo para um único cliente.
 
+    O progresso fica registrado em um diário (run_journal.json): se o processo for
+    interrompido, o próximo ciclo reaproveita as listas buscadas e continua a partir
+    da última fase/ticket salvo.
+
+    Os tickets são processados por prioridade (prioritize_tickets) e, com
+    MAX_REQUESTS_PER_RUN definido, o ciclo para de iniciar trabalho novo quando o
+    orçamento acaba; o restante fica para o próximo ciclo.
+
     Args:
         config (dict): A configuração do cliente.
         mapping_data (dict): Os dados de mapeamento atuais.
         mapping_path (str): O caminho para salvar o arquivo de mapeamento.
-    """
-    sync_days_ago = config.get("SYNC_DAYS_AGO", 1)
-    since_date = (datetime.now(timezone.utc) - timedelta(days=sync_days_ago)).strftime('%Y-%m-%d')
-    print(f"\nBuscando tickets atualizados desde {since_date}...")
+        jira_tickets (list, optional): Tickets do Jira já buscados (ex.: por uma busca
+            agrupada do orquestrador). Se None, são buscados aqui.
+        freshdesk_tickets (list, optional): Idem, para o Freshdesk.
 
-    # 1. Buscar tickets de ambas as plataformas
-    jira_tickets = jira_service.fetch_updated_jira_tickets(since_date, config)
-    freshdesk_tickets = freshdesk_service.fetch_updated_freshdesk_tickets(since_date, config)
+    Returns:
+        bool: True se o ciclo foi concluído; False se parou antes (falha na busca,
+            host indisponível ou lease perdido) e continua no próximo ciclo.
+    """
+    network.start_run_budget(config.get('MAX_REQUESTS_PER_RUN'))
+    journal_path = config['RUN_JOURNAL_PATH']
+    journal = run_journal.load_resumable(journal_path)
+    fetched = run_journal.load_fetched(journal_path) if journal else None
+
+    if fetched:
+        # 1. Ciclo interrompido: usa as listas guardadas em vez de buscar de novo
+        jira_tickets, freshdesk_tickets = fetched
+        logger.info("Retomando ciclo interrompido (tickets desde %s; fases concluídas: %s).",
+                    journal['since_date'], ', '.join(journal['phases_done']) or '-')
+    else:
+        since_date = compute_since_date(config)
+        logger.info("Buscando tickets atualizados desde %s...", since_date)
+
+        # 1. Buscar tickets de ambas as plataformas (se o orquestrador ainda não buscou)
+        if jira_tickets is None:
+            with metrics.timed_phase('fetch_jira'):
+                jira_tickets = jira_service.fetch_updated_jira_tickets(since_date, config)
+        if freshdesk_tickets is None:
+            with metrics.timed_phase('fetch_freshdesk'):
+                freshdesk_tickets = freshdesk_service.fetch_updated_freshdesk_tickets(since_date, config)
+
+        if jira_tickets is None or freshdesk_tickets is None:
+            logger.error("Falha ao buscar tickets de uma das plataformas. Abortando a sincronização para este cliente.")
+            return False
+
+        # A ordem é definida uma vez e guardada: as posições do diário se referem a ela.
+        jira_tickets, freshdesk_tickets = prioritize_tickets(jira_tickets, freshdesk_tickets, mapping_data, config)
+        journal = run_journal.new_journal(since_date)
+        run_journal.save_fetched(journal_path, jira_tickets, freshdesk_tickets)
+        run_journal.save(journal_path, journal)
+
+    run = {'config': config, 'mapping': mapping_data, 'mapping_path': mapping_path,
+           'journal': journal, 'journal_path': journal_path, 'aborted': False, 'deferred': False}
+
+    # Pares arquivados cujos tickets voltaram a ser atualizados retornam ao mapeamento.
+    _rehydrate_archived_pairs(jira_tickets, freshdesk_tickets, mapping_data, config)
 
-    if jira_tickets is None or freshdesk_tickets is None:
-        print("Falha ao buscar tickets de uma das plataformas. Abortando a sincronização para este cliente.")
-        return
-    
     # 2. Criar novos tickets no Jira a partir de tickets do Freshdesk
-    _find_and_map_new_freshdesk_tickets(freshdesk_tickets, mapping_data, config)
-    
+    _run_phase('create_tickets', _find_and_map_new_freshdesk_tickets, freshdesk_tickets, run)
+
     # 3. Sincronizar atualizações de tickets já mapeados
-    _sync_jira_to_freshdesk(jira_tickets, mapping_data, config)
-    _sync_freshdesk_to_jira(freshdesk_tickets, mapping_data, config)
-    
-    # 4. Salvar o estado do mapeamento
-    file_storage.save_mapping_data(mapping_path, mapping_data)
+    if not run['aborted']:
+        _run_phase('jira_to_freshdesk', _sync_jira_to_freshdesk, jira_tickets, run)
+    if not run['aborted']:
+        _run_phase('freshdesk_to_jira', _sync_freshdesk_to_jira, freshdesk_tickets, run)
+    if run['aborted']:
+        return False
+
+    # 4. Executar as escritas enfileiradas (deste ciclo e pendentes de ciclos anteriores)
+    with metrics.timed_phase('drain_outbox'):
+        outbox_service.drain_outbox(
+            config['OUTBOX_PATH'], config, mapping_data, get_temp_attachments_dir(config['CLIENT_NAME'])
+        )
+
+    # 5. No modo sharding, só segue se o lease ainda for deste nó
+    if not holds_client_lease(config):
+        return False
+    # 6. Arquivar os pares encerrados e inativos, salvar o mapeamento e encerrar o diário
+    with metrics.timed_phase('save_mapping'):
+        _compact_mapping(mapping_data, config)
+        file_storage.save_mapping_data(mapping_path, mapping_data)
+    logger.info("Requisições neste ciclo: %s (orçamento: %s).",
+                network.run_budget_used(), config.get('MAX_REQUESTS_PER_RUN') or 'sem limite')
+    if all(phase in journal['phases_done'] for phase in SYNC_PHASES):
+        run_journal.clear(journal_path)
+        return True
+    # Alguma fase foi interrompida (host indisponível): o próximo ciclo continua dela.
+    run_journal.save(journal_path, journal)
+    return False
+
+def prepare_client_config(client_folder_path, client_name):
+    """
+    Carrega o config.json do cliente (validado e em cache até o arquivo mudar),
+    acrescenta os caminhos de estado do cliente e monta as credenciais.
+
+    Returns:
+        dict or None: A configuração pronta para uso ou None se o cliente deve ser pulado.
+    """
+    config = client_config.load_client_config(os.path.join(client_folder_path, 'config.json'))
+    if not config:
+        return None
+
+    config['CLIENT_NAME'] = client_name
+    config['OUTBOX_PATH'] = outbox.get_outbox_path(client_folder_path)
+    config['MAPPING_ARCHIVE_PATH'] = mapping_archive.get_archive_path(client_folder_path)
+    config['RUN_JOURNAL_PATH'] = run_journal.get_journal_path(client_folder_path)
+    config['BACKFILL_STATE_PATH'] = backfill_state.get_state_path(client_folder_path)
+    config['JIRA_AUTH'] = HTTPBasicAuth(config['JIRA_USER_EMAIL'], config['JIRA_API_TOKEN'])
+    config['FRESHDESK_AUTH'] = (config['FRESHDESK_API_KEY'], 'X')
+    return config
+
+def process_client(client_folder_path, client_name, config=None, jira_tickets=None, freshdesk_tickets=None):  
+    """
+    Processa um cliente: carrega configuração e mapeamento e executa a sincronização.
+
+    Args:
+        client_folder_path (str): Pasta do cliente (contém config.json e mapping.json).
+        client_name (str): Nome do cliente.
+        config (dict, optional): Configuração já preparada por prepare_client_config.
+        jira_tickets (list, optional): Tickets do Jira já buscados pelo orquestrador.
+        freshdesk_tickets (list, optional): Tickets do Freshdesk já buscados pelo orquestrador.
+    """
+    with context.client_context(client_name), metrics.timed_phase('total'):
+        _process_client(client_folder_path, client_name, config, jira_tickets, freshdesk_tickets)
 
-def process_client(client_folder_path, client_name):  
-    print(f"\n{'─'*25} Processando cliente: {client_name.upper()} {'─'*25}")  
-    config_path = os.path.join(client_folder_path, 'config.json')  
+def _process_client(client_folder_path, client_name, config, jira_tickets, freshdesk_tickets):
+    logger.info("%s Processando cliente: %s %s", '─'*25, client_name.upper(), '─'*25)  
     mapping_path = os.path.join(client_folder_path, 'mapping.json')  
 
-    config = file_storage.load_client_config(config_path)  
+    if config is None:
+        config = prepare_client_config(client_folder_path, client_name)
     if not config:  
         return  
 
-    # Sobrescrever configurações com variáveis de ambiente  
-    config['JIRA_URL'] = os.getenv('JIRA_URL', config.get('JIRA_URL', ''))  
-    config['JIRA_USER_EMAIL'] = os.getenv('JIRA_USER_EMAIL', config.get('JIRA_USER_EMAIL', ''))  
-    config['JIRA_API_TOKEN'] = os.getenv('JIRA_API_TOKEN', config.get('JIRA_API_TOKEN', ''))  
-    config['JIRA_PROJECT_KEY'] = os.getenv('JIRA_PROJECT_KEY', config.get('JIRA_PROJECT_KEY', ''))  
-    config['FRESHDESK_DOMAIN'] = os.getenv('FRESHDESK_DOMAIN', config.get('FRESHDESK_DOMAIN', ''))  
-    config['FRESHDESK_API_KEY'] = os.getenv('FRESHDESK_API_KEY', config.get('FRESHDESK_API_KEY', ''))  
-    config['SYNC_STATUS_JIRA_TO_FRESHDESK'] = os.getenv('SYNC_STATUS_JIRA_TO_FRESHDESK', str(config.get('SYNC_STATUS_JIRA_TO_FRESHDESK', False))).lower() == 'true'  
-    config['SYNC_COMMENTS_JIRA_TO_FRESHDESK'] = os.getenv('SYNC_COMMENTS_JIRA_TO_FRESHDESK', str(config.get('SYNC_COMMENTS_JIRA_TO_FRESHDESK', False))).lower() == 'true'  
-    config['SYNC_COMMENTS_FRESHDESK_TO_JIRA'] = os.getenv('SYNC_COMMENTS_FRESHDESK_TO_JIRA', str(config.get('SYNC_COMMENTS_FRESHDESK_TO_JIRA', False))).lower() == 'true'  
-    config['SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK'] = os.getenv('SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK', str(config.get('SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK', False))).lower() == 'true'  
-    config['SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA'] = os.getenv('SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA', str(config.get('SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA', False))).lower() == 'true'  
-    config['FRESHDESK_COMPANY_ID'] = os.getenv('FRESHDESK_COMPANY_ID', str(config.get('FRESHDESK_COMPANY_ID', '')))  
-
-    #print(f"Configurações finais para {client_name}: {config}")  # Debug  
-
     mapping_data = file_storage.load_mapping_data(mapping_path)  
-
-    config['CLIENT_NAME'] = client_name  
+    if cassette.get_mode() == 'record':
+        cassette.record_metadata(client_name, mapping_data, config)
 
     try:  
-        config['JIRA_AUTH'] = HTTPBasicAuth(config['JIRA_USER_EMAIL'], config['JIRA_API_TOKEN'])  
-        config['FRESHDESK_AUTH'] = (config['FRESHDESK_API_KEY'], 'X')  
-    except KeyError as e:  
-        print(f"ERRO DE CONFIGURAÇÃO: A chave {e} está faltando no config.json de {client_name}. Pulando.")  
-        return  
-
-    try:  
-        run_sync_for_client(config, mapping_data, mapping_path)  
-        print(f"Cliente {client_name.upper()} processado com sucesso.")  
+        completed = run_sync_for_client(config, mapping_data, mapping_path, jira_tickets, freshdesk_tickets)  
     except Exception as e:  
-        print(f"ERRO INESPERADO durante a sincronização de {client_name}: {e}")  
-        import traceback  
-        traceback.print_exc()
-		
\ No newline at end of file
+        logger.exception("ERRO INESPERADO durante a sincronização de %s: %s", client_name, e)
+        sync_status.record(client_folder_path, sync_status.STATUS_ERROR, str(e))
+        return
+    finally:
+        outbox.close(config['OUTBOX_PATH'])
+    if completed:
+        logger.info("Cliente %s processado com sucesso.", client_name.upper())
+        sync_status.record(client_folder_path, sync_status.STATUS_OK, mapped_pairs=len(mapping_data))
+    else:
+        logger.warning("Cliente %s: ciclo incompleto, continua no próximo.", client_name.upper())
+        sync_status.record(client_folder_path, sync_status.STATUS_INCOMPLETE,
+                           "Ciclo interrompido; continua no próximo.", mapped_pairs=len(mapping_data))
\ No newline at end of file
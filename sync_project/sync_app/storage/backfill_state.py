@@ -0,0 +1,38 @@
+# sync_app/storage/backfill_state.py
+import json
+import os
+
+from .file_storage import write_json_atomic
+
+# Progresso da importação do histórico (backfill), na pasta de cada cliente.
+STATE_FILENAME = 'backfill_state.json'
+
+def get_state_path(client_folder_path):
+    """Retorna o caminho do progresso do backfill do cliente."""
+    return os.path.join(client_folder_path, STATE_FILENAME)
+
+def load(state_path):
+    """
+    Returns:
+        dict or None: {'since', 'until', 'cursor', 'imported', 'completed'} ou None se
+            o backfill ainda não começou.
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def new_state(since, until):
+    """
+    Cria (em memória) o progresso de um novo backfill.
+
+    Args:
+        since (str): Primeiro dia ('YYYY-MM-DD') a importar.
+        until (str): Dia ('YYYY-MM-DD') em que o histórico termina (data da primeira execução).
+    """
+    return {'since': since, 'until': until, 'cursor': since, 'imported': 0, 'completed': False}
+
+def save(state_path, state):
+    """Grava o progresso (escrita atômica)."""
+    write_json_atomic(state_path, state)
@@ -0,0 +1,158 @@
+# sync_app/storage/client_config.py
+import os
+import re
+import threading
+
+from . import file_storage
+from ..core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Esquema do config.json: chave -> (tipo, valor padrão, pode ser sobrescrita por variável de
+# ambiente global). Um processo atende todas as pastas de clientes, então só as opções de
+# comportamento aceitam a variável global (ex.: SYNC_COMMENTS_JIRA_TO_FRESHDESK); endereços,
+# credenciais, projeto e empresa só por variável do próprio cliente: SYNC_<CLIENTE>_<CHAVE>.
+# Padrão None: a chave fica ausente e quem a usa aplica o próprio padrão (config.get(chave, PADRAO)).
+CONFIG_SCHEMA = {
+    'JIRA_URL': (str, '', False),
+    'JIRA_USER_EMAIL': (str, '', False),
+    'JIRA_API_TOKEN': (str, '', False),
+    'JIRA_PROJECT_KEY': (str, '', False),
+    'JIRA_DEFAULT_ISSUE_TYPE': (str, 'Task', False),
+    'FRESHDESK_DOMAIN': (str, '', False),
+    'FRESHDESK_API_KEY': (str, '', False),
+    'FRESHDESK_COMPANY_ID': (str, '', False),
+    'FRESHDESK_BASE_URL': (str, None, False),
+    'FRESHDESK_TO_JIRA_PRIORITY': (dict, None, False),
+    'SYNC_STATUS_JIRA_TO_FRESHDESK': (bool, False, True),
+    'SYNC_COMMENTS_JIRA_TO_FRESHDESK': (bool, False, True),
+    'SYNC_COMMENTS_FRESHDESK_TO_JIRA': (bool, False, True),
+    'SYNC_ATTACHMENTS_JIRA_TO_FRESHDESK': (bool, False, True),
+    'SYNC_ATTACHMENTS_FRESHDESK_TO_JIRA': (bool, False, True),
+    'BATCH_COMMENTS': (bool, False, True),
+    'COMMENT_BATCH_MAX_CHARS': (int, None, False),
+    'SYNC_DAYS_AGO': (int, 1, False),
+    'FIRST_RUN_TIMESTAMP': (str, None, False),
+    'JIRA_MAX_REQUESTS_PER_MINUTE': (int, None, False),
+    'FRESHDESK_MAX_REQUESTS_PER_MINUTE': (int, None, False),
+    'OUTBOX_MAX_WORKERS': (int, None, False),
+    'OUTBOX_MAX_ATTEMPTS': (int, None, False),
+    'ATTACHMENT_MAX_WORKERS': (int, None, False),
+    'ATTACHMENT_MAX_MB': (int, None, False),
+    'ATTACHMENT_ALLOWED_EXTENSIONS': (str, None, False),
+    'ATTACHMENT_BLOCKED_EXTENSIONS': (str, None, False),
+    'MAPPING_ARCHIVE_AFTER_DAYS': (int, None, False),
+    'MAX_REQUESTS_PER_RUN': (int, None, False),
+    'BACKFILL_SINCE': (str, None, False),
+    'BACKFILL_SLICE_DAYS': (int, None, False),
+    'BACKFILL_MAX_REQUESTS_PER_RUN': (int, None, False),
+    'BACKFILL_RATE_PERCENT': (int, None, False),
+    'BACKFILL_MAX_REQUESTS_PER_MINUTE': (int, None, False),
+}
+# Chaves que precisam estar preenchidas para o cliente ser sincronizado.
+REQUIRED_KEYS = ('JIRA_URL', 'JIRA_USER_EMAIL', 'JIRA_API_TOKEN', 'JIRA_PROJECT_KEY',
+                 'FRESHDESK_DOMAIN', 'FRESHDESK_API_KEY')
+
+_TRUE_VALUES = ('true', '1', 'yes', 'sim')
+_FALSE_VALUES = ('false', '0', 'no', 'nao', 'não', '')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _coerce(value, value_type):
+    """Converte o valor para o tipo do esquema. Lança ValueError se não for possível."""
+    if value_type is bool:
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE_VALUES:
+            return True
+        if text in _FALSE_VALUES:
+            return False
+        raise ValueError(f"esperado true/false, recebido '{value}'")
+    if value_type is int:
+        if isinstance(value, bool):
+            raise ValueError(f"esperado número inteiro, recebido '{value}'")
+        return int(value)
+    if value_type is dict:
+        if not isinstance(value, dict):
+            raise ValueError("esperado um objeto JSON")
+        return value
+    return str(value).strip()
+
+def client_env_prefix(client_name):
+    """Prefixo das variáveis de ambiente de um cliente (ex.: 'Cliente-A' -> 'SYNC_CLIENTE_A_')."""
+    return 'SYNC_' + re.sub(r'[^A-Z0-9]', '_', client_name.upper()) + '_'
+
+def build_config(raw_config, environ=None, client_name=None):
+    """
+    Aplica as variáveis de ambiente e valida/converte a configuração conforme o esquema.
+    Chaves fora do esquema são mantidas como estão.
+
+    A variável do cliente (SYNC_<CLIENTE>_<CHAVE>) vale para qualquer chave do esquema e
+    tem precedência sobre a global, que só vale para chaves marcadas no esquema.
+
+    Args:
+        raw_config (dict): Conteúdo do config.json.
+        environ (dict, optional): Variáveis de ambiente (padrão: os.environ).
+        client_name (str, optional): Nome do cliente (pasta), para as variáveis do cliente.
+
+    Returns:
+        tuple: (configuração, lista de erros). Com erros, a configuração não deve ser usada.
+    """
+    environ = os.environ if environ is None else environ
+    config = dict(raw_config)
+    errors = []
+    prefix = client_env_prefix(client_name) if client_name else None
+    for key, (value_type, default, env_override) in CONFIG_SCHEMA.items():
+        value = config.get(key)
+        if prefix and prefix + key in environ:
+            value = environ[prefix + key]
+        elif env_override and key in environ:
+            value = environ[key]
+        if value is None or (value == '' and value_type is not str):
+            if default is None:
+                config.pop(key, None)
+            else:
+                config[key] = default
+            continue
+        try:
+            config[key] = _coerce(value, value_type)
+        except (TypeError, ValueError) as e:
+            errors.append(f"{key}: {e}")
+    for key in REQUIRED_KEYS:
+        if not config.get(key):
+            errors.append(f"{key}: obrigatório")
+    return config, errors
+
+def load_client_config(config_path):
+    """
+    Carrega e valida o config.json do cliente. O resultado fica em cache e só é
+    recalculado quando o arquivo muda (mtime/tamanho), o que evita reler e
+    revalidar todos os clientes a cada ciclo no modo contínuo.
+
+    Returns:
+        dict or None: Cópia da configuração validada, ou None se ausente ou inválida.
+    """
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        stat = None
+    with _cache_lock:
+        cached = _cache.get(config_path)
+        if stat and cached and cached['stamp'] == (stat.st_mtime_ns, stat.st_size):
+            return dict(cached['config'])
+
+    raw_config = file_storage.load_client_config(config_path)
+    if raw_config is None:
+        return None
+    config, errors = build_config(raw_config, client_name=os.path.basename(os.path.dirname(os.path.abspath(config_path))))
+    if errors:
+        logger.error("Configuração inválida em %s: %s. Pulando.", config_path, '; '.join(errors))
+        return None
+
+    # load_client_config pode ter gravado o FIRST_RUN_TIMESTAMP: o carimbo é lido depois.
+    stat = os.stat(config_path)
+    with _cache_lock:
+        _cache[config_path] = {'stamp': (stat.st_mtime_ns, stat.st_size), 'config': config}
+    return dict(config)
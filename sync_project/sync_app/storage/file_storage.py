@@ -3,6 +3,20 @@ import json
 import os
 from datetime import datetime, timezone
 
+from ..core.log import get_logger
+
+logger = get_logger(__name__)
+
+def write_json_atomic(path, data, indent=None):
+    """
+    Grava data como JSON em path de forma atômica: escreve um arquivo temporário ao
+    lado e o renomeia, para que uma interrupção nunca deixe o arquivo pela metade.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
 def load_client_config(config_path):
     """
     Carrega o arquivo de configuração do cliente (config.json).
@@ -12,22 +26,34 @@ def load_client_config(config_path):
         config_path (str): O caminho para o arquivo config.json.
 
     Returns:
-        dict or None: O dicionário de configuração ou None se o arquivo não existir.
+        dict or None: O dicionário de configuração ou None se o arquivo não existir,
+            não puder ser lido ou não for um objeto JSON válido (o cliente é pulado).
     """
     if not os.path.exists(config_path):
-        print(f"AVISO: '{os.path.basename(config_path)}' não encontrado. Pulando.")
+        logger.warning("'%s' não encontrado. Pulando.", os.path.basename(config_path))
         return None
 
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("Não foi possível ler '%s': %s. Pulando.", config_path, e)
+        return None
+    if not isinstance(config, dict):
+        logger.error("'%s' não contém um objeto JSON. Pulando.", config_path)
+        return None
 
     # Se for a primeira execução para este cliente, registra o timestamp
     if 'FIRST_RUN_TIMESTAMP' not in config:
         now_iso = datetime.now(timezone.utc).isoformat()
         config['FIRST_RUN_TIMESTAMP'] = now_iso
-        print(f"PRIMEIRA EXECUÇÃO DETECTADA. Registrando data de corte: {now_iso}")
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4)
+        logger.info("PRIMEIRA EXECUÇÃO DETECTADA. Registrando data de corte: %s", now_iso)
+        try:
+            write_json_atomic(config_path, config, indent=4)
+        except OSError as e:
+            # Sem a data de corte gravada, a próxima execução registraria outra. Pulando.
+            logger.error("Não foi possível gravar o FIRST_RUN_TIMESTAMP em '%s': %s. Pulando.", config_path, e)
+            return None
             
     return config
 
@@ -48,9 +74,9 @@ def load_mapping_data(mapping_path):
             try:
                 mapping_data = json.load(f)
             except json.JSONDecodeError:
-                print(f"AVISO: '{os.path.basename(mapping_path)}' corrompido. Iniciando um novo.")
+                logger.warning("'%s' corrompido. Iniciando um novo.", os.path.basename(mapping_path))
     else:
-        print(f"AVISO: '{os.path.basename(mapping_path)}' não encontrado. Um novo será criado.")
+        logger.warning("'%s' não encontrado. Um novo será criado.", os.path.basename(mapping_path))
     return mapping_data
 
 def save_mapping_data(mapping_path, mapping_data):
@@ -62,8 +88,9 @@ def save_mapping_data(mapping_path, mapping_data):
         mapping_data (dict): O dicionário de mapeamento a ser salvo.
     """
     try:
-        with open(mapping_path, 'w', encoding='utf-8') as f:
-            json.dump(mapping_data, f, indent=4)
-        print(f"Mapeamento salvo com sucesso em {mapping_path}")
+        # Escrita atômica: o arquivo é regravado a cada checkpoint do ciclo, e um
+        # mapping.json truncado faria o próximo ciclo recriar todos os tickets.
+        write_json_atomic(mapping_path, mapping_data, indent=4)
+        logger.info("Mapeamento salvo com sucesso em %s", mapping_path)
     except Exception as e:
-        print(f"ERRO CRÍTICO: Falha ao salvar o arquivo de mapeamento em {mapping_path}. Detalhes: {e}")
\ No newline at end of file
+        logger.error("ERRO CRÍTICO: Falha ao salvar o arquivo de mapeamento em %s. Detalhes: %s", mapping_path, e)
\ No newline at end of file
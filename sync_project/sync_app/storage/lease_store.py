@@ -0,0 +1,241 @@
+# sync_app/storage/lease_store.py
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from ..core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Nome do banco de leases, criado na raiz da pasta de clientes (volume compartilhado).
+LEASE_DB_FILENAME = '.leases.sqlite3'
+# Tempo de validade padrão de um lease/heartbeat, em segundos.
+DEFAULT_LEASE_TTL = 300
+
+def default_node_id():
+    """Identificador do nó: hostname do contêiner + PID."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leases (
+            client TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            token INTEGER NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS nodes (
+            node_id TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+def register_node(db_path, node_id, ttl=DEFAULT_LEASE_TTL):
+    """Registra (ou renova) o heartbeat do nó. Nós sem heartbeat dentro do TTL são considerados mortos."""
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO nodes (node_id, expires_at) VALUES (?, ?) "
+            "ON CONFLICT(node_id) DO UPDATE SET expires_at = excluded.expires_at",
+            (node_id, time.time() + ttl)
+        )
+    finally:
+        conn.close()
+
+def unregister_node(db_path, node_id):
+    """Remove o nó, liberando sua fatia para os demais imediatamente."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
+    finally:
+        conn.close()
+
+def claim_clients(db_path, node_id, client_names, ttl=DEFAULT_LEASE_TTL):
+    """
+    Tenta obter leases para a fatia justa de clientes deste nó.
+
+    A fatia é ceil(clientes / nós vivos). Leases expirados (de nós que morreram)
+    podem ser tomados por qualquer nó, o que rebalanceia o trabalho automaticamente.
+
+    Args:
+        db_path (str): Caminho do banco SQLite compartilhado.
+        node_id (str): Identificador deste nó.
+        client_names (list): Todos os clientes existentes.
+        ttl (int): Validade do lease em segundos.
+
+    Returns:
+        dict: Nome do cliente -> lease ({'db_path', 'client', 'owner', 'token'}).
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        # BEGIN IMMEDIATE serializa as disputas entre nós pelo lock de escrita do SQLite.
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM nodes WHERE expires_at < ?", (now,))
+        live_nodes = conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0] or 1
+        target = math.ceil(len(client_names) / live_nodes)
+
+        rows = conn.execute("SELECT client, owner, token, expires_at FROM leases").fetchall()
+        current = {client: (owner, token, expires_at) for client, owner, token, expires_at in rows}
+
+        claimed = {}
+        # Primeiro renova os leases que já são nossos (posse estável entre ciclos).
+        for client in client_names:
+            owner, token, expires_at = current.get(client, (None, 0, 0))
+            if owner == node_id and expires_at >= now and len(claimed) < target:
+                conn.execute("UPDATE leases SET expires_at = ? WHERE client = ?", (now + ttl, client))
+                claimed[client] = token
+        # Depois toma clientes livres ou com lease expirado até completar a fatia.
+        for client in client_names:
+            if len(claimed) >= target:
+                break
+            if client in claimed:
+                continue
+            owner, token, expires_at = current.get(client, (None, 0, 0))
+            if owner is not None and expires_at >= now:
+                continue
+            new_token = token + 1
+            conn.execute(
+                "INSERT INTO leases (client, owner, token, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(client) DO UPDATE SET owner = excluded.owner, token = excluded.token, "
+                "expires_at = excluded.expires_at",
+                (client, node_id, new_token, now + ttl)
+            )
+            claimed[client] = new_token
+        # Leases deste nó acima da fatia são devolvidos para os outros nós.
+        for client, (owner, _, _) in current.items():
+            if owner == node_id and client not in claimed:
+                conn.execute("UPDATE leases SET expires_at = 0 WHERE client = ? AND owner = ?", (client, node_id))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    return {
+        client: {'db_path': db_path, 'client': client, 'owner': node_id, 'token': token}
+        for client, token in claimed.items()
+    }
+
+def renew_leases(leases, ttl=DEFAULT_LEASE_TTL):
+    """
+    Renova os leases ainda pertencentes a este nó. Leases perdidos (tomados por
+    outro nó após expirar) são marcados com 'lost' e não podem mais gravar.
+    """
+    if not leases:
+        return
+    current = list(leases.values())
+    conn = _connect(current[0]['db_path'])
+    try:
+        for lease in current:
+            cursor = conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE client = ? AND owner = ? AND token = ?",
+                (time.time() + ttl, lease['client'], lease['owner'], lease['token'])
+            )
+            if cursor.rowcount == 0:
+                lease['lost'] = True
+    finally:
+        conn.close()
+
+def holds_lease(lease):
+    """
+    Verifica (token de fencing) se o lease ainda é deste nó e está válido.
+    Deve ser chamado imediatamente antes de gravar o mapping.json do cliente ou de
+    criar tickets. Um lease perdido fica marcado ('lost'): o token não volta a valer.
+    """
+    if lease.get('lost'):
+        return False
+    conn = _connect(lease['db_path'])
+    try:
+        row = conn.execute(
+            "SELECT owner, token, expires_at FROM leases WHERE client = ?", (lease['client'],)
+        ).fetchone()
+    finally:
+        conn.close()
+    held = bool(row) and row[0] == lease['owner'] and row[1] == lease['token'] and row[2] >= time.time()
+    if not held:
+        lease['lost'] = True
+    return held
+
+def release_leases(leases):
+    """
+    Libera os leases deste nó para que outro nó possa assumi-los sem esperar a
+    expiração. A linha continua no banco (expirada), com o token atual: quem assumir
+    recebe o token seguinte.
+    """
+    if not leases:
+        return
+    db_path = next(iter(leases.values()))['db_path']
+    conn = _connect(db_path)
+    try:
+        for lease in leases.values():
+            conn.execute(
+                "UPDATE leases SET expires_at = 0 WHERE client = ? AND owner = ? AND token = ?",
+                (lease['client'], lease['owner'], lease['token'])
+            )
+    finally:
+        conn.close()
+
+def start_node(db_path, node_id, ttl=DEFAULT_LEASE_TTL):
+    """
+    Registra o nó e inicia uma thread que renova o heartbeat do nó e os seus leases
+    a cada ttl/3 segundos. Deve durar o processo inteiro (inclusive o intervalo entre
+    ciclos): um nó sem heartbeat deixa de contar na divisão dos clientes.
+
+    Returns:
+        dict: Estado do nó ({'db_path', 'node_id', 'ttl', 'leases', ...}), usado por
+        claim_for_node e stop_node.
+    """
+    register_node(db_path, node_id, ttl)
+    node = {
+        'db_path': db_path,
+        'node_id': node_id,
+        'ttl': ttl,
+        'leases': {},
+        'lock': threading.Lock(),
+        'stop': threading.Event(),
+    }
+
+    def _beat():
+        while not node['stop'].wait(ttl / 3.0):
+            try:
+                with node['lock']:
+                    register_node(db_path, node_id, ttl)
+                    renew_leases(node['leases'], ttl)
+            except sqlite3.Error as e:
+                logger.warning("Falha ao renovar leases do nó %s: %s", node_id, e)
+
+    threading.Thread(target=_beat, name=f"lease-heartbeat-{node_id}", daemon=True).start()
+    return node
+
+def claim_for_node(node, client_names):
+    """
+    Reavalia a fatia do nó no início de um ciclo (ver claim_clients). Os leases que o
+    nó já tem são mantidos enquanto couberem na fatia, então a posse fica estável entre
+    ciclos; os que sobram são devolvidos e o heartbeat deixa de renová-los.
+
+    Returns:
+        dict: Nome do cliente -> lease, válido até o próximo claim_for_node.
+    """
+    with node['lock']:
+        register_node(node['db_path'], node['node_id'], node['ttl'])
+        claimed = claim_clients(node['db_path'], node['node_id'], client_names, node['ttl'])
+        node['leases'].clear()
+        node['leases'].update(claimed)
+    return claimed
+
+def stop_node(node):
+    """Encerra o heartbeat, libera os leases e remove o nó (desligamento do processo)."""
+    node['stop'].set()
+    with node['lock']:
+        release_leases(node['leases'])
+        node['leases'].clear()
+        unregister_node(node['db_path'], node['node_id'])
@@ -0,0 +1,74 @@
+# sync_app/storage/mapping_archive.py
+import json
+import os
+import sqlite3
+import time
+
+# Arquivo morto do mapeamento (pares encerrados e sem atividade), na pasta de cada cliente.
+ARCHIVE_FILENAME = 'mapping_archive.sqlite3'
+
+def get_archive_path(client_folder_path):
+    """Retorna o caminho do arquivo morto do mapeamento do cliente."""
+    return os.path.join(client_folder_path, ARCHIVE_FILENAME)
+
+def _connect(archive_path):
+    conn = sqlite3.connect(archive_path, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_pairs (
+            jira_key TEXT PRIMARY KEY,
+            freshdesk_id INTEGER NOT NULL,
+            entry TEXT NOT NULL,
+            archived_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_freshdesk_id ON archived_pairs (freshdesk_id)")
+    return conn
+
+def archive_pairs(archive_path, entries):
+    """
+    Grava pares do mapeamento no arquivo morto (substituindo versões anteriores).
+
+    Args:
+        archive_path (str): Caminho do arquivo morto.
+        entries (dict): {chave_jira: entrada_do_mapeamento}.
+    """
+    if not entries:
+        return
+    now = time.time()
+    conn = _connect(archive_path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO archived_pairs (jira_key, freshdesk_id, entry, archived_at) VALUES (?, ?, ?, ?)",
+                [(key, int(entry['freshdesk_id']), json.dumps(entry), now) for key, entry in entries.items()]
+            )
+    finally:
+        conn.close()
+
+def find_pairs(archive_path, jira_keys=(), freshdesk_ids=()):
+    """
+    Procura no arquivo morto os pares de algumas chaves do Jira e/ou IDs do Freshdesk.
+
+    Returns:
+        dict: {chave_jira: entrada_do_mapeamento} dos pares encontrados.
+    """
+    if not os.path.exists(archive_path):
+        return {}
+    jira_keys = list(jira_keys)
+    freshdesk_ids = [int(fd_id) for fd_id in freshdesk_ids]
+    found = {}
+    conn = _connect(archive_path)
+    try:
+        # Consultas em lotes (limite de parâmetros do SQLite).
+        for column, values in (('jira_key', jira_keys), ('freshdesk_id', freshdesk_ids)):
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT jira_key, entry FROM archived_pairs WHERE {column} IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for jira_key, entry in rows:
+                    found[jira_key] = json.loads(entry)
+    finally:
+        conn.close()
+    return found
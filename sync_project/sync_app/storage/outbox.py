@@ -0,0 +1,206 @@
+# sync_app/storage/outbox.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Nome do arquivo da fila de saída, criado na pasta de cada cliente.
+OUTBOX_FILENAME = 'outbox.sqlite3'
+# Itens concluídos são mantidos (para deduplicação por idempotency key) por este período.
+DONE_RETENTION_SECONDS = 30 * 24 * 3600
+
+def get_outbox_path(client_folder_path):
+    """Retorna o caminho da fila de saída do cliente."""
+    return os.path.join(client_folder_path, OUTBOX_FILENAME)
+
+# Conexões abertas, por thread e por arquivo: reutilizadas durante o ciclo do cliente.
+_local = threading.local()
+
+def _connect(outbox_path):
+    conn = sqlite3.connect(outbox_path, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT NOT NULL UNIQUE,
+            coalesce_key TEXT,
+            kind TEXT NOT NULL,
+            target TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            result TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_attempt_at)")
+    conn.commit()
+    return conn
+
+def _connection(outbox_path):
+    """Conexão da thread atual com a fila (aberta na primeira chamada e reutilizada até close)."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(outbox_path)
+    if conn is None:
+        conn = connections[outbox_path] = _connect(outbox_path)
+    return conn
+
+def commit(outbox_path):
+    """
+    Torna duráveis os itens enfileirados desde o último commit. Deve ser chamado
+    antes de salvar o mapeamento que considera esses itens já enfileirados.
+    """
+    conn = getattr(_local, 'connections', {}).get(outbox_path)
+    if conn is not None:
+        conn.commit()
+
+def close(outbox_path):
+    """Grava os itens pendentes e fecha a conexão da thread atual com a fila."""
+    conn = getattr(_local, 'connections', {}).pop(outbox_path, None)
+    if conn is not None:
+        conn.commit()
+        conn.close()
+
+def enqueue(outbox_path, kind, target, payload, idempotency_key, coalesce_key=None):
+    """
+    Registra uma escrita pendente na fila de saída do cliente.
+
+    Um item com a mesma idempotency_key nunca é enfileirado duas vezes (nem depois
+    de concluído). Se coalesce_key for informada, itens pendentes ou com falha com a
+    mesma chave são descartados, pois o novo item os torna redundantes (ex.: vários
+    updates de status do mesmo ticket: só o último importa; um antigo com falha não
+    pode voltar com replay_failed depois do novo).
+
+    O item entra na transação aberta da conexão do ciclo, sem commit próprio (um
+    fsync por comentário limitaria a leitura dos tickets): ele só é durável depois
+    de commit() ou close(), ou da próxima operação da fila que grava.
+
+    Args:
+        outbox_path (str): Caminho do arquivo da fila.
+        kind (str): Tipo da escrita (ex.: 'freshdesk_note', 'jira_comment').
+        target (str or int): Ticket de destino (ID do Freshdesk ou chave do Jira).
+        payload (dict): Dados necessários para executar a escrita.
+        idempotency_key (str): Identificador único da escrita.
+        coalesce_key (str, optional): Chave de agrupamento de itens redundantes.
+
+    Returns:
+        bool: True se o item foi enfileirado, False se já existia.
+    """
+    now = time.time()
+    conn = _connection(outbox_path)
+    if conn.execute("SELECT 1 FROM outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone():
+        return False
+    if coalesce_key:
+        conn.execute(
+            "DELETE FROM outbox WHERE coalesce_key = ? AND status IN ('pending', 'failed')", (coalesce_key,)
+        )
+    conn.execute(
+        "INSERT INTO outbox (idempotency_key, coalesce_key, kind, target, payload, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (idempotency_key, coalesce_key, kind, str(target), json.dumps(payload), now, now)
+    )
+    return True
+
+def fetch_due_items(outbox_path):
+    """
+    Retorna os itens pendentes cuja próxima tentativa já venceu, em ordem de criação.
+
+    Returns:
+        list: Dicionários com os campos do item ('payload' já decodificado).
+    """
+    if not os.path.exists(outbox_path):
+        return []
+    conn = _connection(outbox_path)
+    rows = conn.execute(
+        "SELECT id, idempotency_key, kind, target, payload, attempts FROM outbox "
+        "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id",
+        (time.time(),)
+    ).fetchall()
+    return [
+        {'id': row[0], 'idempotency_key': row[1], 'kind': row[2], 'target': row[3],
+         'payload': json.loads(row[4]), 'attempts': row[5]}
+        for row in rows
+    ]
+
+def mark_done(outbox_path, item_id, result=None):
+    """Marca o item como concluído, guardando o resultado da API (se houver)."""
+    conn = _connection(outbox_path)
+    with conn:
+        conn.execute(
+            "UPDATE outbox SET status = 'done', result = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), item_id)
+        )
+
+def mark_failed(outbox_path, item_id, error, retry_delay, max_attempts):
+    """
+    Registra uma falha. O item volta para a fila após retry_delay segundos, ou fica
+    como 'failed' quando atinge max_attempts (para inspeção manual / replay).
+    """
+    now = time.time()
+    conn = _connection(outbox_path)
+    with conn:
+        conn.execute(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+            "next_attempt_at = ?, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+            "WHERE id = ?",
+            (str(error), now, now + retry_delay, max_attempts, item_id)
+        )
+
+def mark_skipped(outbox_path, item_id, error):
+    """
+    Encerra o item sem executá-lo ('skipped'), quando tentar de novo não adianta
+    (ex.: anexo acima do limite de tamanho). Como os concluídos, ele continua
+    ocupando a idempotency_key e não volta com replay_failed.
+    """
+    conn = _connection(outbox_path)
+    with conn:
+        conn.execute(
+            "UPDATE outbox SET status = 'skipped', last_error = ?, updated_at = ? WHERE id = ?",
+            (str(error), time.time(), item_id)
+        )
+
+def replay_failed(outbox_path):
+    """
+    Devolve para a fila todos os itens que esgotaram as tentativas.
+
+    Returns:
+        int: Quantidade de itens reenfileirados.
+    """
+    if not os.path.exists(outbox_path):
+        return 0
+    conn = _connection(outbox_path)
+    with conn:
+        cursor = conn.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0, updated_at = ? "
+            "WHERE status = 'failed'",
+            (time.time(),)
+        )
+    return cursor.rowcount
+
+def prune_done(outbox_path, retention_seconds=DONE_RETENTION_SECONDS):
+    """Remove itens concluídos (ou descartados) há mais de retention_seconds."""
+    if not os.path.exists(outbox_path):
+        return
+    conn = _connection(outbox_path)
+    with conn:
+        conn.execute(
+            "DELETE FROM outbox WHERE status IN ('done', 'skipped') AND updated_at < ?",
+            (time.time() - retention_seconds,)
+        )
+
+def pending_targets(outbox_path):
+    """
+    Retorna os tickets de destino (IDs do Freshdesk e chaves do Jira, como texto)
+    que ainda têm escritas pendentes ou com falha na fila.
+    """
+    if not os.path.exists(outbox_path):
+        return set()
+    conn = _connection(outbox_path)
+    rows = conn.execute("SELECT DISTINCT target FROM outbox WHERE status IN ('pending', 'failed')").fetchall()
+    return {row[0] for row in rows}
@@ -0,0 +1,81 @@
+# sync_app/storage/run_journal.py
+import gzip
+import json
+import os
+import time
+
+from ..core.records import FreshdeskTicket, JiraIssue
+from .file_storage import write_json_atomic
+
+# Diário do ciclo em andamento e cópia das listas buscadas, na pasta de cada cliente.
+JOURNAL_FILENAME = 'run_journal.json'
+FETCH_CACHE_FILENAME = 'run_fetch_cache.json.gz'
+# Um ciclo interrompido só é retomado dentro deste prazo (segundos); depois disso as
+# listas buscadas já estão desatualizadas e o ciclo recomeça do zero.
+DEFAULT_MAX_AGE = 30 * 60
+
+def get_journal_path(client_folder_path):
+    """Retorna o caminho do diário de execução do cliente."""
+    return os.path.join(client_folder_path, JOURNAL_FILENAME)
+
+def _fetch_cache_path(journal_path):
+    return os.path.join(os.path.dirname(journal_path), FETCH_CACHE_FILENAME)
+
+def new_journal(since_date):
+    """Cria (em memória) o diário de um novo ciclo."""
+    return {'started_at': time.time(), 'since_date': since_date, 'phases_done': [], 'positions': {}}
+
+def load_resumable(journal_path, max_age=DEFAULT_MAX_AGE):
+    """
+    Carrega o diário de um ciclo interrompido, se ainda puder ser retomado.
+
+    Returns:
+        dict or None: O diário ou None se não houver ciclo a retomar.
+    """
+    if not os.path.exists(journal_path) or not os.path.exists(_fetch_cache_path(journal_path)):
+        return None
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            journal = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if time.time() - journal.get('started_at', 0) > max_age:
+        return None
+    return journal
+
+def save(journal_path, journal):
+    """Grava o diário (escrita atômica)."""
+    write_json_atomic(journal_path, journal)
+
+def save_fetched(journal_path, jira_tickets, freshdesk_tickets):
+    """
+    Guarda as listas buscadas (JiraIssue e FreshdeskTicket), para que um ciclo
+    retomado não precise buscá-las de novo.
+    """
+    path = _fetch_cache_path(journal_path)
+    tmp_path = f"{path}.tmp"
+    # Compressão mínima: a cópia precisa ser rápida, não pequena.
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        json.dump({'jira': [t.to_dict() for t in jira_tickets],
+                   'freshdesk': [t.to_dict() for t in freshdesk_tickets]}, f)
+    os.replace(tmp_path, path)
+
+def load_fetched(journal_path):
+    """
+    Returns:
+        tuple or None: (tickets_jira, tickets_freshdesk) guardados, ou None (inclusive
+            para uma cópia em formato antigo, que faz o ciclo buscar as listas de novo).
+    """
+    try:
+        with gzip.open(_fetch_cache_path(journal_path), 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        return ([JiraIssue.from_dict(t) for t in data['jira']],
+                [FreshdeskTicket.from_dict(t) for t in data['freshdesk']])
+    except (OSError, EOFError, json.JSONDecodeError, KeyError, TypeError):
+        return None
+
+def clear(journal_path):
+    """Remove o diário e as listas guardadas (ciclo concluído)."""
+    for path in (journal_path, _fetch_cache_path(journal_path)):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,52 @@
+# sync_app/storage/sync_status.py
+import json
+import os
+import time
+
+from .file_storage import write_json_atomic
+
+# Resumo do último ciclo de cada cliente, na pasta do cliente. É um arquivo pequeno,
+# para que o gerenciador de clientes mostre a situação sem ler o mapping.json.
+STATUS_FILENAME = 'sync_status.json'
+
+# Situações possíveis do último ciclo.
+STATUS_OK = 'ok'
+STATUS_INCOMPLETE = 'incompleto'
+STATUS_ERROR = 'erro'
+
+def get_status_path(client_folder_path):
+    """Retorna o caminho do resumo do último ciclo do cliente."""
+    return os.path.join(client_folder_path, STATUS_FILENAME)
+
+def load(client_folder_path):
+    """
+    Returns:
+        dict or None: {'status', 'message', 'last_run_at', 'last_success_at', 'mapped_pairs'}
+            ou None se o cliente ainda não tiver resumo.
+    """
+    try:
+        with open(get_status_path(client_folder_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def record(client_folder_path, status, message=None, mapped_pairs=None):
+    """
+    Registra o resultado do ciclo que acabou de terminar (escrita atômica).
+
+    Args:
+        client_folder_path (str): Pasta do cliente.
+        status (str): STATUS_OK, STATUS_INCOMPLETE ou STATUS_ERROR.
+        message (str, optional): Detalhe do problema, se houver.
+        mapped_pairs (int, optional): Pares ativos no mapeamento ao final do ciclo.
+    """
+    previous = load(client_folder_path) or {}
+    now = time.time()
+    data = {
+        'status': status,
+        'message': message,
+        'last_run_at': now,
+        'last_success_at': now if status == STATUS_OK else previous.get('last_success_at'),
+        'mapped_pairs': mapped_pairs if mapped_pairs is not None else previous.get('mapped_pairs'),
+    }
+    write_json_atomic(get_status_path(client_folder_path), data)
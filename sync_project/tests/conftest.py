@@ -0,0 +1,32 @@
+# tests/conftest.py
+import os
+import sys
+import threading
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks import mock_server
+
+@pytest.fixture
+def mock_api():
+    """
+    Sobe o servidor de benchmark (Jira e Freshdesk) em uma thread.
+    Retorna uma função settings -> url_base; os servidores são encerrados no fim do teste.
+    """
+    servers = []
+
+    def start(**overrides):
+        settings = dict(mock_server.default_settings(), **overrides)
+        server = mock_server.create_server(0, settings)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
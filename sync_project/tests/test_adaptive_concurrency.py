@@ -0,0 +1,31 @@
+# tests/test_adaptive_concurrency.py
+from sync_app.core import network
+
+def _feed(host, latency, windows=1):
+    state = network._get_concurrency(host)
+    for _ in range(network.LATENCY_WINDOW * windows):
+        network._observe_latency(state, host, latency)
+    return state
+
+def test_jitter_on_a_fast_host_does_not_cut_concurrency():
+    host = 'latencia-rapida.invalid'
+    state = _feed(host, 0.03)
+    state['limit'] = 16.0
+    # Mais que o dobro da referência, mas só 40 ms acima dela.
+    _feed(host, 0.07)
+    assert state['limit'] == 16.0
+
+def test_real_slowdown_halves_concurrency():
+    host = 'latencia-lenta.invalid'
+    state = _feed(host, 0.03)
+    state['limit'] = 16.0
+    _feed(host, 0.5)
+    assert state['limit'] == 8.0
+
+def test_min_increase_is_configurable(monkeypatch):
+    monkeypatch.setenv(network.LATENCY_MIN_INCREASE_ENV, '10')
+    host = 'latencia-configurada.invalid'
+    state = _feed(host, 0.03)
+    state['limit'] = 16.0
+    _feed(host, 0.07)
+    assert state['limit'] == 8.0
@@ -0,0 +1,25 @@
+# tests/test_background_lane.py
+import time
+
+from sync_app.core import network
+
+def test_background_lane_is_capped_without_host_limit():
+    host = 'faixa-sem-limite.invalid'
+    started_at = time.monotonic()
+    # Sem limite no host, a requisição normal não espera.
+    network._acquire_rate_budget(host)
+    assert time.monotonic() - started_at < 0.05
+
+    with network.background_lane(20, max_per_minute=600):
+        started_at = time.monotonic()
+        for _ in range(5):
+            network._acquire_rate_budget(host)
+    # 600/min = uma requisição a cada 0,1 s.
+    assert time.monotonic() - started_at >= 0.45
+
+def test_run_budget_ends_at_deadline():
+    network.start_run_budget(None, deadline=time.monotonic() + 60)
+    assert not network.run_budget_exhausted()
+    network.start_run_budget(None, deadline=time.monotonic() - 1)
+    assert network.run_budget_exhausted()
+    network.start_run_budget(None)
@@ -0,0 +1,38 @@
+# tests/test_circuit_breaker.py
+import time
+
+import requests
+
+from sync_app.core import network
+
+def _open_circuit(host):
+    for _ in range(network.CIRCUIT_FAILURE_THRESHOLD):
+        network._record_failure(host)
+    # Dispensa a espera até a sondagem.
+    network._get_circuit(host)['retry_at'] = time.monotonic() - 1
+
+def test_probe_without_response_does_not_block_host(monkeypatch):
+    url = 'http://circuito-redirect.invalid/api'
+    host = network.get_host(url)
+    _open_circuit(host)
+
+    def too_many_redirects(*args, **kwargs):
+        raise requests.exceptions.TooManyRedirects("Exceeded 30 redirects.")
+
+    monkeypatch.setattr(network, '_send', too_many_redirects)
+    assert network.api_request('GET', url, None) is None
+    assert not network.is_circuit_open(url)
+    # A sondagem foi liberada: a próxima requisição pode sondar de novo.
+    assert network._circuit_allows(host)
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    url = 'http://circuito-timeout.invalid/api'
+    host = network.get_host(url)
+    _open_circuit(host)
+
+    def timeout(*args, **kwargs):
+        raise requests.exceptions.Timeout("read timeout")
+
+    monkeypatch.setattr(network, '_send', timeout)
+    assert network.api_request('GET', url, None) is None
+    assert network.is_circuit_open(url)
@@ -0,0 +1,47 @@
+# tests/test_client_config.py
+import json
+
+from sync_app.services import orchestrator, sync_service
+from sync_app.storage import client_config
+
+def _write_client(clients_root, name, content):
+    folder = clients_root / name
+    folder.mkdir()
+    (folder / 'config.json').write_text(content, encoding='utf-8')
+    return folder
+
+def test_malformed_config_skips_only_that_client(tmp_path, monkeypatch):
+    valid = {'JIRA_URL': 'https://exemplo.atlassian.net', 'JIRA_USER_EMAIL': 'a@exemplo.com',
+             'JIRA_API_TOKEN': 'token', 'JIRA_PROJECT_KEY': 'JAR', 'FRESHDESK_DOMAIN': 'exemplo',
+             'FRESHDESK_API_KEY': 'chave'}
+    _write_client(tmp_path, 'bom', json.dumps(valid))
+    bad_folder = _write_client(tmp_path, 'quebrado', '{"JIRA_URL": "https://exemplo",')
+    _write_client(tmp_path, 'lista', '[]')
+
+    assert sync_service.prepare_client_config(str(bad_folder), 'quebrado') is None
+
+    processed = []
+    monkeypatch.setattr(orchestrator, 'prefetch_shared_tickets', lambda clients: ({}, {}))
+    monkeypatch.setattr(sync_service, 'process_client', lambda folder, name, **kwargs: processed.append(name))
+    orchestrator.run_all_clients(str(tmp_path))
+    assert processed == ['bom']
+
+def test_identity_keys_only_take_client_scoped_overrides():
+    raw = {'JIRA_URL': 'https://acme.atlassian.net', 'JIRA_USER_EMAIL': 'a@acme.com',
+           'JIRA_API_TOKEN': 'token', 'JIRA_PROJECT_KEY': 'ACM', 'FRESHDESK_DOMAIN': 'acme',
+           'FRESHDESK_API_KEY': 'chave', 'FRESHDESK_COMPANY_ID': '7'}
+    environ = {'JIRA_URL': 'https://outro.atlassian.net', 'JIRA_PROJECT_KEY': 'OUT',
+               'FRESHDESK_COMPANY_ID': '99', 'BATCH_COMMENTS': 'true',
+               'SYNC_CLIENTE_A_JIRA_API_TOKEN': 'token-do-cliente'}
+
+    config, errors = client_config.build_config(raw, environ, client_name='cliente-a')
+    assert not errors
+    assert config['JIRA_URL'] == 'https://acme.atlassian.net'
+    assert config['JIRA_PROJECT_KEY'] == 'ACM'
+    assert config['FRESHDESK_COMPANY_ID'] == '7'
+    assert config['JIRA_API_TOKEN'] == 'token-do-cliente'
+    # Opções de comportamento continuam aceitando a variável global.
+    assert config['BATCH_COMMENTS'] is True
+
+    other, _ = client_config.build_config(raw, environ, client_name='outro')
+    assert other['JIRA_API_TOKEN'] == 'token'
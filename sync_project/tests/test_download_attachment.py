@@ -0,0 +1,40 @@
+# tests/test_download_attachment.py
+from sync_app.core import cassette, network
+
+def test_download_resumes_after_connection_drops(mock_api, tmp_path):
+    # Cada resposta cai após 20000 bytes: só termina se o que chegou for gravado e retomado.
+    base_url = mock_api(attachment_bytes=65536, attachment_cut_bytes=20000)
+    file_path = tmp_path / 'anexo.bin'
+
+    assert network.download_attachment(f"{base_url}/files/resume", str(file_path))
+    assert file_path.stat().st_size == 65536
+    assert not (tmp_path / 'anexo.bin.part').exists()
+
+def test_download_without_drops(mock_api, tmp_path):
+    base_url = mock_api(attachment_bytes=300000)
+    file_path = tmp_path / 'anexo.bin'
+
+    assert network.download_attachment(f"{base_url}/files/inteiro", str(file_path))
+    assert file_path.stat().st_size == 300000
+
+def test_stale_partial_on_last_attempt_returns_false(mock_api, tmp_path, monkeypatch):
+    # Parcial maior que o arquivo: o servidor responde 416 e não sobra tentativa para recomeçar.
+    base_url = mock_api(attachment_bytes=1000)
+    url = f"{base_url}/files/parcial"
+    host = network.get_host(url)
+    circuit = network._get_circuit(host)
+    circuit.update(state='open', failures=network.CIRCUIT_FAILURE_THRESHOLD, retry_at=0.0)
+    (tmp_path / 'anexo.bin.part').write_bytes(b'\0' * 2000)
+    monkeypatch.setattr(network, 'DOWNLOAD_MAX_RESUMES', 0)
+
+    assert network.download_attachment(url, str(tmp_path / 'anexo.bin')) is False
+    # A sondagem half-open recebeu resposta: o circuito fechou.
+    assert circuit['state'] == 'closed' and not circuit['probing']
+    # O próximo download recomeça do zero e termina.
+    assert network.download_attachment(url, str(tmp_path / 'anexo.bin'))
+
+def test_download_without_drops_in_record_mode(mock_api, tmp_path, monkeypatch):
+    # A gravação da cassete lê o corpo inteiro antes do download.
+    monkeypatch.setenv(cassette.MODE_ENV, 'record')
+    monkeypatch.setenv(cassette.DIR_ENV, str(tmp_path / 'cassetes'))
+    test_download_without_drops(mock_api, tmp_path)
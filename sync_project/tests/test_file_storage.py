@@ -0,0 +1,23 @@
+# tests/test_file_storage.py
+import json
+
+from sync_app.storage import file_storage
+
+def test_failed_mapping_save_keeps_the_previous_file(tmp_path):
+    mapping_path = str(tmp_path / 'mapping.json')
+    file_storage.save_mapping_data(mapping_path, {'JAR-1': {'freshdesk_id': 1}})
+    # Um valor que não é serializável interrompe a gravação no meio do JSON.
+    file_storage.save_mapping_data(mapping_path, {'JAR-1': {'freshdesk_id': 1}, 'JAR-2': {'freshdesk_id': object()}})
+
+    assert file_storage.load_mapping_data(mapping_path) == {'JAR-1': {'freshdesk_id': 1}}
+    with open(mapping_path, encoding='utf-8') as f:
+        assert f.read().startswith('{\n    "JAR-1"')
+
+def test_first_run_timestamp_is_written_atomically(tmp_path):
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({'JIRA_URL': 'https://teste.atlassian.net'}), encoding='utf-8')
+
+    config = file_storage.load_client_config(str(config_path))
+    assert 'FIRST_RUN_TIMESTAMP' in config
+    assert json.loads(config_path.read_text(encoding='utf-8')) == config
+    assert not (tmp_path / 'config.json.tmp').exists()
@@ -0,0 +1,34 @@
+# tests/test_http_cache.py
+import zlib
+
+from sync_app.core import http_cache
+
+def _entry(size):
+    return {'etag': '"x"', 'last_modified': None, 'body': b'x' * size, 'validated_at': 0.0}
+
+def test_memory_tier_is_capped_by_bytes(monkeypatch):
+    monkeypatch.setattr(http_cache, 'MEMORY_MAX_BYTES', 1000)
+    monkeypatch.setattr(http_cache, '_memory', http_cache.OrderedDict())
+    monkeypatch.setattr(http_cache, '_memory_size', {'bytes': 0})
+    for n in range(10):
+        http_cache._remember(f'k{n}', _entry(300))
+    assert http_cache._memory_size['bytes'] <= 1000
+    assert list(http_cache._memory) == ['k7', 'k8', 'k9']
+    # Regravar a mesma chave não conta o corpo duas vezes.
+    http_cache._remember('k9', _entry(300))
+    assert http_cache._memory_size['bytes'] == 900
+
+def test_large_bodies_are_read_from_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(http_cache, '_memory', http_cache.OrderedDict())
+    monkeypatch.setattr(http_cache, '_memory_size', {'bytes': 0})
+    monkeypatch.setattr(http_cache, '_db', dict(http_cache._db, conn=None))
+    http_cache.configure(str(tmp_path / http_cache.CACHE_DB_FILENAME))
+    try:
+        body = b'y' * (http_cache.MEMORY_MAX_ENTRY_BYTES + 1)
+        with http_cache._db['conn'] as conn:
+            conn.execute("INSERT INTO http_cache VALUES (?, ?, ?, ?, ?, ?)",
+                         ('grande', '"g"', None, zlib.compress(body), 10, 0.0))
+        assert http_cache.lookup('grande')['body'] == body
+        assert 'grande' not in http_cache._memory
+    finally:
+        http_cache._db['conn'].close()
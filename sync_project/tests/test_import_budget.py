@@ -0,0 +1,17 @@
+# tests/test_import_budget.py
+import os
+
+import pytest
+
+from benchmarks import import_budget
+
+def test_gui_import_defers_tkinter_and_requests():
+    failures = import_budget.check_gui_imports()
+    assert not failures, failures
+
+@pytest.mark.skipif(os.getenv('SYNC_CHECK_IMPORT_BUDGET') != '1',
+                    reason="tempo de importação depende da máquina; ative com SYNC_CHECK_IMPORT_BUDGET=1")
+def test_startup_stays_within_import_budget():
+    total_ms, _, failures = import_budget.check_budget(import_budget.DEFAULT_BUDGET_MS, runs=3)
+    assert not failures, failures
+    assert total_ms <= import_budget.DEFAULT_BUDGET_MS
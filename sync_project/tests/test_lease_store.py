@@ -0,0 +1,56 @@
+# tests/test_lease_store.py
+from sync_app.storage import lease_store
+
+def _claim(db_path, node_id, clients):
+    lease_store.register_node(db_path, node_id)
+    return lease_store.claim_clients(db_path, node_id, clients)
+
+def test_token_grows_when_a_released_lease_is_reclaimed(tmp_path):
+    db_path = str(tmp_path / lease_store.LEASE_DB_FILENAME)
+    old_lease = _claim(db_path, 'no-a', ['ACME'])['ACME']
+    lease_store.release_leases({'ACME': old_lease})
+    lease_store.unregister_node(db_path, 'no-a')
+
+    new_lease = _claim(db_path, 'no-b', ['ACME'])['ACME']
+    assert new_lease['token'] > old_lease['token']
+    assert lease_store.holds_lease(new_lease)
+
+    # O nó antigo volta com o lease de antes: não pode mais gravar nem criar tickets.
+    assert not lease_store.holds_lease(old_lease)
+    assert old_lease['lost']
+
+def test_reclaim_by_the_same_node_also_gets_a_new_token(tmp_path):
+    db_path = str(tmp_path / lease_store.LEASE_DB_FILENAME)
+    first = _claim(db_path, 'no-a', ['ACME'])['ACME']
+    lease_store.release_leases({'ACME': first})
+    second = _claim(db_path, 'no-a', ['ACME'])['ACME']
+    assert second['token'] == first['token'] + 1
+    assert not lease_store.holds_lease(first)
+
+def test_two_nodes_alternating_cycles_split_the_clients(tmp_path):
+    db_path = str(tmp_path / lease_store.LEASE_DB_FILENAME)
+    clients = [f'c{i}' for i in range(6)]
+    node_a = lease_store.start_node(db_path, 'no-a')
+    node_b = lease_store.start_node(db_path, 'no-b')
+    try:
+        # Ciclos alternados, com o outro nó "dormindo" entre os seus ciclos.
+        owned = {}
+        for _ in range(3):
+            owned['no-a'] = set(lease_store.claim_for_node(node_a, clients))
+            owned['no-b'] = set(lease_store.claim_for_node(node_b, clients))
+        assert len(owned['no-a']) == len(owned['no-b']) == 3
+        assert owned['no-a'] | owned['no-b'] == set(clients)
+
+        # A posse é estável: outro ciclo não troca clientes de dono.
+        assert set(lease_store.claim_for_node(node_a, clients)) == owned['no-a']
+        assert all(lease_store.holds_lease(lease) for lease in node_a['leases'].values())
+    finally:
+        lease_store.stop_node(node_a)
+        lease_store.stop_node(node_b)
+
+    # Os dois nós saíram: um novo nó assume todos os clientes.
+    node_c = lease_store.start_node(db_path, 'no-c')
+    try:
+        assert set(lease_store.claim_for_node(node_c, clients)) == set(clients)
+    finally:
+        lease_store.stop_node(node_c)
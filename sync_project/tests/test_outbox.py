@@ -0,0 +1,40 @@
+# tests/test_outbox.py
+import sqlite3
+
+from sync_app.storage import outbox
+
+def _count(outbox_path):
+    conn = sqlite3.connect(outbox_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_enqueued_items_are_durable_after_commit(tmp_path):
+    outbox_path = str(tmp_path / 'outbox.sqlite3')
+    for n in range(3):
+        assert outbox.enqueue(outbox_path, 'freshdesk_note', 1, {'body': str(n)}, idempotency_key=f"nota-{n}")
+    # Mesma conexão: a fila já enxerga os itens, mas outro processo ainda não.
+    assert len(outbox.fetch_due_items(outbox_path)) == 3
+    assert _count(outbox_path) == 0
+    outbox.commit(outbox_path)
+    assert _count(outbox_path) == 3
+    assert not outbox.enqueue(outbox_path, 'freshdesk_note', 1, {'body': '0'}, idempotency_key='nota-0')
+    outbox.close(outbox_path)
+
+def test_newer_status_supersedes_failed_one(tmp_path):
+    outbox_path = str(tmp_path / 'outbox.sqlite3')
+    outbox.enqueue(outbox_path, 'freshdesk_status', 1, {'status': 2},
+                   idempotency_key='fd-status:1:2@t1', coalesce_key='fd-status:1')
+    old_item = outbox.fetch_due_items(outbox_path)[0]
+    outbox.mark_failed(outbox_path, old_item['id'], 'erro', 0, max_attempts=1)
+
+    outbox.enqueue(outbox_path, 'freshdesk_status', 1, {'status': 4},
+                   idempotency_key='fd-status:1:4@t2', coalesce_key='fd-status:1')
+    new_item = outbox.fetch_due_items(outbox_path)[0]
+    outbox.mark_done(outbox_path, new_item['id'])
+
+    # O status antigo com falha não pode voltar depois do novo.
+    assert outbox.replay_failed(outbox_path) == 0
+    assert outbox.fetch_due_items(outbox_path) == []
+    outbox.close(outbox_path)
@@ -0,0 +1,32 @@
+# tests/test_outbox_attachments.py
+import sqlite3
+
+from sync_app.services import outbox_service
+from sync_app.storage import outbox
+
+def _status(outbox_path, idempotency_key):
+    conn = sqlite3.connect(outbox_path)
+    try:
+        return conn.execute("SELECT status, attempts FROM outbox WHERE idempotency_key = ?",
+                            (idempotency_key,)).fetchone()
+    finally:
+        conn.close()
+
+def test_oversized_attachment_is_skipped_without_retry(mock_api, tmp_path):
+    base_url = mock_api(attachment_bytes=2 * 1024 * 1024)
+    config = {'JIRA_URL': base_url, 'JIRA_AUTH': None, 'FRESHDESK_DOMAIN': 'teste',
+              'FRESHDESK_BASE_URL': base_url, 'FRESHDESK_AUTH': None, 'ATTACHMENT_MAX_MB': 1}
+    outbox_path = str(tmp_path / 'outbox.sqlite3')
+    mapping = {'JAR-1': {'freshdesk_id': 1, 'synced_attachments': []}}
+    outbox.enqueue(outbox_path, 'jira_attachment', 'JAR-1',
+                   {'source_url': f"{base_url}/files/grande", 'filename': 'grande.bin',
+                    'jira_key': 'JAR-1', 'attachment_ref': 'fd-1'},
+                   idempotency_key='attachment:fd-1->jira:JAR-1')
+
+    assert outbox_service.drain_outbox(outbox_path, config, mapping, str(tmp_path / 'tmp')) == (0, 1)
+    assert _status(outbox_path, 'attachment:fd-1->jira:JAR-1') == ('skipped', 0)
+    # Não volta para a fila: nem no próximo ciclo, nem com replay_failed.
+    assert outbox.fetch_due_items(outbox_path) == []
+    assert outbox.replay_failed(outbox_path) == 0
+    assert outbox.pending_targets(outbox_path) == set()
+    assert mapping['JAR-1']['synced_attachments'] == []
@@ -0,0 +1,13 @@
+# tests/test_prioritize_tickets.py
+from sync_app.core.records import FreshdeskTicket, JiraIssue
+from sync_app.services import sync_service
+
+def test_non_numeric_priority_codes_are_ignored():
+    config = {'FRESHDESK_TO_JIRA_PRIORITY': {'4': 'Highest', 'urgente': 'High', '1': 'Low'}}
+    jira_tickets = [JiraIssue('JAR-1', '2024-01-01', 'Backlog', 'Low'),
+                    JiraIssue('JAR-2', '2024-01-01', 'Backlog', 'Highest')]
+    freshdesk_tickets = [FreshdeskTicket(1, None, None, 2, 1, None), FreshdeskTicket(2, None, None, 2, 4, None)]
+
+    jira_sorted, fd_sorted = sync_service.prioritize_tickets(jira_tickets, freshdesk_tickets, {}, config)
+    assert [t.key for t in jira_sorted] == ['JAR-2', 'JAR-1']
+    assert [t.id for t in fd_sorted] == [2, 1]
@@ -0,0 +1,34 @@
+# tests/test_ticket_fetch.py
+from sync_app.services import freshdesk_service, jira_service
+
+FRESHDESK_CONFIG = {'FRESHDESK_DOMAIN': 'teste', 'FRESHDESK_AUTH': None}
+JIRA_CONFIG = {'JIRA_URL': 'https://teste.atlassian.net', 'JIRA_AUTH': None, 'JIRA_PROJECT_KEY': 'JAR'}
+
+def _fd_page(size, company_id=None):
+    return [{'id': n, 'company_id': company_id, 'status': 2, 'priority': 1, 'updated_at': '2024-01-01T00:00:00Z'}
+            for n in range(size)]
+
+def test_freshdesk_page_failure_is_not_a_partial_list(monkeypatch):
+    pages = iter([_fd_page(freshdesk_service.FRESHDESK_PAGE_SIZE), None])
+    monkeypatch.setattr(freshdesk_service, 'api_request', lambda *args, **kwargs: next(pages))
+    assert freshdesk_service.fetch_updated_freshdesk_tickets('2024-01-01', FRESHDESK_CONFIG) is None
+
+def test_jira_page_failure_is_not_a_partial_list(monkeypatch):
+    page = [{'key': f'JAR-{n}', 'fields': {'updated': '2024-01-01T00:00:00.000+0000'}} for n in range(jira_service.JIRA_SEARCH_PAGE_SIZE)]
+    pages = iter([{'issues': page, 'total': 250}, None])
+    monkeypatch.setattr(jira_service, 'api_request', lambda *args, **kwargs: next(pages))
+    assert jira_service.fetch_updated_jira_tickets('2024-01-01', JIRA_CONFIG) is None
+    pages = iter([{'issues': page, 'total': 250}, None])
+    assert jira_service.fetch_updated_jira_tickets_for_projects('2024-01-01', ['JAR', 'SAP'], JIRA_CONFIG) is None
+
+def test_companies_without_a_domain_wide_member_are_listed_by_company(monkeypatch):
+    calls = []
+
+    def fake_request(method, url, auth, params=None, **kwargs):
+        calls.append(params.get('company_id'))
+        return _fd_page(3, params.get('company_id'))
+
+    monkeypatch.setattr(freshdesk_service, 'api_request', fake_request)
+    result = freshdesk_service.fetch_updated_freshdesk_tickets_for_companies('2024-01-01', [7, 9, 7], FRESHDESK_CONFIG)
+    assert sorted(calls) == [7, 9]
+    assert len(result[7]) == len(result[9]) == 3